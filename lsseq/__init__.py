@@ -0,0 +1,6 @@
+# The scanning API, see scan() in lsseq/__main__.py. Imported when first
+# used, so that running the command line doesn't load the module twice.
+#
+def scan(paths=(), **options) :
+    from .__main__ import scan
+    return scan(paths, **options)
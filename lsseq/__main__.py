@@ -54,16 +54,17 @@
 # assumed to be of the form:
 #     <descriptiveName>.<frameNum>.<imgExtension>
 
-import argparse
+# Modules needed only some of the time (e.g., subprocess for --use-ls,
+# json, pickle, socket) are imported by the functions using them, rather
+# than here, to keep lsseq quick to start up. That goes for argparse too,
+# which the usual command lines can do without (see parseArgs()).
+#
 import os
+import stat
 import sys
-import subprocess
-import textwrap
 import math
-import copy
-import shutil
-from operator import itemgetter
-import seqLister
+from operator import itemgetter, attrgetter
+from array import array
 
 # MAJOR version for incompatible API changes
 # MINOR version for added functionality in a backwards compatible manner
@@ -166,6 +167,14 @@ gImageExtList = [
     "tpic"
 ]
 
+# Map of the (lowercase) extensions in the above lists to the kind of
+# files they denote, that is, a bitwise-or of LIST_IMGS, LIST_MOVS and
+# LIST_CACHES since an extension might appear in more than one list.
+# Built by makeExtCategories() once the lists are final (see main()),
+# so that classifying a file is a single dictionary lookup.
+#
+gExtCategories = {}
+
 # List of date formats accepted to set file times with --only-show.
 #
 # Note: We MUST list %y before %Y in each case below to make sure
@@ -194,23 +203,203 @@ DATE_FORMAT_LIST = [
 
 # Support for --global-sort-by-time feature.
 #
-gTimeList = []
-gImageDictionary = {}
-gCacheDictionary = {}
-gMovieDictionary = {}
+# The sequences of each directory are rendered as soon as the directory
+# has been read, and handed over (see addSortRun()) as a "run" of records
+#
+#     (sortKey, warnings, output)
+#
+# sorted by sortKey, so that only the text of the listing is held on to
+# rather than all the frames. main() merges the runs at the very end.
+# Whenever the runs take up more than --global-sort-memory megabytes
+# they get merged into a single run kept in a temporary file instead.
+#
+SORT_KEY      = 0
+SORT_WARNINGS = 1
+SORT_OUTPUT   = 2
+#
+SORT_RECORD_OVERHEAD = 200 # Rough bytes used per record besides its text.
+#
+gSortRuns = []
+gSortRunsSize = 0
+gSortSpillFiles = []
+#
+# With --limit only the best args.limit records are ever kept, and once
+# that many are in hand gSortCutoff holds the sort key of the last of
+# them, which any further sequence has to beat to be worth rendering.
+#
+gSortCutoff = None
+
+# When not None, what printSeq() (or printMovie()) writes out is captured here
+# instead as [warnings, output], see renderSeq().
+#
+gCapture = None
+
+# Thread-pool used to gather the contents of directories ahead
+# of time when --jobs is greater than one (see scanSubDir()).
+#
+gScanPool = None
+
+# The --jobs when there is more than one file or directory on the
+# command line and no --jobs was given, so that long lists of them
+# are read in about the time it takes to read the slowest.
+#
+CMDLINE_JOBS = 8
+
+# How many subdirectories of a directory, per thread of --jobs, can be
+# gathered ahead of time at once (see walkDirs()). Their DirScans are
+# held until listed, so this, not the number of subdirectories, bounds
+# how many are held.
+#
+PREFETCH_PER_JOB = 2
+
+# Support for the --cache feature (see scanDirCached()).
+#
+# Each directory read is remembered in a file of its own in the cache
+# directory gScanCacheDir, named after the device and inode numbers of
+# the directory and a hash of the options used (gScanCacheSignatureHash),
+# holding the pickled record
+#
+#     (validator, signature, entries, dirScan)
+#
+# where 'validator' is the (mtime, ctime) of the directory when it was
+# read, 'signature' sums up the options that affect gatherDirContents()
+# (see makeCacheSignature()), and 'entries' holds
+#
+#     (name, isDir, isSymLink, fileParts)
+#
+# for each directory entry, 'fileParts' being what seqSplit() made of
+# the name. Adding, removing or renaming a file changes the mtime of the
+# directory, so while the validator still matches the entries can be
+# used in place of reading the directory. The sizes and times of the
+# files are NOT covered by the directory's mtime though, so 'dirScan',
+# the finished DirScan, is only kept when nothing needed stat'ing (see
+# makeStatPlan()) and there are no sym-links, whose targets could change.
+#
+CACHE_VALIDATOR = 0
+CACHE_SIGNATURE = 1
+CACHE_ENTRIES   = 2
+CACHE_DIRSCAN   = 3
+#
+CACHE_FORMAT = 3            # Bump when the records change.
+CACHE_PREFIX = "lsseq-"     # Only files named like this are ever removed.
+CACHE_RACY_SECONDS = 2      # Directories changed this recently aren't cached.
+CACHE_TOUCH_SECONDS = 3600  # How stale the last-used time of a record may get.
+#
+gScanCacheDir = None
+gScanCacheSignature = None
+gScanCacheSignatureHash = None
+gScanCacheWritten = False
+
+# Support for the --daemon feature (see runDaemon()).
+#
+# The daemon holds, for every directory below the directories it was
+# started on, the name, type and lstat() results of each entry, kept up
+# to date with inotify(7) (see DirIndex). When a daemon is listening on
+# the socket --daemon-socket, lsseq asks it for the entries of each
+# directory it is about to read (see scanDirFromDaemon()) and only reads
+# the directory itself if the daemon doesn't know about it. Directories
+# are identified by their device and inode numbers.
+#
+# Requests and replies are pickled, each preceded by its length packed
+# as DAEMON_HEADER. A request is
+#
+#     (DAEMON_PROTOCOL, st_dev, st_ino)
+#
+# and the reply either None, or a list of
+#
+#     (name, isDir, isSymLink, st_mode, st_size, st_mtime, st_mtime_ns,
+#         st_ino, st_dev, st_nlink, st_blocks)
+#
+# for each entry of the directory, the last eight from its lstat().
+# (Sending whole os.stat_result objects takes a lot longer.)
+#
+DAEMON_PROTOCOL = 2  # Bump when the messages change.
+DAEMON_HEADER = "!I"
+DAEMON_TIMEOUT = 10  # Seconds to wait on the other end before giving up.
+#
+gDaemonSocket = None # A client's connection to the daemon.
+gDaemonLock = None   # Guards gDaemonSocket when --jobs is used.
+
+# inotify(7) constants used by DirIndex.
+#
+IN_MODIFY      = 0x00000002
+IN_ATTRIB      = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ONLYDIR     = 0x01000000
+#
+IN_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM \
+    | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+IN_EVENT_HEADER = "iIII" # wd, mask, cookie, len (followed by the name).
+
+# The listing is written to stdout through writeOut(), which collects
+# whole lines in gOutputBuffer and hands them on in large chunks. The
+# buffer is flushed at directory boundaries once OUTPUT_FLUSH_SIZE has
+# built up, whenever it reaches OUTPUT_MAX_SIZE, after every line if
+# stdout is a tty (or with --line-buffered), and before any warning
+# that has to appear in the right place amongst the listing.
+#
+OUTPUT_FLUSH_SIZE = 64 * 1024
+OUTPUT_MAX_SIZE   = 1024 * 1024
+#
+gOutputBuffer = []
+gOutputSize = 0
+gFlushEveryLine = False
+gWarningsInterleave = True
+
+# The --format choices that list everything as JSON records, one per
+# line (see writeRecord()), rather than as text. With 'json' the records
+# also make up one JSON array, opened by "[" in front of the first record
+# and with "," in front of each of the others (see writeOut()), so that
+# gJsonSeparator holds what goes in front of the next record.
+#
+JSON_FORMATS = ("json", "ndjson")
+#
+gJsonSeparator = None
 
-# Array indices for the data list within the image and cache dictionaries.
+# Support for --profile (see setupProfile()).
+#
+# So that profiling costs nothing when it's off, the functions doing
+# each phase of the work are only swapped for ones that also time them
+# once profiling is turned on. PROFILE_PHASES lists the phases, the
+# function doing each, and whether each call is also an event for
+# --profile-trace (not so for those called once per file or sequence).
+# The phases overlap, e.g., "scan" includes "readdir" and "gather".
 #
-FRAME_NUM        = 0
-FRAME_SIZE       = 1
-FRAME_MTIME      = 2
-FRAME_PADDING    = 3
-FRAME_ISSYMLINK  = 4
+# PROFILE_CALLS lists the system calls counted where lsseq makes them
+# while listing (see profileCall()), rather than swapping the functions
+# of the os module, which would also miss os.DirEntry's stat() calls.
+# Note: the stat() and lstat() of a file are counted each time lsseq
+# asks for them, even when the os.DirEntry (or CmdLineEntry) already
+# has them cached.
+#
+PROFILE_PHASES = (
+    ("scan",     "scanDir",           True),
+    ("readdir",  "listDirEntries",    True),
+    ("gather",   "gatherDirContents", True),
+    ("stat",     "fileStats",         False),
+    ("classify", "seqSplit",          False),
+    ("print",    "printSeq",          False),
+    ("analysis", "inspectSeq",        False),
+    ("ls",       "runLs",             True),
+    ("output",   "flushOut",          True),
+)
+PROFILE_CALLS = ("lstat", "stat", "fstat", "open", "scandir", "ls")
+PROFILE_SLOWEST_DIRS = 10
+#
+gProfile = None # The Profile being kept, if any.
 
 # Array indices for the tuple stored in the movie dictionary.
 #
 MOVIE_MTIME      = 0
 MOVIE_ISSYMLINK  = 1
+MOVIE_SIZE       = 2
+MOVIE_BLOCKS     = 3
 
 # Since the following value is stored with the mtime of a frame (or movie)
 # it actually means -1 second before January 1, 1970, 00:00:00 (UTC)
@@ -219,6 +408,16 @@ MOVIE_ISSYMLINK  = 1
 #
 FILE_BROKENLINK = -1
 
+# What FrameList.links holds for a frame that is a broken sym-link (as
+# opposed to 1 for one that isn't broken, and 0 for a regular file).
+#
+FRAME_BROKENLINK = 2
+
+# Sequences with more frames than this have the --time median of their
+# frames selected from them rather than sorting them all, see medianTime().
+#
+MEDIAN_SELECT_MIN = 5000
+
 # EXIT codes, they will be combined bitwise to return 
 # possibly more than one different warning and/or error.
 #
@@ -232,11 +431,10 @@ EXIT_LSSEQ_NOSUCHFILE_WARNING = 32 # A non-existent sequence-file was listed on
 #
 gExitStatus = EXIT_NO_ERROR
 
-# Array indices for timeList (used in "listSeqDir()") and gTimeList
+# Array indices for timeList (used in "listSeqDir()").
 #
 DICTKEY = 0
 MTIME = 1
-TRAVERSEDPATH = 2
 
 # For --prepend-path-abs and --prepend-path-rel support.
 #
@@ -281,8 +479,6 @@ LIST_NOT_MOVS       = 0b1101 # For omitting MOVS as seqs
 LIST_CACHES         = 0b0001 # Flag for caches
 LIST_NOT_CACHES     = 0b1110 # For omitting CACHES as seqs
 
-gListWhichFiles     = LIST_NO_OMISSIONS # Default behaviour
-
 # For support of the treatment of sym-links.
 #
 ARG_LIST_DEREF_ALL_CMDLINE   = 0 # --dereference-command-line, -H
@@ -301,7 +497,20 @@ DEREF_CMD_LINE               = 0b0100 # Flag to check if ONLY following links on
 DEREF_DIRS                   = 0b0010 # Flag to check for following links to directories
 DEREF_FILES                  = 0b0001 # Flag to check for following links to regular-files
 
-gDeRefWhichFiles             = 0b0111 # Default behaviour '-H' flag
+DEREF_DEFAULT                = 0b0111 # Default behaviour '-H' flag
+
+# The "stat plan", i.e., which file metadata needs to be looked up for
+# each category of sequence (see makeStatPlan()). Anything not asked for
+# is never stat'ed, so a listing that doesn't report sizes or times can
+# run on the directory entries alone.
+#
+# Note: sym-links are ALWAYS stat'ed (followed) regardless of the plan,
+# to be able to report broken links.
+#
+STAT_NAME_ONLY               = 0b000 # Name and file-type (from readdir) are enough
+STAT_NEED_SIZE               = 0b001 # Frame sizes needed (zero and bad frames)
+STAT_NEED_MTIME              = 0b010 # Modification times needed (sorting, --only-show)
+STAT_NEED_MODE               = 0b100 # File type and permissions needed (-F indicators)
 
 # To pass along to 'ls' options.
 #
@@ -310,6 +519,20 @@ BY_SINGLE = 1
 BY_COLUMNS = 2
 BY_ROWS = 3
 
+# The built-in formatter for non-sequences (see printOtherFiles())
+# lays out columns the same way as the native 'ls' of the platform,
+# either GNU coreutils or BSD (e.g. Darwin).
+#
+LS_LAYOUT_GNU = 0
+LS_LAYOUT_BSD = 1
+if sys.platform == "darwin" or "bsd" in sys.platform :
+    gLsLayout = LS_LAYOUT_BSD
+else :
+    gLsLayout = LS_LAYOUT_GNU
+
+LS_TAB_SIZE = 8         # Both GNU and BSD 'ls' align columns with tabs.
+LS_MIN_COLUMN_WIDTH = 3 # GNU 'ls', a one character name plus two spaces.
+
 # Array indices for results of the "seqSplit()" function.
 #
 SEQKEY = 0
@@ -340,6 +563,8 @@ def isFrameNum(f) :
     return (f != '') and (f.isdigit() or (f[0] == '-' and f[1:].isdigit()))
 
 def readByteShortForm(numBytes) :
+    import argparse
+
     multiplier = 1
     if numBytes[-1] == 'K' or numBytes[-1] == 'k' :
         multiplier = 1<<10
@@ -361,29 +586,80 @@ def readByteShortForm(numBytes) :
         msg = "%r is not a valid byte size" % numBytes
         raise argparse.ArgumentTypeError(msg)
 
-# Splits up a filename by the dots in the name.
+def readNumJobs(numJobs) :
+    import argparse
+
+    try:
+        n = int(numJobs)
+    except ValueError :
+        n = 0
+    if n < 1 :
+        msg = "%r is not a positive integer" % numJobs
+        raise argparse.ArgumentTypeError(msg)
+    return n
+
+def readMegabytes(megabytes) :
+    import argparse
+
+    try:
+        n = int(megabytes)
+    except ValueError :
+        n = -1
+    if n < 0 :
+        msg = "%r is not a non-negative integer" % megabytes
+        raise argparse.ArgumentTypeError(msg)
+    return n
+
+# The (ascii) digits, to check a name for any with isdisjoint().
 #
-def splitFileComponents(filename) :
-    fileComponents = filename.split(".")
+DIGITS = frozenset("0123456789")
 
-    # A file with no extension.
-    #
-    if len(fileComponents) <= 1 :
-        return fileComponents
+# Build gExtCategories from the lists of image, movie and cache extensions.
+#
+def makeExtCategories() :
+    extCategories = {}
+    for category, extList in ((LIST_IMGS, gImageExtList),
+            (LIST_MOVS, gMovieExtList), (LIST_CACHES, gCacheExtList)) :
+        for ext in extList :
+            extCategories[ext] = extCategories.get(ext, 0) | category
+    return extCategories
+
+# Return the two-tuple (extDot, category) for the extension of
+# 'filename', where 'extDot' is the index of the dot that starts the
+# extension, or -1 if there isn't one, and 'category' says whether it
+# is an image and/or a cache extension (LIST_IMGS | LIST_CACHES bits).
+#
+# Extensions with a dot (for example, bgeo.sc, bgeo.g, or vdb.gz) take
+# precedence, but only when they are image or cache extensions.
+# Note: a filename which IS such an extension (e.g. "bgeo.sc") is
+# treated as having no extension at all.
+#
+def seqExtension(filename) :
+    lastDot = filename.rfind(".")
+    if lastDot < 0 :
+        return (-1, 0)
 
-    # Check for extensions with dot (for example, bgeo.sc, bgeo.g, or vdb.gz)
-    # and join them before returning result.
     # Note: use of lower() allows us to ignore case of extensions.
     #
-    if (".".join(fileComponents[-2:]).lower() in gImageExtList) \
-	    or (".".join(fileComponents[-2:]).lower() in gCacheExtList) :
+    prevDot = filename.rfind(".", 0, lastDot)
+    category = gExtCategories.get(filename[prevDot+1:].lower(), 0) & (LIST_IMGS | LIST_CACHES)
+    if category :
+        return (prevDot, category)
+    return (lastDot, gExtCategories.get(filename[lastDot+1:].lower(), 0) & (LIST_IMGS | LIST_CACHES))
+
+# Splits up a filename by the dots in the name, keeping image and cache
+# extensions that contain a dot in one piece (see seqExtension()).
+#
+def splitFileComponents(filename) :
+    extDot = seqExtension(filename)[0]
 
-        # If we found a match, join the last two items,
-        # into the second last slot, then and delete the last one.
-        #
-        fileComponents[-2] = ".".join(fileComponents[-2:])
-        del fileComponents[-1]
+    # A file with no extension.
+    #
+    if extDot < 0 :
+        return [filename]
 
+    fileComponents = filename[:extDot].split(".")
+    fileComponents.append(filename[extDot+1:])
     return fileComponents
 
 # Return two components if "filename" is formatted like a file in a
@@ -395,29 +671,29 @@ def splitFileComponents(filename) :
 #
 def seqSplit(filename, args) :
 
-    fileComponents = splitFileComponents(filename)
-
-    # A file with no extension.
+    # No need to split up names that can't have a frame number. Note: names
+    # with non-ascii characters still get checked, as str.isdigit() (see
+    # isFrameNum()) is true for more than just "0" to "9".
     #
-    if len(fileComponents) <= 1 :
+    if DIGITS.isdisjoint(filename) and filename.isascii() :
         return []
 
-    # Test if image or cache sequence.
-    # Note: use of lower() allows us to ignore case of extensions.
+    # Test if image or cache sequence, before doing any splitting.
+    # Note: a file with no extension can't be either.
     #
-    if (fileComponents[-1].lower() in gImageExtList) \
-            or (fileComponents[-1].lower() in gCacheExtList) :
+    extDot, category = seqExtension(filename)
+    if extDot >= 0 and category :
+
+        fileComponents = filename[:extDot].split(".")
+        fileComponents.append(filename[extDot+1:])
 
         if not args.strictSeparator :
-            looseFileComponents = fileComponents[-2].split("_")
-            if len(looseFileComponents) > 1 :
-                if isFrameNum(looseFileComponents[-1]) :
-
-                    fileFrameNum = looseFileComponents[-1]
-                    looseFileComponents.pop(-1)
-                    looseFileComponents[-1] = looseFileComponents[-1] + "_"
-                    looseFileKey = "_".join(looseFileComponents)
-                    fileComponents[-2] = looseFileKey
+            looseFileRoot, looseSep, looseFrameNum = fileComponents[-2].rpartition("_")
+            if looseSep != "" :
+                if isFrameNum(looseFrameNum) :
+
+                    fileFrameNum = looseFrameNum
+                    fileComponents[-2] = looseFileRoot + "_"
                     fileKey = ".".join(fileComponents)
                     return [fileKey, fileFrameNum]
 
@@ -434,12 +710,12 @@ def seqSplit(filename, args) :
 # Return true if and only if filename is a movie file.
 #
 def isMovie(filename) :
-    fileComponents = filename.split(".")
+    lastDot = filename.rfind(".")
 
     # Note: use of lower() allows us to ignore case of extensions.
     #
-    return len(fileComponents) > 1 \
-        and fileComponents[-1].lower() in gMovieExtList
+    return lastDot >= 0 \
+        and bool(gExtCategories.get(filename[lastDot+1:].lower(), 0) & LIST_MOVS)
 
 KEY_NAME  = 0
 KEY_FRAME = 1
@@ -465,128 +741,580 @@ def splitImageKey(filenameKey) :
 # is a cache sequence (as opposed to an images sequence).
 #
 def isCache(keyName) :
-    splitKey = splitImageKey(keyName)
-    # use of lower() allows us to ignore case of extensions.
-    return splitKey[-1].lower() in gCacheExtList
+    return bool(seqExtension(keyName)[1] & LIST_CACHES)
+
+# The parsed form of a sequence's dictionary key (from seqSplit(), for
+# example "a.b.c..exr" or "a.b.c_.exr") or of a movie's filename, made
+# once per sequence while gathering the contents of a directory (see
+# gatherDirContents()) so that the key doesn't need splitting up again
+# every time it's printed or sorted.
+#
+#         name - The dictionary key itself, i.e. prefix + sep + "." + ext.
+#       prefix - The filename up to the frame number's separator, "a.b.c".
+#          sep - The separator before the frame number, "." or "_"
+#                (or "" for movies).
+#          ext - The extension (no dot included in the string), "exr".
+#     category - One of LIST_IMGS, LIST_CACHES or LIST_MOVS.
+#
+# A SequenceKey hashes, compares and sorts the same as its name.
+#
+class SequenceKey :
+    __slots__ = ("name", "prefix", "sep", "ext", "category")
+
+    def __init__(self, name, category) :
+        self.name = name
+        self.category = category
+        if category == LIST_MOVS :
+            self.prefix, dot, self.ext = name.rpartition(".")
+            self.sep = ""
+        else :
+            fileRoot, frame, self.ext = splitImageKey(name)
+            self.prefix = fileRoot[:-1]
+            self.sep = fileRoot[-1]
+
+    def __hash__(self) :
+        return hash(self.name)
+
+    def __eq__(self, other) :
+        if isinstance(other, SequenceKey) :
+            return self.name == other.name
+        return self.name == other
+
+    def __lt__(self, other) :
+        if isinstance(other, SequenceKey) :
+            return self.name < other.name
+        return self.name < other
+
+    def __str__(self) :
+        return self.name
+
+    def __repr__(self) :
+        return "SequenceKey(" + repr(self.name) + ")"
 
 # Reconstruct the imagename with the frame number
-# from the dictionary key..
+# from the sequence's SequenceKey.
 #
-def actualImageName(filenameKey, padding, frame) :
-    fileParts = splitImageKey(filenameKey)
+def actualImageName(seqKey, padding, frame) :
     formatStr = "{0:0=-" + str(padding) + "d}"
-    return fileParts[KEY_NAME] + formatStr.format(frame) + "." + fileParts[KEY_EXT]
-
-# Given the string "seq" then extract two integers for the start
-# and end frames and return them as a two-tuple.
-#
-# seq might be range with neg numbers. Assume N,M >= 0,
-# then there are only 5 seq cases that we need to be
-# concerned with: N, -N, N-M, -N-M, -N--M,
-# where -N or N is always less than or equal to -M or M.
-#
-# Code added in v4.1.0, stolen, then modifed, from renumseq v2.1.0
-#     Furthermore, as of v4.1.0 this function will only ever be
-#     called with output from seqLister.condenseSeqOnes() so
-#     the input arg "seq" will always be a valid sequence string
-#     of the above described form. Note: some exception handling
-#     that existed in the renumseq implementation of this isn't needed.
-#
-def extractStartEnd(seq) :
-
-    negStart = 1
-    negEnd = 1
-    startStr = "0"
-    endStr = "0"
-    frRange = seq.split("-")
-
-    # Invalid syntax will never happen.
-    #
-    # if len(frRange) > 4 :
-        # return (0, 0) # Doesn't matter contents.
-
-    if len(frRange) == 1 : # Just N
-        startStr = frRange[0]
-        endStr = frRange[0]
-
-    elif len(frRange) == 2 : # minus-N OR N-M
-        if frRange[0] == '' : # Leading minus sign.
-            negStart = -1
-            negEnd = -1
-            startStr = frRange[1]
-            endStr = frRange[1]
-        else :
-            startStr = frRange[0]
-            endStr = frRange[1]
+    return seqKey.prefix + seqKey.sep + formatStr.format(frame) + "." + seqKey.ext
+
+# Returns traversedPath with any leading "./" stripped off, as it
+# is displayed in front of the listing. (added v3.0.1)
+#
+def displayPath(traversedPath) :
+    if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
+        return traversedPath[2:]
+    return traversedPath
 
-    elif len(frRange) == 3 : # neg-N to M
+# Work out when the listing needs flushing (see gOutputBuffer).
+#
+# Warnings only need stdout flushed ahead of them when they end up
+# in the same place as the listing, say, a terminal or "2>&1".
+#
+def setupOutput(args) :
+    global gFlushEveryLine
+    global gWarningsInterleave
+
+    gFlushEveryLine = args.lineBuffered or sys.stdout.isatty()
+    gWarningsInterleave = True
+    if not gFlushEveryLine :
+        try :
+            gWarningsInterleave = os.path.samestat(
+                os.fstat(sys.stdout.fileno()), os.fstat(sys.stderr.fileno()))
+        except (OSError, ValueError) :
+            pass
 
-        # Not leading minus sign! Invalid systax.
-        #
-        # if frRange[0] != '' :
-            # Will never happen so doesn't matter
-            # what's returned.
-            # return (0, 0)
+# Add 'text' (one or more whole lines) to the listing.
+#
+def writeOut(text) :
+    global gOutputSize
+    global gJsonSeparator
 
-        negStart = -1
-        startStr = frRange[1]
-        endStr = frRange[2]
+    if gCapture != None :
+        gCapture[1] += text
+        return
 
-    elif len(frRange) == 4 : # neg-N to neg-M
+    if gJsonSeparator != None :
+        text = gJsonSeparator + text[:-1].replace("\n", "\n,") + "\n"
+        gJsonSeparator = ","
 
-        # Not leading minus signs! Invalid syntax.
-        #
-        # if frRange[0] != '' or frRange[2] != '' :
-            # Will never happen so doesn't matter
-            # what's returned.
-            # return (0, 0)
+    gOutputBuffer.append(text)
+    gOutputSize += len(text)
+    if gFlushEveryLine or gOutputSize >= OUTPUT_MAX_SIZE :
+        flushOut()
 
-        negStart = -1
-        negEnd = -1
-        startStr = frRange[1]
-        endStr = frRange[3]
+def flushOut() :
+    global gOutputSize
 
-    start = int(startStr) * negStart
-    end = int(endStr) * negEnd
+    if len(gOutputBuffer) > 0 :
+        sys.stdout.write("".join(gOutputBuffer))
+        gOutputBuffer.clear()
+        gOutputSize = 0
+    sys.stdout.flush()
 
-    return (start, end)
+# Write out 'record', a dictionary, as one line of JSON (see JSON_FORMATS).
+#
+def writeRecord(record) :
+    import json
 
-# Prints an individual sequence based on cmd-line-args.
-# frameList comes in sorted from smallest frame number to largest.
+    writeOut(json.dumps(record) + "\n")
+
+# Returns the pair (directory, name) that go in the JSON record for the
+# file 'name' listed under 'traversedPath' (see JSON_FORMATS).
 #
-# Reminder: frameList is a list of five-tuples as described in
-# listSeqDir comments:
+def recordPath(traversedPath, name) :
+    if name[:1] != "/" :
+        name = displayPath(traversedPath) + name
+    dirName, baseName = os.path.split(name)
+    if dirName == "" :
+        dirName = "."
+    return (dirName, baseName)
+
+# Finish off the listing with --format json.
 #
-#     [ (frameNum, fileSize, mtime, padding, isSymLink), ... ]
+def endJsonArray() :
+    if gJsonSeparator == "[" :
+        writeOut("]\n") # Nothing listed, so make that "[]".
+    elif gJsonSeparator != None :
+        gOutputBuffer.append("]\n")
+
+# Called between directories, the preferred place to flush the listing.
 #
-# As of v4.1.0 - also prints an individual sequence as multiple
-# sequences (with the same name) if --split-sequence was invoked.
+def endOfDirectory() :
+    if gOutputSize >= OUTPUT_FLUSH_SIZE :
+        flushOut()
+
+# Called just before printing a warning on stderr.
 #
-def printSeq(filenameKey, frameList, args, traversedPath) :
+def flushForWarning() :
+    if gWarningsInterleave :
+        flushOut()
+    sys.stderr.flush()
 
-    global gExitStatus
-    global gListWhichFiles
-    global gDeRefWhichFiles
+# Print 'text' (one or more whole lines) on stderr.
+#
+def writeWarning(text) :
+    if gCapture != None :
+        gCapture[0] += text
+        return
 
-    fileComponents = splitImageKey(filenameKey)
-    classifyTag = ""
-    seqIsLink = any(t[4] == True for t in frameList)
-    if seqIsLink :
-        seqMixedLink = any(t[4] == False for t in frameList)
-    if seqIsLink and not seqMixedLink and args.classify:
-        classifyTag = "@"
+    flushForWarning()
+    sys.stderr.write(text)
+    sys.stderr.flush()
+
+# Returns the pair (warnings, output) of what 'printFunction' (printSeq()
+# or printMovie()) would have written out given 'printArgs'.
+#
+def renderSeq(printFunction, *printArgs) :
+    global gCapture
+
+    gCapture = ["", ""]
+    printFunction(*printArgs)
+    warnings, output = gCapture
+    gCapture = None
+    return (warnings, output)
+
+# Sort the --global-sort-by-time records of one directory and keep them
+# for mergeSortRuns(), spilling all the runs so far to a temporary file
+# if they are taking up too much memory.
+#
+def addSortRun(run, args) :
+    global gSortRunsSize
+    global gSortCutoff
+    import itertools
+
+    run.sort(key=itemgetter(SORT_KEY), reverse=args.reverseListing)
+
+    if args.limit != None :
+        if len(run) > 0 :
+            gSortRuns.append(run[:args.limit])
+        if sum(len(r) for r in gSortRuns) > 2 * args.limit :
+            bestRun = list(itertools.islice(mergeSortRuns(args), args.limit))
+            gSortRuns.clear()
+            gSortRuns.append(bestRun)
+            gSortCutoff = bestRun[-1][SORT_KEY]
+        return
+
+    gSortRuns.append(run)
+    for record in run :
+        gSortRunsSize += SORT_RECORD_OVERHEAD + len(record[SORT_KEY][1]) \
+            + len(record[SORT_KEY][2]) + len(record[SORT_WARNINGS]) + len(record[SORT_OUTPUT])
+    if gSortRunsSize > args.globalSortMemory * 1024 * 1024 :
+        spillSortRuns(args)
+
+def spillSortRuns(args) :
+    global gSortRunsSize
+    import heapq
+    import pickle
+    import tempfile
+
+    spillFile = tempfile.TemporaryFile()
+    for record in heapq.merge(*gSortRuns, key=itemgetter(SORT_KEY), reverse=args.reverseListing) :
+        pickle.dump(record, spillFile, pickle.HIGHEST_PROTOCOL)
+    spillFile.seek(0)
+    gSortSpillFiles.append(spillFile)
+    gSortRuns.clear()
+    gSortRunsSize = 0
+
+def readSpillFile(spillFile) :
+    import pickle
+
+    try :
+        while True :
+            yield pickle.load(spillFile)
+    except EOFError :
+        spillFile.close()
+
+# Returns all the --global-sort-by-time records in their final order.
+#
+# Note: heapq.merge() is stable, and the spill files (in the order they
+# were written) hold records from earlier directories than gSortRuns.
+#
+def mergeSortRuns(args) :
+    import heapq
+    import itertools
+
+    records = heapq.merge(*[readSpillFile(f) for f in gSortSpillFiles], *gSortRuns,
+        key=itemgetter(SORT_KEY), reverse=args.reverseListing)
+    if args.limit != None :
+        return itertools.islice(records, args.limit)
+    return records
+
+# Returns whether a sequence with the key 'sortKey' could still make it
+# into the --limit best of --global-sort-by-time. (Ties go to the
+# sequences already seen.)
+#
+def beatsSortCutoff(sortKey, args) :
+    if gSortCutoff == None :
+        return True
+    if args.reverseListing :
+        return sortKey > gSortCutoff
+    return sortKey < gSortCutoff
+
+# A set of frame numbers held as a sorted list of disjoint (start, end)
+# runs, where touching runs are always joined into one. The set
+# operations below all work run by run, never frame by frame, so a
+# sequence spanning millions of frames costs no more than the number of
+# runs it is broken into.
+#
+class FrameRanges :
+    __slots__ = ("runs",)
+
+    def __init__(self, runs=()) :
+        self.runs = []
+        for start, end in sorted(runs) :
+            self.addRun(start, end)
+
+    # Add the run start-end, which must not start before the last run
+    # in the set does.
+    #
+    def addRun(self, start, end) :
+        if len(self.runs) > 0 and start <= self.runs[-1][1] + 1 :
+            if end > self.runs[-1][1] :
+                self.runs[-1] = (self.runs[-1][0], end)
+        else :
+            self.runs.append((start, end))
+
+    def addFrame(self, frame) :
+        self.addRun(frame, frame)
+
+    def union(self, other) :
+        import heapq
+
+        result = FrameRanges()
+        for start, end in heapq.merge(self.runs, other.runs) :
+            result.addRun(start, end)
+        return result
+
+    def intersection(self, other) :
+        result = FrameRanges()
+        i = 0
+        j = 0
+        while i < len(self.runs) and j < len(other.runs) :
+            start = max(self.runs[i][0], other.runs[j][0])
+            end = min(self.runs[i][1], other.runs[j][1])
+            if start <= end :
+                result.runs.append((start, end))
+            if self.runs[i][1] < other.runs[j][1] :
+                i += 1
+            else :
+                j += 1
+        return result
+
+    def difference(self, other) :
+        result = FrameRanges()
+        j = 0
+        for start, end in self.runs :
+            while j < len(other.runs) and other.runs[j][1] < start :
+                j += 1
+            k = j
+            while k < len(other.runs) and other.runs[k][0] <= end :
+                if other.runs[k][0] > start :
+                    result.runs.append((start, other.runs[k][0] - 1))
+                start = other.runs[k][1] + 1
+                k += 1
+            if start <= end :
+                result.runs.append((start, end))
+        return result
+
+    # The frames of the set that lie within start-end.
+    #
+    def window(self, start, end) :
+        import bisect
+
+        result = FrameRanges()
+        i = bisect.bisect_left(self.runs, (start,))
+        if i > 0 and self.runs[i-1][1] >= start :
+            i -= 1
+        while i < len(self.runs) and self.runs[i][0] <= end :
+            result.runs.append((max(self.runs[i][0], start), min(self.runs[i][1], end)))
+            i += 1
+        return result
+
+    # Returns the runs as [start, end] lists, as in the JSON records
+    # (see seqRecords()).
+    #
+    def runLists(self) :
+        return [[start, end] for start, end in self.runs]
+
+    # Returns the frames as the list of strings that
+    # seqLister.condenseSeqOnes(frames) returns, that is, with ranges
+    # (A-B) only ever made of successive frames.
+    #
+    def condenseOnes(self) :
+        return [str(start) if start == end else str(start) + "-" + str(end)
+            for start, end in self.runs]
+
+    # Returns exactly what seqLister.condenseSeq(frames) returns.
+    #
+    # condenseSeq() records the gaps between successive frames, groups
+    # equal gaps into "gap runs" then, largest gap run first, lets each of
+    # them steal the shared end frames of its neighbours. Here a run N-M
+    # simply contributes M-N gaps of size one, so the work done depends
+    # on the number of runs rather than on the number of frames.
+    #
+    def condense(self) :
+        runs = self.runs
+        if len(runs) == 0 :
+            return []
+        if len(runs) == 1 and runs[0][0] == runs[0][1] :
+            return [str(runs[0][0])]
+
+        # Each gap run is the list [seqLen, firstFrame, gapSize, isCorrected].
+        #
+        SEQLEN_IND    = 0
+        FIRST_IND     = 1
+        GAPSIZE_IND   = 2
+        CORRECTED_IND = 3
+
+        gapRunList = []
+        prevEnd = None
+        for start, end in runs :
+            gaps = []
+            if prevEnd is not None :
+                gaps.append((start - prevEnd, 1, prevEnd))
+            if end > start :
+                gaps.append((1, end - start, start))
+            for gapSize, gapCount, fromFrame in gaps :
+                if len(gapRunList) > 0 and gapRunList[-1][GAPSIZE_IND] == gapSize :
+                    gapRunList[-1][SEQLEN_IND] += gapCount
+                else :
+                    gapRunList.append([gapCount + 1, fromFrame, gapSize, False])
+            prevEnd = end
+        gapRunList.append([0, prevEnd, 0, False]) # Entry for the last frame.
 
-    missingFrames = []
-    zeroFrames = []
-    badFrames = []
-    badPadFrames = []
-    errFrames = []
-    minFrame = frameList[0][FRAME_NUM]
-    maxFrame = frameList[-1][FRAME_NUM]
+        while True :
+
+            # Find largest run with smallest gapSize.
+            #
+            runInd = len(gapRunList) - 1
+            maxSeqLen = 0
+            maxSeqLenGapSize = 0
+            i = 0
+            for run in gapRunList :
+                if not run[CORRECTED_IND] :
+                    if run[SEQLEN_IND] > maxSeqLen :
+                        runInd = i
+                        maxSeqLen = run[SEQLEN_IND]
+                        maxSeqLenGapSize = run[GAPSIZE_IND]
+                    elif run[SEQLEN_IND] == maxSeqLen and run[GAPSIZE_IND] < maxSeqLenGapSize :
+                        runInd = i
+                        maxSeqLenGapSize = run[GAPSIZE_IND]
+                i += 1
+
+            if runInd == len(gapRunList) - 1 :
+                break
+
+            gapRunList[runInd][CORRECTED_IND] = True
+
+            # Steal the last frame of the prior run and the first frame of
+            # the next run, if they aren't already corrected.
+            #
+            if runInd > 0 and not gapRunList[runInd-1][CORRECTED_IND] :
+                gapRunList[runInd-1][SEQLEN_IND] -= 1
+            if not gapRunList[runInd+1][CORRECTED_IND] :
+                gapRunList[runInd+1][SEQLEN_IND] -= 1
+                gapRunList[runInd+1][FIRST_IND] += gapRunList[runInd+1][GAPSIZE_IND]
+
+        condensedList = []
+        for seqLen, firstFrame, gapSize, isCorrected in gapRunList :
+            if seqLen <= 0 :
+                continue
+            if seqLen == 1 :
+                condensedList.append(str(firstFrame))
+            elif seqLen == 2 and gapSize > 1 :
+                condensedList.append(str(firstFrame))
+                condensedList.append(str(firstFrame + gapSize))
+            else :
+                condensedList.append(str(firstFrame) + "-" + str(firstFrame + (seqLen - 1) * gapSize))
+                if gapSize > 1 :
+                    condensedList[-1] = condensedList[-1] + "x" + str(gapSize)
+        return condensedList
+
+# The frames of one image or cache sequence, stored column by column
+# rather than as a list of six-tuples, one per frame, which keeps the
+# memory used by very large sequences down to a few bytes per frame.
+# Frame i of the sequence is:
+#
+#     (nums[i], sizes[i], mtimes[i], paddings[i], links[i], blocks[i])
+#
+# That is, its frame number, file size, mtime (FILE_BROKENLINK for a
+# broken sym-link), padding, whether or not it is a sym-link (or
+# FRAME_BROKENLINK) and the number of 512 byte blocks allocated to it.
+#
+# Only the columns the listing is going to look at are kept though,
+# the others are None (see newFrameList()): the sizes for the zero and
+# bad frames, --long and JSON records, the mtimes for --long, JSON
+# records and the --time median, and the blocks for --long. The oldest
+# and newest mtimes of the frames (leaving out broken sym-links), all
+# that -t, -G and --only-show need otherwise, are kept track of as the
+# frames come in when 'timed', and are None until then.
+#
+# Note: should a frame number (or padding) ever be too big to fit in
+# its array, then that column just becomes a regular list instead.
+#
+class FrameList :
+    __slots__ = ("nums", "sizes", "mtimes", "paddings", "links", "blocks",
+        "timed", "oldest", "newest")
+    COLUMNS = ("nums", "sizes", "mtimes", "paddings", "links", "blocks")
+
+    def __init__(self, keepSizes=True, keepMTimes=True, keepBlocks=True, timed=True) :
+        self.nums = array('q')
+        self.sizes = array('q') if keepSizes else None
+        self.mtimes = array('d') if keepMTimes else None
+        self.paddings = bytearray()
+        self.links = bytearray()
+        self.blocks = array('q') if keepBlocks else None
+        self.timed = timed
+        self.oldest = None
+        self.newest = None
+
+    def append(self, frameNum, fileSize, mtime, padding, isSymLink, blocks) :
+        try :
+            self.nums.append(frameNum)
+        except OverflowError :
+            self.nums = list(self.nums)
+            self.nums.append(frameNum)
+        try :
+            self.paddings.append(padding)
+        except ValueError :
+            self.paddings = list(self.paddings)
+            self.paddings.append(padding)
+        if mtime == FILE_BROKENLINK :
+            self.links.append(FRAME_BROKENLINK)
+        else :
+            self.links.append(isSymLink)
+            if self.timed :
+                if self.oldest == None or mtime < self.oldest :
+                    self.oldest = mtime
+                if self.newest == None or mtime > self.newest :
+                    self.newest = mtime
+        if self.sizes != None :
+            self.sizes.append(fileSize)
+        if self.mtimes != None :
+            self.mtimes.append(mtime)
+        if self.blocks != None :
+            self.blocks.append(blocks)
+
+    def __len__(self) :
+        return len(self.nums)
+
+    # Sort the frames by frame number, then by padding.
+    # Like list.sort() this is stable.
+    #
+    def sort(self) :
+        numFrames = len(self.nums)
+        order = [f[2] for f in sorted(zip(self.nums, self.paddings, range(numFrames)))]
+        if order == list(range(numFrames)) :
+            return
+        for column in FrameList.COLUMNS :
+            oldColumn = getattr(self, column)
+            if oldColumn == None :
+                continue
+            newColumn = [oldColumn[i] for i in order]
+            if isinstance(oldColumn, array) :
+                newColumn = array(oldColumn.typecode, newColumn)
+            elif isinstance(oldColumn, bytearray) :
+                newColumn = bytearray(newColumn)
+            setattr(self, column, newColumn)
+
+# Returns an empty FrameList for a sequence of the category 'seqCategory'
+# (LIST_IMGS or LIST_CACHES), keeping only the columns that the listing
+# chosen by 'args' looks at.
+#
+def newFrameList(seqCategory, args) :
+    statNeeds = args.statPlan[seqCategory]
+    keepMTimes = (statNeeds & STAT_NEED_MTIME) != 0 and \
+        (args.longListing or args.seqFormat in JSON_FORMATS or args.timeCompare == 'median')
+    return FrameList(keepSizes=(statNeeds & STAT_NEED_SIZE) != 0, keepMTimes=keepMTimes,
+        keepBlocks=args.longListing, timed=(statNeeds & STAT_NEED_MTIME) != 0)
+
+# The frames of a sequence sorted out by inspectSeq(), ready to be
+# printed by printSeq() or made into JSON records by seqRecords().
+#
+#      padding - The padding of the frame numbers.
+# uniqueFrames - The indices (into the FrameList) of the frames being
+#                kept, i.e., all but any duplicated frame numbers.
+#   uniqueNums - The frame numbers of those, for finding the frames
+#                of each split-sequence.
+#    splitSeqs - The sequences to list, see inspectSeq().
+#     warnings - (message, exitStatusBit) two-tuples, the same as
+#                for a DirScan, to be reported before the sequence.
+#
+class SeqFrames :
+    def __init__(self) :
+        self.padding = 0
+        self.uniqueFrames = []
+        self.uniqueNums = []
+        self.splitSeqs = []
+        self.warnings = []
+
+# Sort out the frames of an individual sequence into a SeqFrames.
+# frameList (a FrameList) comes in sorted from smallest frame number
+# to largest.
+#
+# Like gatherDirContents() this doesn't print anything nor modify any
+# global state.
+#
+def inspectSeq(seqKey, frameList, args, traversedPath) :
+
+    seqFrames = SeqFrames()
+    fileComponents = [seqKey.prefix + seqKey.sep, "", seqKey.ext]
+    frameNums = frameList.nums
+    frameSizes = frameList.sizes
+    frameLinks = frameList.links
+    framePaddings = frameList.paddings
+
+    missingFrames = FrameRanges()
+    zeroFrames = FrameRanges()
+    badFrames = FrameRanges()
+    badPadFrames = FrameRanges()
+    minFrame = frameNums[0]
+    maxFrame = frameNums[-1]
     padding = 0 # Set below, created here for scope.
 
     # Go through frameList and look for duplicated frame numbers,
-    # printing a WARNING when finding duplicates.
+    # noting a WARNING when finding duplicates.
     #
     # Throw out duplicates, and arbitrarily keep ONLY the frame with
     # the smallest padding (frameList is already sorted by frame number
@@ -609,35 +1337,31 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
     # ...will only report frame 2 as badly padded, also warning about a.0002.exr
     #
     #
+    # Note: 'uniqueFrames' holds the indices (into frameList) of the
+    # frames being kept.
+    #
     frameListLen = len(frameList)
-    uniqueFrameList = [frameList[0]]
+    uniqueFrames = [0]
     i = 1
     while i < frameListLen :
-        if frameList[i][FRAME_NUM] == uniqueFrameList[-1][FRAME_NUM] :
-            if not args.silent :
-                actualFilename = actualImageName(filenameKey, 
-                    uniqueFrameList[-1][FRAME_PADDING], uniqueFrameList[-1][FRAME_NUM])
-                duplicateFilename = actualImageName(filenameKey, 
-                    frameList[i][FRAME_PADDING], frameList[i][FRAME_NUM])
-                sys.stdout.flush()
-                sys.stderr.flush()
-                print(PROG_NAME, ": warning: ",
-                    end='', sep='', file=sys.stderr)
-                if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                    print("sequence: ", traversedPath, sep='', end='', file=sys.stderr)
-                    print(fileComponents[KEY_NAME][:-1], ", frame ", frameList[i][FRAME_NUM],
-                        ", has duplicate entries: ",
-                        os.path.basename(actualFilename), " and ", os.path.basename(duplicateFilename),
-                        sep='', file=sys.stderr)
-                else :
-                    print("sequence ", fileComponents[KEY_NAME][:-1], ", frame ", frameList[i][FRAME_NUM],
-                        ", has duplicate entries: ",
-                        actualFilename, " and ", duplicateFilename,
-                        sep='', file=sys.stderr)
-                sys.stderr.flush()
-            gExitStatus = gExitStatus | EXIT_LSSEQ_PADDING_WARNING
+        if frameNums[i] == frameNums[uniqueFrames[-1]] :
+            actualFilename = actualImageName(seqKey, 
+                framePaddings[uniqueFrames[-1]], frameNums[uniqueFrames[-1]])
+            duplicateFilename = actualImageName(seqKey, 
+                framePaddings[i], frameNums[i])
+            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
+                message = "sequence: " + traversedPath \
+                    + fileComponents[KEY_NAME][:-1] + ", frame " + str(frameNums[i]) \
+                    + ", has duplicate entries: " + os.path.basename(actualFilename) \
+                    + " and " + os.path.basename(duplicateFilename)
+            else :
+                message = "sequence " \
+                    + fileComponents[KEY_NAME][:-1] + ", frame " + str(frameNums[i]) \
+                    + ", has duplicate entries: " + actualFilename \
+                    + " and " + duplicateFilename
+            seqFrames.warnings.append((message, EXIT_LSSEQ_PADDING_WARNING))
         else :
-            uniqueFrameList.append(frameList[i])
+            uniqueFrames.append(i)
         i += 1
 
     # Calculate padding.
@@ -652,86 +1376,77 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
     #         and: expandseq --pad 2 -- -11-11
     # 
     if minFrame >= 0 :
-        padding = uniqueFrameList[0][FRAME_PADDING]
+        padding = framePaddings[uniqueFrames[0]]
     elif maxFrame < 0 :
-        padding = uniqueFrameList[-1][FRAME_PADDING]
+        padding = framePaddings[uniqueFrames[-1]]
     else :
         # Find smallest non-negative frame number.
         #
         i = 0
-        while uniqueFrameList[i][FRAME_NUM] < 0 :
+        while frameNums[uniqueFrames[i]] < 0 :
             i += 1
-        padding = uniqueFrameList[i][FRAME_PADDING]
-
-    formatStr = "%0" + str(padding) + "d"
+        padding = framePaddings[uniqueFrames[i]]
 
     # Gather up the various lists of problem frames. Prior to v4.0.1 this logic
     # was under the "native" handling of the printing of the sequences, but in
     # v4.1.0 was moved here to allow for support of new --split-sequence option
     # because we need the list of missing frames for ALL formats..
     #
-    i = minFrame
-    while i <= maxFrame :
-        iMissing = False
-        currFrameData = uniqueFrameList[0]
-        if i != currFrameData[FRAME_NUM] :
-            iMissing = True
-            if args.showMissing :
-                missingFrames.append(i)
-        else :
-            uniqueFrameList.pop(0)
-
-        if not iMissing :
-            if currFrameData[FRAME_MTIME] == FILE_BROKENLINK :
-                if not args.silent :
-                    actualFilename = actualImageName(filenameKey, padding, i)
-                    sys.stdout.flush()
-                    sys.stderr.flush()
-                    print(PROG_NAME, ": warning: ",
-                        end='', sep='', file=sys.stderr)
-                    if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                        print(traversedPath, sep='', end='', file=sys.stderr)
-                        print(os.path.basename(actualFilename),
-                            " is a broken soft link", sep='', file=sys.stderr)
-                    else :
-                        print(actualFilename, " is a broken soft link", sep='', file=sys.stderr)
-                    sys.stderr.flush()
-                gExitStatus = gExitStatus | EXIT_LSSEQ_SOFTLINK_WARNING
+    # Only the frames that are present get visited, with the frames missing
+    # in between them being added as whole runs, so that the cost
+    # depends on the number of files rather than on the span of the frames.
+    #
+    prevFrame = minFrame
+    for currFrame in uniqueFrames :
+        i = frameNums[currFrame]
+        if args.showMissing and i > prevFrame + 1 :
+            missingFrames.addRun(prevFrame + 1, i - 1)
+        prevFrame = i
+
+        if frameLinks[currFrame] == FRAME_BROKENLINK :
+            actualFilename = actualImageName(seqKey, padding, i)
+            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
+                message = traversedPath + os.path.basename(actualFilename)
+            else :
+                message = actualFilename
+            seqFrames.warnings.append((message + " is a broken soft link",
+                EXIT_LSSEQ_SOFTLINK_WARNING))
 
         # Only gather up the other lists of problem frames (that is, besides the
-        # missing-frame) when format is "native".
+        # missing-frame) when format is "native" (or JSON records).
         #
-        if not iMissing and args.seqFormat == 'native' and \
+        if (args.seqFormat == 'native' or args.seqFormat in JSON_FORMATS) and \
                 (args.showZero or args.showBad or args.showBadPadding) :
-            if currFrameData[FRAME_MTIME] == FILE_BROKENLINK :
+            if frameLinks[currFrame] == FRAME_BROKENLINK :
                 if args.showZero :
-                    zeroFrames.append(i)
+                    zeroFrames.addFrame(i)
                 elif args.showBad :
-                    badFrames.append(i)
+                    badFrames.addFrame(i)
 
             # File-size issues.
             #
-            elif args.showZero and currFrameData[FRAME_SIZE] == 0 :
-                zeroFrames.append(i)
-            elif args.showBad and (currFrameData[FRAME_SIZE] < args.goodFrameMinSize) :
-                badFrames.append(i)
+            elif args.showZero and frameSizes[currFrame] == 0 :
+                zeroFrames.addFrame(i)
+            elif args.showBad and (frameSizes[currFrame] < args.goodFrameMinSize) :
+                badFrames.addFrame(i)
 
             # Bad padding occurs when a number is padded, but shouldn't be,
             # or isn't padded, but it should be.
             #
             if args.showBadPadding and (\
-                    (currFrameData[FRAME_PADDING] > len(str(i)) and \
-                     currFrameData[FRAME_PADDING] > padding) \
+                    (framePaddings[currFrame] > len(str(i)) and \
+                     framePaddings[currFrame] > padding) \
                         or \
-                    currFrameData[FRAME_PADDING] < padding) :
-                badPadFrames.append(i)
-        i += 1
+                    framePaddings[currFrame] < padding) :
+                badPadFrames.addFrame(i)
 
     # To support `--split-sequence' we need to split one sequence
     # into multiple sequences based on any missing frames.
     # 
     # We will make use of a list of tuples of the form.
-    # (minFrame, maxFrame, missingFrames[], zeroFrames[], badFrames[], badPadFrames[])
+    # (minFrame, maxFrame, missingFrames, zeroFrames, badFrames, badPadFrames)
+    #
+    # where the frame lists are all FrameRanges.
     # 
     # Unless --split-sequence is active AND there are actually missing frames
     # then the list of tuples will only be one entry long.
@@ -739,49 +1454,100 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
     # Note: Padding will always be the same for the split-sequences no need to stash
     #       it per split-sequence.
     #
-    splitSeqList = [] # The list of tuples.
-    #
-    MINFRAME_IND = 0
-    MAXFRAME_IND = 1
-    MISSING_IND  = 2
-    ZERO_IND     = 3
-    BAD_IND      = 4
-    BADPAD_IND   = 5
+    splitSeqList = seqFrames.splitSeqs # The list of tuples.
 
-    if not args.splitSeq or len(missingFrames) == 0 :
+    if not args.splitSeq or len(missingFrames.runs) == 0 :
         splitSeqList.append((minFrame, maxFrame, missingFrames, zeroFrames, badFrames, badPadFrames))
     else :
-        zeroFramesSet   = set(zeroFrames)
-        badFramesSet    = set(badFrames)
-        badPadFramesSet = set(badPadFrames)
-
-        splitSet = set(seqLister.expandSeq(str(minFrame)+"-"+str(maxFrame))).difference(set(missingFrames))
-
-        splitList = seqLister.condenseSeqOnes(list(splitSet), 1) # One padding.
-
-        while len(splitList) > 0 :
-            startAndEnd = extractStartEnd(splitList[0])
-            start = startAndEnd[0]
-            end = startAndEnd[1]
-            subSeqSet = set(seqLister.expandSeq(str(start) + "-" + str(end)))
-            subSeqMissingFrames = [] # Always EMPTY by defintion of --split-sequence.
-            subSeqZeroFrames = list(subSeqSet.intersection(zeroFramesSet))
-            subSeqBadFrames = list(subSeqSet.intersection(badFramesSet))
-            subSeqBadPadFrames = list(subSeqSet.intersection(badPadFramesSet))
+        splitFrames = FrameRanges([(minFrame, maxFrame)]).difference(missingFrames)
+        for start, end in splitFrames.runs :
             splitSeqList.append( ( start, end,
-                subSeqMissingFrames,
-                subSeqZeroFrames,
-                subSeqBadFrames,
-                subSeqBadPadFrames ) )
-            splitList.pop(0)
-
-    while len(splitSeqList) > 0 :
-        minFrame      = splitSeqList[0][MINFRAME_IND]
-        maxFrame      = splitSeqList[0][MAXFRAME_IND]
-        missingFrames = splitSeqList[0][MISSING_IND]
-        zeroFrames    = splitSeqList[0][ZERO_IND]
-        badFrames     = splitSeqList[0][BAD_IND]
-        badPadFrames  = splitSeqList[0][BADPAD_IND]
+                FrameRanges(), # Always EMPTY by defintion of --split-sequence.
+                zeroFrames.window(start, end),
+                badFrames.window(start, end),
+                badPadFrames.window(start, end) ) )
+
+    seqFrames.padding = padding
+    seqFrames.uniqueFrames = uniqueFrames
+    seqFrames.uniqueNums = [frameNums[i] for i in uniqueFrames]
+    return seqFrames
+
+# Returns 'numBytes' the way "ls -lh" does, e.g., 1.5K, 234M or 2.0G,
+# always rounding up.
+#
+def humanSize(numBytes) :
+    if numBytes < 1024 :
+        return str(numBytes)
+    size = float(numBytes)
+    for unit in "KMGTPE" :
+        size /= 1024
+        if math.ceil(size*10) < 100 :
+            return "%.1f%s" % (math.ceil(size*10)/10, unit)
+        if math.ceil(size) < 1024 or unit == "E" :
+            return "%d%s" % (math.ceil(size), unit)
+
+# Returns the columns of the --long listing of a sequence (or movie)
+# whose frames have the sizes 'frameSizes' and the modification times
+# 'frameMTimes', and take up 'numBlocks' 512 byte blocks of disk space
+# in all (see frameBlocks()). Broken sym-links have no time.
+#
+def longColumns(frameSizes, frameMTimes, numBlocks, args) :
+    import time
+
+    sizes = (sum(frameSizes), numBlocks*512, min(frameSizes), max(frameSizes))
+    if args.humanReadable :
+        columns = ["%5s" % humanSize(size) for size in sizes]
+    else :
+        columns = ["%12d" % size for size in sizes]
+
+    mtimes = [t for t in frameMTimes if t != FILE_BROKENLINK]
+    if len(mtimes) == 0 :
+        columns += ["%16s" % "-"] * 2
+    else :
+        for mtime in (min(mtimes), max(mtimes)) :
+            columns.append(time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime)))
+    return "%6d " % len(frameSizes) + " ".join(columns) + " "
+
+# Prints an individual sequence based on cmd-line-args.
+# frameList (a FrameList) comes in sorted from smallest frame number
+# to largest.
+#
+# As of v4.1.0 - also prints an individual sequence as multiple
+# sequences (with the same name) if --split-sequence was invoked.
+#
+def printSeq(seqKey, frameList, args, traversedPath) :
+
+    global gExitStatus
+    import bisect
+
+    seqFrames = inspectSeq(seqKey, frameList, args, traversedPath)
+    for warning in seqFrames.warnings :
+        if not args.silent :
+            writeWarning(PROG_NAME + ": warning: " + warning[0] + "\n")
+        gExitStatus = gExitStatus | warning[1]
+
+    if args.seqFormat in JSON_FORMATS :
+        for record in seqRecords(seqKey, frameList, seqFrames, traversedPath,
+                args.statPlan[seqKey.category]) :
+            writeRecord(record)
+        return
+
+    fileComponents = [seqKey.prefix + seqKey.sep, "", seqKey.ext]
+    padding = seqFrames.padding
+    formatStr = "%0" + str(padding) + "d"
+
+    classifyTag = ""
+    if args.classify and all(frameList.links) :
+        classifyTag = "@"
+
+    # Strip off any leading "./" from traversedPath. (added v3.0.1)
+    #
+    pathPrefix = ""
+    if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
+        pathPrefix = displayPath(traversedPath)
+
+    for minFrame, maxFrame, missingFrames, zeroFrames, badFrames, badPadFrames \
+            in seqFrames.splitSeqs :
 
         # Nuke format looks like this for example (from nuke read-node dialog):
         #
@@ -801,36 +1567,15 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
                 fileComponents[KEY_FRAME] = (formatStr % minFrame)
             else :
                 fileComponents[KEY_FRAME] = "%0" + str(padding) + "d"
-            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                #
-                if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                    sys.stdout.write(traversedPath[2:])
-                else :
-                    sys.stdout.write(traversedPath)
-            print(fileComponents[KEY_NAME],
-                fileComponents[KEY_FRAME], ".",
-                fileComponents[KEY_EXT], sep='', end='')
-            if minFrame == maxFrame :
-                print()
-            else :
-                print(" ", str(minFrame), "-", str(maxFrame), sep='', end='')
-                if len(missingFrames) > 0 :
-                    actualFramesSet \
-                        = set(seqLister.expandSeq(str(minFrame)+"-"+str(maxFrame))).difference(set(missingFrames))
-                    actualFramesList = seqLister.condenseSeqOnes(list(actualFramesSet), 1) # One padding.
-
-                    print(" (", sep='', end='')
-                    firstItem = True
-                    for subSeq in actualFramesList :
-                        if not firstItem :
-                            print(" ", sep='', end='')
-                        firstItem = False
-                        print(subSeq, sep='', end='')
-                    print(")", sep='')
-
-                else :
-                    print()
+            line = pathPrefix + fileComponents[KEY_NAME] \
+                + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT]
+            if minFrame != maxFrame :
+                line += " " + str(minFrame) + "-" + str(maxFrame)
+                if len(missingFrames.runs) > 0 :
+                    actualFramesList \
+                        = FrameRanges([(minFrame, maxFrame)]).difference(missingFrames).condenseOnes()
+                    line += " (" + " ".join(actualFramesList) + ")"
+            writeOut(line + "\n")
 
         elif args.seqFormat == 'shake' :
             if minFrame == maxFrame :
@@ -841,21 +1586,11 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
                 else :
                     fileComponents[KEY_FRAME] = "@"*padding
 
-            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                #
-                if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                    sys.stdout.write(traversedPath[2:])
-                else :
-                    sys.stdout.write(traversedPath)
-
-            print(fileComponents[KEY_NAME],
-                fileComponents[KEY_FRAME], ".",
-                fileComponents[KEY_EXT], sep='', end='')
-            if minFrame == maxFrame :
-                print("")
-            else :
-                print(" -t ", str(minFrame), "-", str(maxFrame), " ", sep='')
+            line = pathPrefix + fileComponents[KEY_NAME] \
+                + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT]
+            if minFrame != maxFrame :
+                line += " -t " + str(minFrame) + "-" + str(maxFrame) + " "
+            writeOut(line + "\n")
 
         elif args.seqFormat == 'glob' :
             if minFrame < 0 :
@@ -865,16 +1600,8 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
             if padding > 1 :
                 fileComponents[KEY_FRAME] = fileComponents[KEY_FRAME] + "[0-9]"*(padding-1)
 
-            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                #
-                if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                    sys.stdout.write(traversedPath[2:])
-                else :
-                    sys.stdout.write(traversedPath)
-            print(fileComponents[KEY_NAME],
-                fileComponents[KEY_FRAME], ".",
-                fileComponents[KEY_EXT], sep='')
+            writeOut(pathPrefix + fileComponents[KEY_NAME]
+                + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT] + "\n")
 
         elif args.seqFormat == 'houdini' or args.seqFormat == 'mplay' :
             if minFrame == maxFrame :
@@ -885,16 +1612,8 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
                     fileComponents[KEY_FRAME] = "\$F"
                 if padding >= 2 :
                     fileComponents[KEY_FRAME] += str(padding)
-            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                #
-                if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                    sys.stdout.write(traversedPath[2:])
-                else :
-                    sys.stdout.write(traversedPath)
-            print(fileComponents[KEY_NAME],
-                fileComponents[KEY_FRAME], ".",
-                fileComponents[KEY_EXT], sep='')
+            writeOut(pathPrefix + fileComponents[KEY_NAME]
+                + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT] + "\n")
 
         elif args.seqFormat == 'rv' :
             if minFrame == maxFrame :
@@ -906,16 +1625,8 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
                 frameRange = str(minFrame) + "-" + str(maxFrame) + padStr
             fileComponents[KEY_FRAME] = frameRange
 
-            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-                # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                #
-                if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                    sys.stdout.write(traversedPath[2:])
-                else :
-                    sys.stdout.write(traversedPath)
-            print(fileComponents[KEY_NAME],
-                fileComponents[KEY_FRAME], ".",
-                fileComponents[KEY_EXT], sep='')
+            writeOut(pathPrefix + fileComponents[KEY_NAME]
+                + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT] + "\n")
 
         else : # native
 
@@ -931,574 +1642,1674 @@ def printSeq(filenameKey, frameList, args, traversedPath) :
                     + "]"
             fileComponents[KEY_FRAME] = frameRange
 
-            if args.prependPath != PATH_NOPREFIX and fileComponents[KEY_NAME][0] != '/' :
-
-                # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                #
-                if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                    sys.stdout.write(traversedPath[2:])
-                else :
-                    sys.stdout.write(traversedPath)
-
             if args.extremes :
                 fileComponents[KEY_FRAME] = formatStr % minFrame
-            print(fileComponents[KEY_NAME],
-                fileComponents[KEY_FRAME], ".",
-                fileComponents[KEY_EXT], classifyTag, sep='', end='')
+            line = pathPrefix
+            if args.longListing :
+                first = bisect.bisect_left(seqFrames.uniqueNums, minFrame)
+                last = bisect.bisect_right(seqFrames.uniqueNums, maxFrame)
+                splitFrames = seqFrames.uniqueFrames[first:last]
+                line = longColumns([frameList.sizes[i] for i in splitFrames],
+                    [frameList.mtimes[i] for i in splitFrames],
+                    sum(frameList.blocks[i] for i in splitFrames), args) + line
+            line += fileComponents[KEY_NAME] \
+                + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT] + classifyTag
             #
             if minFrame != maxFrame and args.extremes :
-                print()
+                line += "\n"
                 if fileComponents[KEY_NAME][0] != '/' :
                     # Strip off any leading "./" from traversedPath. (added v3.0.1)
                     #
-                    if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                        sys.stdout.write(traversedPath[2:])
-                    else :
-                        sys.stdout.write(traversedPath)
+                    line += displayPath(traversedPath)
                 fileComponents[KEY_FRAME] = formatStr % maxFrame
-                print(fileComponents[KEY_NAME],
-                    fileComponents[KEY_FRAME], ".",
-                    fileComponents[KEY_EXT], classifyTag, sep='', end='')
+                line += fileComponents[KEY_NAME] \
+                    + fileComponents[KEY_FRAME] + "." + fileComponents[KEY_EXT] + classifyTag
 
             if args.combineErrorFrames :
-                errFrames = missingFrames + zeroFrames + badFrames + badPadFrames
-                frameSeq = seqLister.condenseSeq(errFrames)
+                errFrames = missingFrames.union(zeroFrames).union(badFrames).union(badPadFrames)
+                frameSeq = errFrames.condense()
                 if len(frameSeq) > 0 :
-                    sys.stdout.write(" e:[")
-                    doPrintComma = False
-                    for f in frameSeq :
-                        if doPrintComma :
-                            sys.stdout.write(",")
-                        sys.stdout.write(f)
-                        doPrintComma = True
-                    sys.stdout.write("]")
-                print()
+                    line += " e:[" + ",".join(frameSeq) + "]"
             else :
-                missingFrameSeq = seqLister.condenseSeq(missingFrames)
-                if len(missingFrameSeq) > 0 :
-                    sys.stdout.write(" m:[")
-                    doPrintComma = False
-                    for f in missingFrameSeq :
-                        if doPrintComma :
-                            sys.stdout.write(",")
-                        sys.stdout.write(f)
-                        doPrintComma = True
-                    sys.stdout.write("]")
-                zeroFrameSeq = seqLister.condenseSeq(zeroFrames)
-                if len(zeroFrameSeq) > 0 :
-                    if len(missingFrameSeq) > 0 :
-                        sys.stdout.write(",")
-                    sys.stdout.write(" z:[")
-                    doPrintComma = False
-                    for f in zeroFrameSeq :
-                        if doPrintComma :
-                            sys.stdout.write(",")
-                        sys.stdout.write(f)
-                        doPrintComma = True
-                    sys.stdout.write("]")
-                badFrameSeq = seqLister.condenseSeq(badFrames)
-                if len(badFrameSeq) > 0 :
-                    if      (len(missingFrameSeq) > 0) or \
-                            (len(zeroFrameSeq) > 0) :
-                        sys.stdout.write(",")
-                    sys.stdout.write(" b:[")
-                    doPrintComma = False
-                    for f in badFrameSeq :
-                        if doPrintComma :
-                            sys.stdout.write(",")
-                        sys.stdout.write(f)
-                        doPrintComma = True
-                    sys.stdout.write("]")
-                badPadFrameSeq = seqLister.condenseSeq(badPadFrames)
-                if len(badPadFrameSeq) > 0 :
-                    if      (len(missingFrameSeq) > 0) or \
-                            (len(zeroFrameSeq) > 0) or \
-                            (len(badFrameSeq) > 0) :
-                        sys.stdout.write(",")
-                    sys.stdout.write(" p:[")
-                    doPrintComma = False
-                    for f in badPadFrameSeq :
-                        if doPrintComma :
-                            sys.stdout.write(",")
-                        sys.stdout.write(f)
-                        doPrintComma = True
-                    sys.stdout.write("]")
-                print()
-
-        splitSeqList.pop(0)
-
-def stripDotFiles(dirContents, stripIt) :
-    if not stripIt :
-        return dirContents
-    else :
-        strippedDirContents = []
-        for f in dirContents :
-            if f[0] != "." :
-                strippedDirContents.append(f)
-        return strippedDirContents
-
-def deRefDirs(isCmdLineArg) :
-    global gDeRefWhichFiles
-    if isCmdLineArg :
-        if gDeRefWhichFiles & (DEREF_CMD_LINE | DEREF_ALL) :
-            return bool(gDeRefWhichFiles & DEREF_DIRS)
+                problemFrames = []
+                for tag, frames in (("m", missingFrames), ("z", zeroFrames),
+                        ("b", badFrames), ("p", badPadFrames)) :
+                    frameSeq = frames.condense()
+                    if len(frameSeq) > 0 :
+                        problemFrames.append(" " + tag + ":[" + ",".join(frameSeq) + "]")
+                line += ",".join(problemFrames)
+            writeOut(line + "\n")
+
+# Returns the JSON records (see JSON_FORMATS), as dictionaries, of the
+# sequence 'seqKey' with frames 'frameList' as sorted out by inspectSeq()
+# into 'seqFrames'. One record per split-sequence. 'statNeeds' (see
+# args.statPlan) says whether the size and mtime are known, they are
+# null if not (see --from-manifest).
+#
+def seqRecords(seqKey, frameList, seqFrames, traversedPath, statNeeds) :
+    import bisect
+
+    frameNums = frameList.nums
+    frameSizes = frameList.sizes
+    frameMTimes = frameList.mtimes
+    uniqueFrames = seqFrames.uniqueFrames
+    uniqueNums = seqFrames.uniqueNums
+
+    seqLinks = "none"
+    if any(frameList.links) :
+        seqLinks = "all" if all(frameList.links) else "some"
+    seqDir, seqPrefix = recordPath(traversedPath, seqKey.prefix)
+
+    records = []
+    for minFrame, maxFrame, missingFrames, zeroFrames, badFrames, badPadFrames \
+            in seqFrames.splitSeqs :
+        first = bisect.bisect_left(uniqueNums, minFrame)
+        last = bisect.bisect_right(uniqueNums, maxFrame)
+        seqSize = 0
+        if frameSizes != None :
+            seqSize = sum(frameSizes[i] for i in uniqueFrames[first:last])
+        seqMTime = None
+        if frameMTimes != None :
+            for i in uniqueFrames[first:last] :
+                if frameMTimes[i] != FILE_BROKENLINK and (seqMTime == None or frameMTimes[i] > seqMTime) :
+                    seqMTime = frameMTimes[i]
+
+        records.append({
+            "type" : "sequence",
+            "dir" : seqDir,
+            "prefix" : seqPrefix,
+            "separator" : seqKey.sep,
+            "extension" : seqKey.ext,
+            "padding" : seqFrames.padding,
+            "start" : minFrame,
+            "end" : maxFrame,
+            "frames" : last - first,
+            "missing" : missingFrames.runLists(),
+            "zero" : zeroFrames.runLists(),
+            "bad" : badFrames.runLists(),
+            "badPadding" : badPadFrames.runLists(),
+            "links" : seqLinks,
+            "size" : seqSize if statNeeds & STAT_NEED_SIZE else None,
+            "mtime" : seqMTime if statNeeds & STAT_NEED_MTIME else None
+        })
+    return records
+
+# Returns the JSON record (see JSON_FORMATS) of the movie 'seqKey',
+# whose 'movieData' comes from the movie dictionary, see seqRecords().
+#
+def movieRecord(seqKey, movieData, traversedPath, statNeeds) :
+    movDir, movName = recordPath(traversedPath, seqKey.name)
+    movMTime = movieData[MOVIE_MTIME]
+    return {
+        "type" : "movie",
+        "dir" : movDir,
+        "name" : movName,
+        "extension" : seqKey.ext,
+        "links" : "all" if movieData[MOVIE_ISSYMLINK] else "none",
+        "size" : movieData[MOVIE_SIZE] if statNeeds & STAT_NEED_SIZE else None,
+        "mtime" : None if movMTime == FILE_BROKENLINK or not statNeeds & STAT_NEED_MTIME \
+            else movMTime
+    }
+
+# Print the movie 'seqKey', whose 'movieData' comes from the movie
+# dictionary (see gatherDirContents()), after 'prefix'.
+#
+def printMovie(seqKey, movieData, prefix, args, traversedPath) :
+    if args.seqFormat in JSON_FORMATS :
+        writeRecord(movieRecord(seqKey, movieData, traversedPath, args.statPlan[LIST_MOVS]))
+        return
+
+    classifyTag = ""
+    if movieData[MOVIE_ISSYMLINK] and args.classify :
+        classifyTag = "@"
+    if args.longListing :
+        prefix = longColumns([movieData[MOVIE_SIZE]], [movieData[MOVIE_MTIME]],
+            movieData[MOVIE_BLOCKS], args) + prefix
+    writeOut(prefix + seqKey.name + classifyTag + "\n")
+
+# Open the directory 'name' (relative to the open directory 'dirFd', or
+# to the current working directory if dirFd is None) and return its file
+# descriptor.
+#
+# Note: opening "name/." rather than "name" makes the open itself fail with
+# a PermissionError if EITHER the read or the execute (search) permission
+# is missing on the directory, both of which are needed to list it.
+#
+def openDir(name, dirFd) :
+    if gProfile != None :
+        profileCall("open")
+    return os.open(os.path.join(name, "."), os.O_RDONLY | os.O_DIRECTORY, dir_fd=dirFd)
+
+# Returns the reason to give in a "can not descend into" warning for the
+# OSError 'error' from opening or reading a directory, e.g., "permission
+# denied", or "no such file or directory" for one that went away since
+# its parent directory was read.
+#
+def descendFailure(error) :
+    reason = error.strerror if error.strerror != None else str(error)
+    return reason[:1].lower() + reason[1:]
+
+# Return the entries of the open directory 'dirFd' as a list of os.DirEntry
+# objects (see os.scandir()), optionally skipping dot-files.
+#
+# Note: the DirEntry objects stat files relative to dirFd, so dirFd must
+# stay open until the entries have been gathered (see gatherDirContents()).
+#
+def listDirEntries(dirFd, stripDotFiles) :
+    if gProfile != None :
+        profileCall("scandir")
+    with os.scandir(dirFd) as dirIter :
+        if not stripDotFiles :
+            return list(dirIter)
         else :
+            return [e for e in dirIter if e.name[0] != "."]
+
+# Files listed on the command line don't come from os.scandir(), so
+# this class provides the subset of the os.DirEntry interface needed by
+# listSeqDir(), caching the results of lstat() and stat() in the same
+# way DirEntry does. Calling is_dir() looks up all there is to cache,
+# which the thread-pool for --jobs does for all of them at once.
+#
+class CmdLineEntry :
+    def __init__(self, name) :
+        self.name = name
+        self.path = name
+        self._lstat = None
+        self._stat = None
+
+    def stat(self, follow_symlinks=True) :
+        if not follow_symlinks :
+            if self._lstat is None :
+                self._lstat = os.lstat(self.path)
+            return self._lstat
+        if self._stat is None :
+            if self.is_symlink() :
+                self._stat = os.stat(self.path)
+            else :
+                self._stat = self.stat(follow_symlinks=False)
+        return self._stat
+
+    def is_symlink(self) :
+        try :
+            return stat.S_ISLNK(self.stat(follow_symlinks=False).st_mode)
+        except OSError :
             return False
-    else :
-        if gDeRefWhichFiles &  DEREF_ALL :
-            return bool(gDeRefWhichFiles & DEREF_DIRS)
-        else :
+
+    def is_dir(self) :
+        try :
+            return stat.S_ISDIR(self.stat().st_mode)
+        except OSError :
             return False
 
-def deRefFiles(isCmdLineArg) :
-    global gDeRefWhichFiles
-    if isCmdLineArg :
-        if gDeRefWhichFiles & (DEREF_CMD_LINE | DEREF_ALL) :
-            return bool(gDeRefWhichFiles & DEREF_FILES)
+# Stands in for the os.DirEntry objects of a directory whose entries
+# came from the --cache, the --daemon or a --from-manifest (see
+# scanDirCached(), scanDirFromDaemon() and listManifest()). Like a
+# DirEntry it knows the file type without stat'ing, except that where
+# a sym-link points is always looked up afresh. Files are stat'ed
+# relative to dirFd, unless their lstat() results 'lstatInfo' are
+# already known.
+#
+class CachedEntry :
+    def __init__(self, name, dirFd, isDir, isSymLink, lstatInfo=None) :
+        self.name = name
+        self.dirFd = dirFd
+        self.isDir = isDir
+        self.isSymLink = isSymLink
+        self._lstat = lstatInfo
+        self._stat = None
+
+    def stat(self, follow_symlinks=True) :
+        if not follow_symlinks or not self.isSymLink :
+            if self._lstat is None :
+                self._lstat = os.stat(self.name, dir_fd=self.dirFd, follow_symlinks=False)
+            return self._lstat
+        if self._stat is None :
+            self._stat = os.stat(self.name, dir_fd=self.dirFd)
+        return self._stat
+
+    def is_symlink(self) :
+        return self.isSymLink
+
+    def is_dir(self) :
+        if not self.isSymLink :
+            return self.isDir
+        try :
+            return stat.S_ISDIR(self.stat().st_mode)
+        except OSError :
+            return False
+
+def deRefDirs(isCmdLineArg, args) :
+    if isCmdLineArg :
+        if args.deRefFlags & (DEREF_CMD_LINE | DEREF_ALL) :
+            return bool(args.deRefFlags & DEREF_DIRS)
         else :
             return False
     else :
-        if gDeRefWhichFiles &  DEREF_ALL :
-            return bool(gDeRefWhichFiles & DEREF_FILES)
+        if args.deRefFlags &  DEREF_ALL :
+            return bool(args.deRefFlags & DEREF_DIRS)
         else :
             return False
 
-# This function is recursive and lists the contents passed to it
-# via the first argument. Those contents MAY or MAY-NOT be
-# all contained in the current working directory. That list will likely
-# ONLY be the contents of a single directory if this has been
-# called recursively with "-R" to lsseq, and we're more than one level deep.
+def deRefFiles(isCmdLineArg, args) :
+    if isCmdLineArg :
+        if args.deRefFlags & (DEREF_CMD_LINE | DEREF_ALL) :
+            return bool(args.deRefFlags & DEREF_FILES)
+        else :
+            return False
+    else :
+        if args.deRefFlags &  DEREF_ALL :
+            return bool(args.deRefFlags & DEREF_FILES)
+        else :
+            return False
+
+# Decide which file metadata is needed for each category of sequence
+# given the options on the command line, see STAT_NAME_ONLY. Categories that
+# are not being listed as sequences never need to be stat'ed.
 #
-# This fucntion assumes that if a directory-title is needed
-# (i.e., the dirContents parameter to this function), for example:
+def makeStatPlan(args) :
+
+    frameNeeds = STAT_NAME_ONLY
+    if args.seqFormat == 'native' and (args.showZero or args.showBad) :
+        frameNeeds |= STAT_NEED_SIZE
+    if args.sortByMTime or args.cutoffTime != None :
+        frameNeeds |= STAT_NEED_MTIME
+    if args.seqFormat in JSON_FORMATS : # Records have the total size and newest mtime.
+        frameNeeds |= STAT_NEED_SIZE | STAT_NEED_MTIME
+    if args.longListing : # As does the --long listing.
+        frameNeeds |= STAT_NEED_SIZE | STAT_NEED_MTIME
+
+    plan = {}
+    for category in (LIST_IMGS, LIST_MOVS, LIST_CACHES) :
+        if not args.listFlags & category :
+            plan[category] = STAT_NAME_ONLY
+        elif category == LIST_MOVS and args.seqFormat not in JSON_FORMATS and not args.longListing :
+            plan[category] = frameNeeds & STAT_NEED_MTIME # Movie sizes are only in records.
+        else :
+            plan[category] = frameNeeds
+
+    # Non-sequences only need stat'ing for the built-in formatter to
+    # sort them by time or to append -F indicators (see printOtherFiles()).
+    #
+    plan[LIST_OTHER] = STAT_NAME_ONLY
+    if (args.listFlags & LIST_OTHER) and not args.useLs :
+        if args.sortByMTime :
+            plan[LIST_OTHER] |= STAT_NEED_MTIME
+        if args.classify :
+            plan[LIST_OTHER] |= STAT_NEED_MODE
+    return plan
+
+# Return the four-tuple (fileSize, mtime, isSymLink, statInfo) for the
+# file described by 'entry' (an os.DirEntry, CmdLineEntry or CachedEntry),
+# or None if the file does not exist at all. 'statNeeds' comes from
+# args.statPlan and determines which of fileSize and mtime are actually
+# looked up, those that aren't are returned as zero. 'statInfo' is the
+# stat() or lstat() result that fileSize came from, or None if there
+# wasn't one.
 #
-# dirName:
-# aaa bbb ccc etc
+# Whether or not the file is a sym-link comes for free from the
+# directory entry. Other than that, at most one lstat() is needed for
+# regular files, and a stat() (plus possibly an lstat()) for sym-links.
+# Note: the size of a frame is useful for checking for "badFrames" and
+# zero-length frames so it is not helpful to store the size of a link.
+# Always store the real-size of the target file.
 #
-# ...then that title "dirName:" is printed BEFORE the call to this function.
+# However: storing the mtime of links may be helpful when
+# not-dereferencing files for use in time comparisons, be they local
+# or global. That is, it might be helpful to know when a linked-sequence
+# was made compared to other sequences.
 #
-# The function arguments are as follows:
-# 
-#   dirContents - This might be a list from the command line,
-#                 OR generated from a recursive descent into a directory.
-#          path - The directory we need to descend into, and pop out of.
-#                 (Might be trivially "." if called from main())
-#   isCmdLineArg - Boolean. Only possibly True if called from main().
-#                 This arg allows us to get ONE LEVEL of recursion only
-#                 unless args.isRecursive is also True in which
-#                 case we may descend further if need be.
-#                 "recursion" in this context means printing subdirs,
-#                 and in the case of calling (for example) 'lsseq dir1 dir2' we
-#                 need to call this function on dir1 then dir2, but no deeper
-#                 in each case.
-#          args - The all the options set on the command line.
-# traversedPath - The path descended so far to get to this level
-#                 used to print the directory-title. Also note that
-#                 traversedPath will always have a '/' as the last
-#                 character in the string.
-# 
-def listSeqDir(dirContents, path, isCmdLineArg, args, traversedPath) :
-
-    # Declare global variables since they might be modified by this function.
-    #
-    global gTimeList
-    global gImageDictionary
-    global gCacheDictionary
-    global gMovieDictionary
-    global gExitStatus
-    global gListWhichFiles
-    global gDeRefWhichFiles
-
-    # Stash the current working dir to come back to and the end
-    # of this function. I.e.; we need to push and pop the current
-    # working directory ourselves since it has global scope in
-    # python.
-    #
-    tmpCWD = os.path.abspath(".")
-    try:
-        os.chdir(path) # Note: path might be "." if coming from main() 
-    except PermissionError:
-        if not args.silent :
-            sys.stdout.flush()
-            sys.stderr.flush()
-            print(PROG_NAME, ": warning: can not descend into ",
-                tmpCWD, "/", path, ": permission denied, exectute bit not set.",
-                sep='', file=sys.stderr)
-            sys.stderr.flush()
-        gExitStatus = gExitStatus | EXIT_CD_PERMISSION_WARNING
-        os.chdir(tmpCWD) # Pop the stack of directories.
-        return
+# A broken sym-link is reported with a size of zero and an mtime of
+# FILE_BROKENLINK.
+#
+# Files named on the command line are always lstat'ed, to check
+# that they exist.
+#
+def fileStats(entry, isCmdLineArg, statNeeds, args) :
+    if not entry.is_symlink() :
+        if statNeeds == STAT_NAME_ONLY and isinstance(entry, (os.DirEntry, CachedEntry)) :
+            return (0, 0, False, None)
+        if gProfile != None :
+            profileCall("lstat")
+        try :
+            lstatInfo = entry.stat(follow_symlinks=False)
+        except OSError :
+            return None
+        return (lstatInfo.st_size, lstatInfo.st_mtime, False, lstatInfo)
+
+    if gProfile != None :
+        profileCall("stat")
+    try :
+        statInfo = entry.stat()
+    except OSError :
+        return (0, FILE_BROKENLINK, True, None)
+
+    if (statNeeds & STAT_NEED_MTIME) and not deRefFiles(isCmdLineArg, args) :
+        if gProfile != None :
+            profileCall("lstat")
+        try :
+            return (statInfo.st_size, entry.stat(follow_symlinks=False).st_mtime, True, statInfo)
+        except OSError :
+            return None
+    else :
+        return (statInfo.st_size, statInfo.st_mtime, True, statInfo)
 
-    # Following flag set iff something gets printed below before
-    # the printing of subdirs.
-    #
-    somethingWasPrinted = False
+# Returns the number of 512 byte blocks allocated to a frame (or movie)
+# of the sequence 'seqName' for --long, from the 'statInfo' returned by
+# fileStats(). Files hard-linked (or sym-linked) to each other are only
+# counted once per sequence, the first time they come up, 'seenInodes'
+# holding the (seqName, st_dev, st_ino) of those seen so far.
+#
+def frameBlocks(statInfo, seqName, seenInodes, args) :
+    if not args.longListing or statInfo == None :
+        return 0
+    inode = (seqName, statInfo.st_dev, statInfo.st_ino)
+    if inode in seenInodes :
+        return 0
+    seenInodes.add(inode)
+    return statInfo.st_blocks
+
+# The results of sifting through the contents of a directory (or
+# the files listed on the command line) by gatherDirContents(), ready
+# to be printed by listSeqDir().
+#
+# Warnings are not printed while gathering, they are stashed in the
+# 'warnings' list as (message, exitStatusBit) two-tuples and printed by
+# listSeqDir() in order. This means directories can be gathered ahead of
+# time by other threads (see --jobs) without affecting the order of the
+# output.
+#
+# 'otherStats' holds the lstat() results of the entries in 'otherFiles'
+# when args.statPlan says they are needed, and 'otherErrors' the
+# (filename, errorMessage) two-tuples of files on the command line
+# that could not be lstat'ed at all (see printOtherFiles()).
+#
+# 'seqKeys' maps the keys of the image, cache and movie dictionaries
+# to their SequenceKey.
+#
+class DirScan :
+    def __init__(self) :
+        self.imageDictionary = {}
+        self.cacheDictionary = {}
+        self.movieDictionary = {}
+        self.seqKeys = {}
+        self.otherFiles = []
+        self.otherStats = {}
+        self.otherErrors = []
+        self.dirList = []
+        self.warnings = []
+
+# Sift the list of files 'dirContents' (see listSeqDir()) into a
+# DirScan. This function does not depend on the current working
+# directory nor modify any global state so is safe to be run
+# concurrently for different directories.
+#
+# 'fileSplits', if given, maps filenames to what seqSplit() makes of
+# them, saving splitting them again (see scanDirCached()).
+#
+def gatherDirContents(dirContents, isCmdLineArg, args, fileSplits=None) :
 
     # The 'imageDictionary' and 'cacheDictionary' has <imageName>..<ext>
     # (or <imageName>_.<ext>), i.e., name without the frame number, as the
-    # key for each entry.  Each entry is a list containing five-tuples,
-    # namely:
+    # key for each entry.  Each entry is a FrameList holding, for each frame,
     #
-    #     [ (frameNum, fileSize, mtime, padding, isSymLink), ... ]
+    #     (frameNum, fileSize, mtime, padding, isSymLink, blocks)
     #
     # The 'movieDictionary' has the movie file name as the key, and
-    # the data stored is a two-tuple containing
+    # the data stored is a four-tuple containing
     #
-    #     (mtime, isSymLink)
+    #     (mtime, isSymLink, fileSize, blocks)
     #
     # In both of the above cases the boolean "isSymLink" is true iff the
     # file is a sym-link. It stores -1 for the file size if the sym-link
     # points to a non-existent file.
     #
-    imageDictionary = {}
-    cacheDictionary = {}
-    movieDictionary = {}
+    # Note: the dictionaries are keyed by plain strings for speed, but a
+    # SequenceKey is also made (once) for each key, see 'seqKeys' below.
+    #
+    # 'blocks' is only looked up for --long, otherwise it is zero, see
+    # frameBlocks().
+    #
+    dirScan = DirScan()
+    seenInodes = set()
+    imageDictionary = dirScan.imageDictionary
+    cacheDictionary = dirScan.cacheDictionary
+    movieDictionary = dirScan.movieDictionary
+    seqKeys = dirScan.seqKeys
     otherFiles = []
-    dirList = []
+    dirList = dirScan.dirList
 
     # Go through the directory contents sifting the files into the
-    # appropriate dictionaries and lists for printing after this is done.
+    # appropriate dictionaries and lists for printing later.
     #
-    for filename in dirContents :
+    for entry in dirContents :
+
+        filename = entry.name
 
         # If the file is a directory, regardless of what it is called, (for
         # example, what if the directory is called aaa.001.exr for some strange
         # reason?) then CLEARLY it is NOT part of an image sequence.
         #
-        if os.path.isdir(filename) : # Note: this also means filename exists.
+        if entry.is_dir() : # Note: this also means filename exists.
             if (not isCmdLineArg or not args.listDirContents) \
-                    and (gListWhichFiles & LIST_OTHER) :
-                otherFiles.append(filename)
+                    and (args.listFlags & LIST_OTHER) :
+                otherFiles.append(entry)
 
-            if not os.path.islink(filename) or deRefDirs(isCmdLineArg) :
+            if not entry.is_symlink() or deRefDirs(isCmdLineArg, args) :
                 dirList.append(filename)
 
-            # Need "and (gListWhichFiles & LIST_OTHER)" in this
+            # Need "and (args.listFlags & LIST_OTHER)" in this
             # test to prevent printing a sym-linked dir. For eg.
             # if 'ccc' is a sym-linked dir in the cwd:
             #
             #     lsseq --no-dereference --only-sequences ccc
             #     <should print nothing>
             #
-            elif isCmdLineArg and (gListWhichFiles & LIST_OTHER) :
-                otherFiles.append(filename)
+            elif isCmdLineArg and (args.listFlags & LIST_OTHER) :
+                otherFiles.append(entry)
 
         else :
 
-            fileParts = seqSplit(filename, args)
+            if fileSplits != None :
+                fileParts = fileSplits[filename]
+            else :
+                fileParts = seqSplit(filename, args)
             isFileLink = False # Default for logic below.
 
             if len(fileParts) == 2 : # Means file is an image or cache.
 
                 newFrameNum = int(fileParts[FRAMENUM])
                 newPaddingSize = len(fileParts[FRAMENUM])
+                if fileParts[SEQKEY] in seqKeys :
+                    seqCategory = seqKeys[fileParts[SEQKEY]].category
+                elif isCache(fileParts[SEQKEY]) :
+                    seqCategory = LIST_CACHES
+                else :
+                    seqCategory = LIST_IMGS
 
                 # Strict test for file-existence regardless of if a broken sym-link.
                 #
-                if os.path.lexists(filename) :
-
-                    # Next test will ONLY be True in the case of broken sym-link.
-                    #
-                    if not os.path.exists(filename) :
-                        newFrameSize = 0
-                        newFrameMTime = FILE_BROKENLINK
-                        isFileLink = True
-
-                    else :
-                        realFilename = os.path.realpath(filename)
-                        isFileLink = os.path.islink(filename)
-
-                        # Note: the size of a frame is useful for
-                        # checking for "badFrames" and zero-length frames
-                        # so not helpful to store the size of a link.
-                        # Always store the real-size of the target file.
-                        #
-                        newFrameSize = os.path.getsize(realFilename)
-
-                        # However: storing the mtime of links may be helpful
-                        # when not-dereferencing files for use in time
-                        # comparisons, be they local or global. That is,
-                        # it might be helpful to know when a linked-sequence
-                        # was made compared to other sequences.
-                        #
-                        if isFileLink and not deRefFiles(isCmdLineArg):
-                            newFrameMTime = os.lstat(filename).st_mtime
-                        else :
-                            newFrameMTime = os.path.getmtime(realFilename)
-
-                else : # File does not exist. Print warning and skip to next file.
-                    if not args.silent :
-                        sys.stdout.flush()
-                        sys.stderr.flush()
-                        print(PROG_NAME, ": warning: cannot access '", filename,
-                            "': No such file.", sep='', file=sys.stderr)
-                        sys.stderr.flush()
-                    gExitStatus = gExitStatus | EXIT_LSSEQ_NOSUCHFILE_WARNING
-                    continue
-
+                # Only bother stat'ing files that will be listed as part of a
+                # sequence, except for files named on the command line which
+                # always need to be checked for existence.
+                #
+                if (args.listFlags & seqCategory) or isCmdLineArg :
+                    frameStats = fileStats(entry, isCmdLineArg, args.statPlan[seqCategory], args)
+                    if frameStats != None :
+                        newFrameSize, newFrameMTime, isFileLink, frameStatInfo = frameStats
+                        newFrameBlocks = frameBlocks(frameStatInfo, fileParts[SEQKEY], seenInodes, args)
+
+                    else : # File does not exist. Note warning and skip to next file.
+                        dirScan.warnings.append(("cannot access '" + filename + "': No such file.",
+                            EXIT_LSSEQ_NOSUCHFILE_WARNING))
+                        continue
 
-            if len(fileParts) == 2 and isCache(fileParts[SEQKEY]) and (gListWhichFiles & LIST_CACHES):
+            if len(fileParts) == 2 and seqCategory == LIST_CACHES and (args.listFlags & LIST_CACHES):
                 if fileParts[SEQKEY] in cacheDictionary :
                     # tack on new frame number.
                     cacheDictionary[fileParts[SEQKEY]].append(
-                        (newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink))
+                        newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink,
+                        newFrameBlocks)
                 else :
                     # initialiaze dictionary entry.
-                    cacheDictionary[fileParts[SEQKEY]] = [
-                        (newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink)]
+                    cacheDictionary[fileParts[SEQKEY]] = newFrameList(LIST_CACHES, args)
+                    cacheDictionary[fileParts[SEQKEY]].append(
+                        newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink,
+                        newFrameBlocks)
+                    seqKeys[fileParts[SEQKEY]] = SequenceKey(fileParts[SEQKEY], LIST_CACHES)
 
-            elif len(fileParts) == 2 and not isCache(fileParts[SEQKEY]) and (gListWhichFiles & LIST_IMGS) :
+            elif len(fileParts) == 2 and seqCategory == LIST_IMGS and (args.listFlags & LIST_IMGS) :
                 if fileParts[SEQKEY] in imageDictionary :
                     # tack on new frame number.
                     imageDictionary[fileParts[SEQKEY]].append(
-                        (newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink))
+                        newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink,
+                        newFrameBlocks)
                 else :
                     # initialiaze dictionary entry.
-                    imageDictionary[fileParts[SEQKEY]] = [
-                        (newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink)]
+                    imageDictionary[fileParts[SEQKEY]] = newFrameList(LIST_IMGS, args)
+                    imageDictionary[fileParts[SEQKEY]].append(
+                        newFrameNum, newFrameSize, newFrameMTime, newPaddingSize, isFileLink,
+                        newFrameBlocks)
+                    seqKeys[fileParts[SEQKEY]] = SequenceKey(fileParts[SEQKEY], LIST_IMGS)
 
-            elif isMovie(filename) and (gListWhichFiles & LIST_MOVS):
+            elif isMovie(filename) and (args.listFlags & LIST_MOVS):
                 
                 # Same logic as images and caches above.
                 # See comments above if need be.
                 # 
-                if os.path.lexists(filename) : # Strict
-                    if not os.path.exists(filename) : # Only True if broken link
-                        movieMTime = FILE_BROKENLINK
-                        isFileLink = True
-                    else :
-                        realFilename = os.path.realpath(filename)
-                        isFileLink = os.path.islink(filename)
-
-                        if isFileLink and not deRefFiles(isCmdLineArg):
-                            movieMTime = os.lstat(filename).st_mtime
-                        else :
-                            movieMTime = os.path.getmtime(realFilename)
-
-                    movieDictionary[filename] = (movieMTime, isFileLink)
-
-                else : # File does not exist. Print warning and skip to next file.
-                    if not args.silent :
-                        sys.stdout.flush()
-                        sys.stderr.flush()
-                        print(PROG_NAME, ": warning: cannot access '", filename,
-                            "': No such file.", sep='', file=sys.stderr)
-                        sys.stderr.flush()
-                    gExitStatus = gExitStatus | EXIT_LSSEQ_NOSUCHFILE_WARNING
+                movieStats = fileStats(entry, isCmdLineArg, args.statPlan[LIST_MOVS], args)
+                if movieStats != None :
+                    movieSize, movieMTime, isFileLink, movieStatInfo = movieStats
+                    movieDictionary[filename] = (movieMTime, isFileLink, movieSize,
+                        frameBlocks(movieStatInfo, filename, seenInodes, args))
+                    seqKeys[filename] = SequenceKey(filename, LIST_MOVS)
+
+                else : # File does not exist. Note warning and skip to next file.
+                    dirScan.warnings.append(("cannot access '" + filename + "': No such file.",
+                        EXIT_LSSEQ_NOSUCHFILE_WARNING))
                     continue
 
             # filename is neither part of an image sequence, NOR a movie file
             # NOR a cache, (or the user has specified to not treat those as
             # sequences) so add it to otherfiles if we need to list those as well.
             #
-            elif gListWhichFiles & LIST_OTHER :
-                otherFiles.append(filename)
+            elif args.listFlags & LIST_OTHER :
+                otherFiles.append(entry)
 
-    # Use actual "ls" to print non-image files nicely.
+    # Look up what the built-in formatter needs to know about the
+    # non-sequences (see printOtherFiles()). Files named on the command
+    # line also need checking for existence, like 'ls' would do,
+    # unless 'ls' is actually going to be run on them (see --use-ls).
     #
-    otherFiles.sort()
-    if len(otherFiles) > 0 :
-        extra_ls_options = []
-        if args.classify :
-            extra_ls_options.append("-F")
+    for entry in otherFiles :
+        if args.statPlan[LIST_OTHER] != STAT_NAME_ONLY or (isCmdLineArg and not args.useLs) :
+            if gProfile != None :
+                profileCall("lstat")
+            try :
+                dirScan.otherStats[entry.name] = entry.stat(follow_symlinks=False)
+            except OSError as e :
+                dirScan.otherErrors.append((entry.name, e.strerror))
+                continue
+        dirScan.otherFiles.append(entry.name)
 
-        if args.byWhat == BY_SINGLE : # byWhat values are mutually exclusive.
-            extra_ls_options.append("-1")
-        elif args.byWhat == BY_COLUMNS :
-            extra_ls_options.append("-C")
-        elif args.byWhat == BY_ROWS :
-            extra_ls_options.append("-x")
+    return dirScan
 
-        if args.sortByMTime :
-            extra_ls_options.append("-t")
+# Gather the contents of the open directory 'dirFd' into a DirScan.
+#
+def scanDir(dirFd, args) :
+    if gDaemonSocket != None :
+        dirScan = scanDirFromDaemon(dirFd, args)
+        if dirScan != None :
+            return dirScan
+    if gScanCacheDir != None :
+        return scanDirCached(dirFd, args)
+    return gatherDirContents(listDirEntries(dirFd, args.ignoreDotFiles), False, args)
+
+# Sum up, as a string, everything besides the contents of a directory
+# that gatherDirContents() depends on, so that a --cache record made
+# with different options isn't used.
+#
+def makeCacheSignature(args) :
+    return repr((CACHE_FORMAT, VERSION, args.strictSeparator, args.ignoreDotFiles,
+        args.listFlags, args.deRefFlags, sorted(args.statPlan.items()),
+        sorted(gExtCategories.items())))
+
+# Same as scanDir() but going through the --cache, see gScanCacheDir.
+# When the directory hasn't changed since it was cached, reading it
+# costs one fstat() (plus stat'ing the files whose sizes or times
+# are needed).
+#
+def scanDirCached(dirFd, args) :
+    import time
+
+    if gProfile != None :
+        profileCall("fstat")
+    dirStat = os.fstat(dirFd)
+    cachePath = os.path.join(gScanCacheDir, "%s%x-%x-%s" % (CACHE_PREFIX,
+        dirStat.st_dev, dirStat.st_ino, gScanCacheSignatureHash))
+    validator = (dirStat.st_mtime_ns, dirStat.st_ctime_ns)
+
+    record = readScanCache(cachePath)
+    if record != None and record[CACHE_VALIDATOR] == validator \
+            and record[CACHE_SIGNATURE] == gScanCacheSignature :
+        if record[CACHE_DIRSCAN] != None :
+            return record[CACHE_DIRSCAN]
+        fileSplits = {}
+        entries = []
+        for name, isDir, isSymLink, fileParts in record[CACHE_ENTRIES] :
+            entries.append(CachedEntry(name, dirFd, isDir, isSymLink))
+            fileSplits[name] = fileParts
+        return gatherDirContents(entries, False, args, fileSplits)
+
+    # Note: the directory is fstat'ed before being read so any change
+    # made meanwhile leaves the record out of date rather than wrong.
+    #
+    fileSplits = {}
+    entries = []
+    hasSymLinks = False
+    dirEntries = listDirEntries(dirFd, args.ignoreDotFiles)
+    for entry in dirEntries :
+        isSymLink = entry.is_symlink()
+        isDir = entry.is_dir()
+        fileParts = None
+        if isSymLink or not isDir :
+            fileParts = seqSplit(entry.name, args)
+            fileSplits[entry.name] = fileParts
+        entries.append((entry.name, isDir, isSymLink, fileParts))
+        hasSymLinks = hasSymLinks or isSymLink
+    dirScan = gatherDirContents(dirEntries, False, args, fileSplits)
+
+    # A directory changed within the last moment might change again
+    # without its mtime moving on (on file systems with coarse times).
+    #
+    if max(dirStat.st_mtime, dirStat.st_ctime) + CACHE_RACY_SECONDS < time.time() :
+        nameOnly = all(needs == STAT_NAME_ONLY for needs in args.statPlan.values())
+        writeScanCache(cachePath, (validator, gScanCacheSignature, entries,
+            dirScan if nameOnly and not hasSymLinks else None))
+    return dirScan
+
+# Returns the --cache record in the file 'cachePath', or None if
+# there isn't one or it can't be read. Marks the record as used for
+# the least recently used to be removed first (see trimScanCache()).
+#
+def readScanCache(cachePath) :
+    import pickle
+    import time
+
+    try :
+        with open(cachePath, "rb") as cacheFile :
+            record = pickle.load(cacheFile)
+            cacheStat = os.fstat(cacheFile.fileno())
+    except Exception : # Missing, unreadable, truncated or from another version.
+        return None
+    if not isinstance(record, tuple) or len(record) != 4 :
+        return None
+
+    if cacheStat.st_mtime + CACHE_TOUCH_SECONDS < time.time() :
+        try :
+            os.utime(cachePath)
+        except OSError :
+            pass
+    return record
 
-        if args.reverseListing :
-            extra_ls_options.append("-r")
+# Write the --cache record 'record' to the file 'cachePath'. Written in
+# full to a temporary file first so that it never appears half written,
+# not even to another lsseq running at the same time. Failing to write
+# it is not an error, the directory simply won't be cached.
+#
+def writeScanCache(cachePath, record) :
+    global gScanCacheWritten
+    import pickle
+
+    tmpPath = "%s.%d.%x.tmp" % (cachePath, os.getpid(), id(record))
+    try :
+        with open(tmpPath, "wb") as cacheFile :
+            pickle.dump(record, cacheFile, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpPath, cachePath)
+        gScanCacheWritten = True
+    except (OSError, pickle.PicklingError, RecursionError) :
+        try :
+            os.unlink(tmpPath)
+        except OSError :
+            pass
 
-        # Note: v2.7.* and earlier version of lsseq used subprocess.call('ls')
-        # Which did not intercept stdout, so it calculated columns 
-        # properly based on if stdout was a terminal or not.
-        #
-        # Now, as of v3.0.0, we are using subprocess.run('ls', capture_output=True"),
-        # so 'ls' doesn't understand if lsseq's stdout is connected to stdout or not.
-        # Now we need to duplicate ls's internal logic ourselves to set the output
-        # correctly. We will set an env-var "COLUMNS" as used by 'ls' to acheive this.
-
-        # "COLUMNS" is a variable that is used by 'ls' on BOTH Linux AND Darwin,
-        # for setting the width for both '-C' and '-x', but its use is only
-        # documented on Darwin (see man ls(1)).
-        #
-        # However COLUMNS is NOT an enviroment-variable by default. Which isn't
-        # to say that someone might not have 'exported' it as such on purpose.
-        #
-        # As you can see from the following cmds that were run in a
-        # 'terminal' on RHEL 8 (actually AlmaLinux release 8.8):
-        #
-        #    $ echo $COLUMNS
-        #    110
-        #    $ cat printColumns 
-        #    #!/bin/bash
-        #    echo COLUMNS $COLUMNS
-        #    $ ./printColumns 
-        #    COLUMNS
-        #    $ export COLUMNS
-        #    $ ./printColumns 
-        #    COLUMNS 110
-        #    $ export -n COLUMNS
-        #    $ ./printColumns 
-        #    COLUMNS
-        #    $ source printColumns 
-        #    COLUMNS 110
-        #
-        # ...and from further experimentation, /bin/ls respects 'COLUMNS' and
-        # its treatment of stdout as a tty or pipe or redirect, also as relates
-        # to -C and -x etc. 
-
-        # shutil.get_terminal_size() returns the value of COLUMNS (if set as
-        # env-var by the caller AND when it's a valid positive integer) and also
-        # returns a decent default if not an env-var AND stdout is not a tty.
-        # 
-        # Then we set COLUMNS as an env-var so our call to 'ls' picks it up properly.
-        #
-        cols, rows = shutil.get_terminal_size()
-        os.environ["COLUMNS"] = str(cols)
+# Start using the --cache directory args.cacheDir, making it if need
+# be. The cache holds pickled data, so it is only used if nobody else
+# could have written to it.
+#
+def setupScanCache(args) :
+    global gScanCacheDir
+    global gScanCacheSignature
+    global gScanCacheSignatureHash
+    global gExitStatus
+    import zlib
+
+    try :
+        os.makedirs(args.cacheDir, mode=0o700, exist_ok=True)
+        cacheStat = os.stat(args.cacheDir)
+    except OSError as e :
+        writeWarning(PROG_NAME + ": warning: cannot use cache directory '"
+            + args.cacheDir + "': " + e.strerror + "\n")
+        gExitStatus = gExitStatus | EXIT_LS_WARNING
+        return
+    if cacheStat.st_uid != os.getuid() or cacheStat.st_mode & (stat.S_IWGRP | stat.S_IWOTH) :
+        writeWarning(PROG_NAME + ": warning: cannot use cache directory '"
+            + args.cacheDir + "': Writable by others\n")
+        gExitStatus = gExitStatus | EXIT_LS_WARNING
+        return
 
-        # No '-1', '-C' or '-x' used on cmd-line.
-        # So, if stdout is a tty, then behave as if '-C' was set,
-        # which is standard 'ls' behavior.
-        #
-        if args.byWhat == BY_UNSPECIFIED and sys.stdout.isatty():
-            extra_ls_options.append("-C")
+    gScanCacheDir = args.cacheDir
+    gScanCacheSignature = makeCacheSignature(args)
+    gScanCacheSignatureHash = "%08x" % zlib.crc32(gScanCacheSignature.encode())
 
-        # Note the MANDADORY use of the '-d' option, this will ensure
-        # that the call to 'ls' does not follow links, nor try to
-        # list directories passed to it.
-        #
-        # Also the use of the '--' guarantees that any files appearing
-        # first in the list which might start with a '-' (minus) don't
-        # get interpreted as an option to 'ls'.
-        # 
-        #
-        extra_ls_options.append("--")
-        lsCmd = ["ls", "-d"] + extra_ls_options + otherFiles
+# Keep the --cache to at most 'maxBytes' by removing the least recently
+# used records. Once over the limit it is trimmed to three quarters
+# of it, so as not to be trimming it again on every run.
+#
+def trimScanCache(maxBytes) :
+    cacheFiles = []
+    totalBytes = 0
+    try :
+        with os.scandir(gScanCacheDir) as dirIter :
+            for entry in dirIter :
+                if entry.name.startswith(CACHE_PREFIX) and entry.is_file(follow_symlinks=False) :
+                    entryStat = entry.stat(follow_symlinks=False)
+                    cacheFiles.append((entryStat.st_mtime, entryStat.st_size, entry.path))
+                    totalBytes += entryStat.st_size
+    except OSError :
+        return
+    if totalBytes <= maxBytes :
+        return
 
-        sys.stdout.flush()
-        sys.stderr.flush()
-        lsResult = subprocess.run(lsCmd, capture_output=True, text=True)
+    cacheFiles.sort()
+    for mtime, size, path in cacheFiles :
+        if totalBytes <= maxBytes * 3 // 4 :
+            break
+        try :
+            os.unlink(path)
+            totalBytes -= size
+        except OSError :
+            pass
 
-        if lsResult.returncode > 0 :
-            if not args.silent :
-                print(PROG_NAME, " : ", lsResult.stderr,
-                    file=sys.stderr, sep='', end='') # ls error message contains newline
-                sys.stderr.flush()
+# Send the (picklable) 'message' over the connected socket 'sock', see
+# DAEMON_HEADER.
+#
+def sendMessage(sock, message) :
+    import pickle
+    import struct
+
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(struct.pack(DAEMON_HEADER, len(data)) + data)
 
-            # Don't actually exit - but like 'ls', finish doing the work
-            # but exit with non-zero exit-status at the end of the program.
+# Returns the next message sent over 'sock' by sendMessage(). Raises
+# EOFError if the other end has gone away.
+#
+def receiveMessage(sock) :
+    import pickle
+    import struct
+
+    header = receiveBytes(sock, struct.calcsize(DAEMON_HEADER))
+    return pickle.loads(receiveBytes(sock, struct.unpack(DAEMON_HEADER, header)[0]))
+
+def receiveBytes(sock, numBytes) :
+    chunks = []
+    while numBytes > 0 :
+        chunk = sock.recv(min(numBytes, 1<<20))
+        if len(chunk) == 0 :
+            raise EOFError
+        chunks.append(chunk)
+        numBytes -= len(chunk)
+    return b"".join(chunks)
+
+# The default for --daemon-socket.
+#
+def defaultDaemonSocket() :
+    socketPath = os.getenv("LSSEQ_DAEMON_SOCKET")
+    if socketPath != None and socketPath != "" :
+        return socketPath
+    runtimeDir = os.getenv("XDG_RUNTIME_DIR")
+    if runtimeDir != None and runtimeDir != "" :
+        return os.path.join(runtimeDir, "lsseq.sock")
+    return "/tmp/lsseq-%d.sock" % os.getuid()
+
+# Connect to the daemon listening on 'socketPath', if there is one,
+# and it was started by the same user.
+#
+def connectDaemon(socketPath) :
+    global gDaemonSocket
+    global gDaemonLock
+
+    # Checked before importing socket, which takes longer than the
+    # rest of listing a small directory.
+    #
+    try :
+        socketStat = os.stat(socketPath)
+    except OSError :
+        return
+    if not stat.S_ISSOCK(socketStat.st_mode) or socketStat.st_uid != os.getuid() :
+        return
+
+    import socket
+    import threading
+
+    daemonSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    daemonSocket.settimeout(DAEMON_TIMEOUT)
+    try :
+        daemonSocket.connect(socketPath)
+    except OSError :
+        daemonSocket.close()
+        return
+    gDaemonSocket = daemonSocket
+    gDaemonLock = threading.Lock()
+
+# Returns the daemon's reply to 'request', or None if there is no
+# daemon (any more). Giving up on an unresponsive daemon means
+# reading the directories directly from then on.
+#
+def askDaemon(request) :
+    global gDaemonSocket
+
+    with gDaemonLock :
+        if gDaemonSocket == None :
+            return None
+        try :
+            sendMessage(gDaemonSocket, request)
+            return receiveMessage(gDaemonSocket)
+        except Exception : # Gone, hung, or talking nonsense.
+            gDaemonSocket.close()
+            gDaemonSocket = None
+            return None
+
+# Same as scanDir() but with the directory entries from the --daemon.
+# Returns None if the daemon isn't watching the directory.
+#
+def scanDirFromDaemon(dirFd, args) :
+    if gProfile != None :
+        profileCall("fstat")
+    dirStat = os.fstat(dirFd)
+    entries = askDaemon((DAEMON_PROTOCOL, dirStat.st_dev, dirStat.st_ino))
+    if entries == None :
+        return None
+
+    dirContents = []
+    for name, isDir, isSymLink, mode, size, mtime, mtimeNs, ino, dev, nlink, blocks in entries :
+        if not args.ignoreDotFiles or name[0] != "." :
+            lstatInfo = os.stat_result((mode, ino, dev, nlink, 0, 0, size, 0, int(mtime), 0),
+                {"st_mtime" : mtime, "st_mtime_ns" : mtimeNs, "st_blocks" : blocks})
+            dirContents.append(CachedEntry(name, dirFd, isDir, isSymLink, lstatInfo))
+    return gatherDirContents(dirContents, False, args)
+
+# The part of the reply to --daemon requests for the directory entry
+# 'name', see DAEMON_PROTOCOL.
+#
+def makeIndexEntry(name, lstatInfo) :
+    return (name, stat.S_ISDIR(lstatInfo.st_mode), stat.S_ISLNK(lstatInfo.st_mode),
+        lstatInfo.st_mode, lstatInfo.st_size, lstatInfo.st_mtime, lstatInfo.st_mtime_ns,
+        lstatInfo.st_ino, lstatInfo.st_dev, lstatInfo.st_nlink, lstatInfo.st_blocks)
+
+# A directory being watched by the --daemon. 'entries' maps the name
+# of each entry to its part of the reply to requests (see
+# DAEMON_PROTOCOL), and 'reply' holds the whole reply once made, until
+# anything changes. The directory is kept open as 'fd' so that it can
+# be looked at again wherever it gets moved to.
+#
+# 'parent' and 'name' are where the directory was last seen, if not
+# one of the roots. Any change in the directory changes its mtime, so
+# its entry in 'parent' needs looking at again too.
+#
+class WatchedDir :
+    def __init__(self, fd, wd, key, parent, name) :
+        self.fd = fd
+        self.wd = wd
+        self.key = key
+        self.parent = parent
+        self.name = name
+        self.entries = {}
+        self.reply = None
+
+# The --daemon's index of all the directories below its roots, kept up
+# to date with inotify(7). Events only note which entries changed, in
+# 'changed', and those are looked at again by update(), which is always
+# called before answering a request. As the kernel queues an event
+# before the call making the change returns, the index is then up to
+# date with everything done before the request was made.
+#
+# Should the kernel's event queue overflow, everything gets read again.
+#
+class DirIndex :
+    def __init__(self) :
+        import ctypes
+
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0 :
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.dirsByWd = {}
+        self.dirsByKey = {}
+        self.changed = set()
+        self.overflowed = False
+
+    # Start watching the directory 'name' (in the WatchedDir 'parent')
+    # and all the directories below it, unless already watched.
+    #
+    def addTree(self, name, parent=None) :
+        toAdd = [(name, parent)]
+        while len(toAdd) > 0 :
+            name, parent = toAdd.pop()
+            flags = os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC
+            if parent != None :
+                flags |= os.O_NOFOLLOW
+            try :
+                fd = os.open(name, flags, dir_fd=None if parent == None else parent.fd)
+            except OSError :
+                continue # Not there any more, or out of file descriptors.
+            fdStat = os.fstat(fd)
+            key = (fdStat.st_dev, fdStat.st_ino)
+            if key in self.dirsByKey :
+                os.close(fd)
+                if parent != None : # Moved.
+                    self.dirsByKey[key].parent = parent
+                    self.dirsByKey[key].name = name
+                continue
+
+            # Watch before reading, so as not to miss anything.
             #
-            gExitStatus = gExitStatus | EXIT_LS_WARNING
+            wd = self.libc.inotify_add_watch(self.fd,
+                os.fsencode("/proc/self/fd/%d" % fd), IN_WATCH_MASK)
+            if wd < 0 or wd in self.dirsByWd :
+                os.close(fd)
+                continue # Out of watches (see max_user_watches).
+            watchedDir = WatchedDir(fd, wd, key, parent, name)
+            self.dirsByWd[wd] = watchedDir
+            self.dirsByKey[key] = watchedDir
+            for subDir in self.readDir(watchedDir) :
+                toAdd.append((subDir, watchedDir))
+
+    # (Re)read all the entries of 'watchedDir'. Returns the names of
+    # the directories in it.
+    #
+    def readDir(self, watchedDir) :
+        watchedDir.entries = {}
+        watchedDir.reply = None
+        subDirs = []
+        try :
+            with os.scandir(watchedDir.fd) as dirIter :
+                for entry in dirIter :
+                    try :
+                        lstatInfo = entry.stat(follow_symlinks=False)
+                    except OSError :
+                        continue
+                    watchedDir.entries[entry.name] = makeIndexEntry(entry.name, lstatInfo)
+                    if stat.S_ISDIR(lstatInfo.st_mode) :
+                        subDirs.append(entry.name)
+        except OSError :
+            pass
+        return subDirs
 
-        if len(lsResult.stdout) > 0 :
-            print(lsResult.stdout, end='') # ls output contains newlines
-            sys.stdout.flush()
-            somethingWasPrinted = True
+    def dropDir(self, wd) :
+        watchedDir = self.dirsByWd.pop(wd, None)
+        if watchedDir != None :
+            if self.dirsByKey.get(watchedDir.key) is watchedDir :
+                del self.dirsByKey[watchedDir.key]
+            os.close(watchedDir.fd)
 
-    # Now actually print the sequences in this directory.
+    # Take note of all the pending inotify events.
+    #
+    def readEvents(self) :
+        import struct
+
+        eventSize = struct.calcsize(IN_EVENT_HEADER)
+        while True :
+            try :
+                buf = os.read(self.fd, 1<<16)
+            except BlockingIOError :
+                return
+            offset = 0
+            while offset < len(buf) :
+                wd, mask, cookie, nameSize = struct.unpack_from(IN_EVENT_HEADER, buf, offset)
+                offset += eventSize
+                name = os.fsdecode(buf[offset:offset+nameSize].rstrip(b"\0"))
+                offset += nameSize
+                if mask & IN_Q_OVERFLOW :
+                    self.overflowed = True
+                elif mask & IN_IGNORED :
+                    self.dropDir(wd) # Deleted, or its file system unmounted.
+                elif wd in self.dirsByWd :
+                    watchedDir = self.dirsByWd[wd]
+                    if name != "" :
+                        self.changed.add((watchedDir, name))
+                    if watchedDir.parent != None :
+                        self.changed.add((watchedDir.parent, watchedDir.name))
+
+    # Bring the index up to date with the events taken note of.
     #
-    seqKeys = []
-    if gListWhichFiles & LIST_IMGS :
-        imgKeys = list(imageDictionary.keys())
-        for k in imgKeys :
-            seqKeys.append(k)
+    def update(self) :
+        self.readEvents()
+        if self.overflowed :
+            self.overflowed = False
+            self.changed.clear()
+            for watchedDir in list(self.dirsByWd.values()) :
+                for subDir in self.readDir(watchedDir) :
+                    self.addTree(subDir, watchedDir)
+
+        for watchedDir, name in self.changed :
+            if self.dirsByWd.get(watchedDir.wd) is not watchedDir :
+                continue # No longer watched.
+            watchedDir.reply = None
+            try :
+                lstatInfo = os.stat(name, dir_fd=watchedDir.fd, follow_symlinks=False)
+            except OSError :
+                watchedDir.entries.pop(name, None)
+                continue
+            watchedDir.entries[name] = makeIndexEntry(name, lstatInfo)
+            if stat.S_ISDIR(lstatInfo.st_mode) :
+                self.addTree(name, watchedDir)
+        self.changed.clear()
 
-    if gListWhichFiles & LIST_MOVS :
-        movKeys = list(movieDictionary.keys())
-        for k in movKeys :
-            seqKeys.append(k)
+    # The reply to the request 'request', see DAEMON_PROTOCOL.
+    #
+    def answer(self, request) :
+        if not isinstance(request, tuple) or len(request) != 3 or request[0] != DAEMON_PROTOCOL :
+            return None
+        self.update()
+        watchedDir = self.dirsByKey.get((request[1], request[2]))
+        if watchedDir == None :
+            return None
+        if watchedDir.reply == None :
+            watchedDir.reply = list(watchedDir.entries.values())
+        return watchedDir.reply
+
+# Run as the --daemon, watching the directories 'roots' until killed.
+#
+def runDaemon(roots, args) :
+    import selectors
+    import signal
+    import socket
+    import struct
+    import threading
+
+    if not sys.platform.startswith("linux") :
+        if not args.silent :
+            print(PROG_NAME, ": error: argument --daemon: only available on Linux",
+                file=sys.stderr, sep='')
+        sys.exit(EXIT_ARGPARSE_ERROR)
 
-    if gListWhichFiles & LIST_CACHES :
-        cacheKeys = list(cacheDictionary.keys())
-        for k in cacheKeys :
-            seqKeys.append(k)
+    # Is there one already?
+    #
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try :
+        listener.connect(args.daemonSocket)
+        if not args.silent :
+            print(PROG_NAME, ": error: argument --daemon: already running on '",
+                args.daemonSocket, "'", file=sys.stderr, sep='')
+        sys.exit(EXIT_ARGPARSE_ERROR)
+    except OSError :
+        listener.close()
 
-    # Gather file mod times if needed.
+    # A directory per open file descriptor, so allow as many as possible.
     #
-    timeList = []
-    if args.sortByMTime or args.cutoffTime != None : # non-null cutoffTime means need time compare
-        for k in seqKeys :
-
-            if isMovie(k) :
-                timeList.append((k, int(movieDictionary[k][MOVIE_MTIME])))
-
-            elif isCache(k) :
-                validTimes = []
-                for im in cacheDictionary[k] :
-                    if im[FRAME_MTIME] != FILE_BROKENLINK :
-                        validTimes.append(im[FRAME_MTIME])
-                validTimes.sort()
-                time = 0
-                n = len(validTimes)
-                if n == 1 :
-                    time = validTimes[0]
-                elif n > 1 :
-                    if args.timeCompare == 'oldest' :
-                        time = validTimes[0]
-                    elif args.timeCompare == 'median' :
-                        midIndex = int(math.floor(n/2))
-                        if n % 2 == 1 : # Odd number of items
-                            time = validTimes[midIndex]
-                        else : # Even number of items.
-                            time = (validTimes[midIndex] + validTimes[midIndex-1])/2
-                    else : # newest
-                        time = validTimes[-1]
-                timeList.append((k, int(time)))
-
-            else : # key is an image.
-                validTimes = []
-                for im in imageDictionary[k] :
-                    if im[FRAME_MTIME] != FILE_BROKENLINK :
-                        validTimes.append(im[FRAME_MTIME])
-                validTimes.sort()
-                time = 0
-                n = len(validTimes)
-                if n == 1 :
-                    time = validTimes[0]
-                elif n > 1 :
-                    if args.timeCompare == 'oldest' :
-                        time = validTimes[0]
-                    elif args.timeCompare == 'median' :
-                        midIndex = int(math.floor(n/2))
-                        if n % 2 == 1 : # Odd number of items
-                            time = validTimes[midIndex]
-                        else : # Even number of items.
-                            time = (validTimes[midIndex] + validTimes[midIndex-1])/2
-                    else : # newest
-                        time = validTimes[-1]
-                timeList.append((k, int(time)))
+    try :
+        import resource
+        softLimit, hardLimit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hardLimit, hardLimit))
+    except (ImportError, ValueError, OSError) :
+        pass
+
+    dirIndex = DirIndex()
+    for root in roots :
+        if not os.path.isdir(root) :
+            if not args.silent :
+                print(PROG_NAME, ": error: argument --daemon: '", root,
+                    "' is not a directory", file=sys.stderr, sep='')
+            sys.exit(EXIT_ARGPARSE_ERROR)
+        dirIndex.addTree(root)
+
+    try :
+        os.unlink(args.daemonSocket) # Left behind by a daemon that was killed.
+    except OSError :
+        pass
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    oldUmask = os.umask(0o077)
+    try :
+        listener.bind(args.daemonSocket)
+    finally :
+        os.umask(oldUmask)
+    listener.listen()
+
+    def stopDaemon(signalNum, frame) :
+        sys.exit(EXIT_NO_ERROR)
+    signal.signal(signal.SIGTERM, stopDaemon)
+    signal.signal(signal.SIGHUP, stopDaemon)
+
+    if not args.silent :
+        print(PROG_NAME, ": watching ", len(dirIndex.dirsByWd), " directories, listening on '",
+            args.daemonSocket, "'", file=sys.stderr, sep='')
+
+    # Each client gets a thread of its own (see serveDaemonClient()), so
+    # that a slow or stalled one holds up nobody else, with 'indexLock'
+    # guarding dirIndex.
+    #
+    indexLock = threading.Lock()
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(dirIndex.fd, selectors.EVENT_READ)
+    credentialsSize = struct.calcsize("3i")
+    try :
+        while True :
+            for selectorKey, events in selector.select() :
+                if selectorKey.fileobj is listener :
+                    connection = listener.accept()[0]
+                    peerPid, peerUid, peerGid = struct.unpack("3i",
+                        connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentialsSize))
+                    if peerUid != os.getuid() :
+                        connection.close()
+                        continue
+                    threading.Thread(target=serveDaemonClient,
+                        args=(connection, dirIndex, indexLock), daemon=True).start()
+                elif selectorKey.fileobj == dirIndex.fd :
+                    with indexLock :
+                        dirIndex.update()
+    finally :
+        listener.close()
+        os.unlink(args.daemonSocket)
+
+# Answer the requests of the --daemon's client 'connection' until it
+# goes away. The client may take as long as it likes between requests,
+# but once one has started coming in it has DAEMON_TIMEOUT seconds to
+# finish sending it, and to take the reply.
+#
+def serveDaemonClient(connection, dirIndex, indexLock) :
+    import socket
+
+    try :
+        while True :
+            connection.settimeout(None)
+            if len(connection.recv(1, socket.MSG_PEEK)) == 0 :
+                break # Gone.
+            connection.settimeout(DAEMON_TIMEOUT)
+            request = receiveMessage(connection)
+            with indexLock :
+                reply = dirIndex.answer(request)
+            sendMessage(connection, reply)
+    except Exception : # Gone, hung, or talking nonsense.
+        pass
+    finally :
+        connection.close()
+
+# Same as scanDir() but for the subdirectory 'name' of the open directory
+# 'dirFd'. Used to gather subdirectories ahead of time in the thread-pool
+# for --jobs.
+#
+# Returns the two-tuple (dirScan, subDirScans). With 'readAhead' the
+# first of the subdirectories of 'name' are put in the thread-pool too
+# (as many as walkDirs() keeps on the go, which then carries on with
+# the rest), 'subDirScans' mapping their names to the futures of their
+# scans, otherwise 'subDirScans' is None. Note: they are
+# opened by their path from 'dirFd', so 'readAhead' is only used for the
+# directories on the command line, for which dirFd is None, i.e. the
+# current working directory (which lsseq never changes).
+#
+def scanSubDir(name, dirFd, args, readAhead=False) :
+    subDirFd = openDir(name, dirFd)
+    try :
+        dirScan = scanDir(subDirFd, args)
+    finally :
+        os.close(subDirFd)
+
+    subDirScans = None
+    if readAhead :
+        subDirScans = {}
+        for d in sorted(dirScan.dirList)[:PREFETCH_PER_JOB * args.jobs] :
+            subDirScans[d] = gScanPool.submit(scanSubDir, os.path.join(name, d), dirFd, args)
+    return (dirScan, subDirScans)
+
+# Use actual "ls" to print the (sorted) non-sequences 'otherFiles' from
+# the directory 'path' nicely (see --use-ls). Returns True if 'ls'
+# printed anything.
+#
+def runLs(otherFiles, path, args) :
+    global gExitStatus
+    import shutil
+    import subprocess
+
+    extra_ls_options = []
+    if args.classify :
+        extra_ls_options.append("-F")
+
+    if args.byWhat == BY_SINGLE : # byWhat values are mutually exclusive.
+        extra_ls_options.append("-1")
+    elif args.byWhat == BY_COLUMNS :
+        extra_ls_options.append("-C")
+    elif args.byWhat == BY_ROWS :
+        extra_ls_options.append("-x")
 
     if args.sortByMTime :
-        if args.globalSortByTime :
-            #
-            # Append sequences to the global-lists then print nothing and continue
-            # below with any recursive descent or processing other directory contents.
-            #
-            # We need the entries of the dictionaries added to a corresponding
-            # global dictionary for use in main(), but the key needs to be extended
-            # to include traversedPath to get unique keys globally.
-            #
-            # Thus gTimeList includes the sequence-keys and the traversedPath
-            # to be able to construct the global-keys back in main().
-            #
-            for seq in timeList :
-                gTimeList.append( (seq[DICTKEY], seq[MTIME], traversedPath) )
-                gDictKey = traversedPath + '/' + seq[DICTKEY]
-                if isMovie(seq[DICTKEY]) :
-                    gMovieDictionary[gDictKey] = movieDictionary[seq[DICTKEY]]
-                elif isCache(seq[DICTKEY]) :
-                    gCacheDictionary[gDictKey] = cacheDictionary[seq[DICTKEY]]
+        extra_ls_options.append("-t")
+
+    if args.reverseListing :
+        extra_ls_options.append("-r")
+
+    # Note: v2.7.* and earlier version of lsseq used subprocess.call('ls')
+    # Which did not intercept stdout, so it calculated columns 
+    # properly based on if stdout was a terminal or not.
+    #
+    # Now, as of v3.0.0, we are using subprocess.run('ls', capture_output=True"),
+    # so 'ls' doesn't understand if lsseq's stdout is connected to stdout or not.
+    # Now we need to duplicate ls's internal logic ourselves to set the output
+    # correctly. We will set an env-var "COLUMNS" as used by 'ls' to acheive this.
+
+    # "COLUMNS" is a variable that is used by 'ls' on BOTH Linux AND Darwin,
+    # for setting the width for both '-C' and '-x', but its use is only
+    # documented on Darwin (see man ls(1)).
+    #
+    # However COLUMNS is NOT an enviroment-variable by default. Which isn't
+    # to say that someone might not have 'exported' it as such on purpose.
+    #
+    # As you can see from the following cmds that were run in a
+    # 'terminal' on RHEL 8 (actually AlmaLinux release 8.8):
+    #
+    #    $ echo $COLUMNS
+    #    110
+    #    $ cat printColumns 
+    #    #!/bin/bash
+    #    echo COLUMNS $COLUMNS
+    #    $ ./printColumns 
+    #    COLUMNS
+    #    $ export COLUMNS
+    #    $ ./printColumns 
+    #    COLUMNS 110
+    #    $ export -n COLUMNS
+    #    $ ./printColumns 
+    #    COLUMNS
+    #    $ source printColumns 
+    #    COLUMNS 110
+    #
+    # ...and from further experimentation, /bin/ls respects 'COLUMNS' and
+    # its treatment of stdout as a tty or pipe or redirect, also as relates
+    # to -C and -x etc. 
+
+    # shutil.get_terminal_size() returns the value of COLUMNS (if set as
+    # env-var by the caller AND when it's a valid positive integer) and also
+    # returns a decent default if not an env-var AND stdout is not a tty.
+    # 
+    # Then we set COLUMNS as an env-var so our call to 'ls' picks it up properly.
+    #
+    cols, rows = shutil.get_terminal_size()
+    os.environ["COLUMNS"] = str(cols)
+
+    # No '-1', '-C' or '-x' used on cmd-line.
+    # So, if stdout is a tty, then behave as if '-C' was set,
+    # which is standard 'ls' behavior.
+    #
+    if args.byWhat == BY_UNSPECIFIED and sys.stdout.isatty():
+        extra_ls_options.append("-C")
+
+    # Note the MANDADORY use of the '-d' option, this will ensure
+    # that the call to 'ls' does not follow links, nor try to
+    # list directories passed to it.
+    #
+    # Also the use of the '--' guarantees that any files appearing
+    # first in the list which might start with a '-' (minus) don't
+    # get interpreted as an option to 'ls'.
+    # 
+    #
+    extra_ls_options.append("--")
+    lsCmd = ["ls", "-d"] + extra_ls_options + otherFiles
+
+    flushForWarning()
+    if gProfile != None :
+        profileCall("ls")
+    lsResult = subprocess.run(lsCmd, capture_output=True, text=True, cwd=path)
+
+    if lsResult.returncode > 0 :
+        if not args.silent :
+            print(PROG_NAME, " : ", lsResult.stderr,
+                file=sys.stderr, sep='', end='') # ls error message contains newline
+            sys.stderr.flush()
+
+        # Don't actually exit - but like 'ls', finish doing the work
+        # but exit with non-zero exit-status at the end of the program.
+        #
+        gExitStatus = gExitStatus | EXIT_LS_WARNING
+
+    if len(lsResult.stdout) > 0 :
+        writeOut(lsResult.stdout) # ls output contains newlines
+        return True
+
+    return False
+
+# Return the number of columns a terminal uses to display 'name'.
+#
+def lsWidth(name) :
+    import unicodedata
+
+    if name.isascii() :
+        return len(name)
+    width = 0
+    for c in name :
+        if unicodedata.combining(c) :
+            continue
+        elif unicodedata.east_asian_width(c) in ("W", "F") :
+            width += 2
+        else :
+            width += 1
+    return width
+
+# Return the character 'ls -F' appends to a file with the lstat()
+# result 'statInfo', or "" if there isn't one.
+#
+def lsIndicator(statInfo) :
+    mode = statInfo.st_mode
+    if stat.S_ISDIR(mode) :
+        return "/"
+    elif stat.S_ISLNK(mode) :
+        return "@"
+    elif stat.S_ISFIFO(mode) :
+        return "|"
+    elif stat.S_ISSOCK(mode) :
+        return "="
+    elif stat.S_ISREG(mode) and (mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)) :
+        return "*"
+    else :
+        return ""
+
+# Return the padding needed to go from column 'fromPos' to 'toPos' of
+# a line, using tabs where they fit like GNU 'ls' does.
+#
+def lsIndent(fromPos, toPos) :
+    padding = ""
+    while fromPos < toPos :
+        if toPos // LS_TAB_SIZE > (fromPos + 1) // LS_TAB_SIZE :
+            padding += "\t"
+            fromPos += LS_TAB_SIZE - fromPos % LS_TAB_SIZE
+        else :
+            padding += " "
+            fromPos += 1
+    return padding
+
+# Return the widths of the columns (including the two spaces separating
+# them) that GNU 'ls' would use to fit 'names' onto lines no wider than
+# 'lineLength'. 'widths' are the display widths of the names. The names
+# go down the columns if 'byColumns' is True (-C), or across the rows
+# otherwise (-x).
+#
+# Note: this is the same algorithm as calculate_columns() in GNU ls.c
+# which tries every number of columns at once, giving up on each as
+# soon as it becomes too wide. The widest that fits wins.
+#
+def lsColumnWidthsGNU(widths, lineLength, byColumns) :
+    numFiles = len(widths)
+    maxCols = lineLength // LS_MIN_COLUMN_WIDTH
+    if lineLength % LS_MIN_COLUMN_WIDTH != 0 :
+        maxCols += 1
+    if maxCols <= 0 or maxCols > numFiles :
+        maxCols = numFiles
+
+    validLen = [True] * maxCols
+    lineLen = [(i + 1) * LS_MIN_COLUMN_WIDTH for i in range(maxCols)]
+    colArr = [[LS_MIN_COLUMN_WIDTH] * (i + 1) for i in range(maxCols)]
+
+    for fileNum in range(numFiles) :
+        nameLength = widths[fileNum]
+        for i in range(maxCols) :
+            if validLen[i] :
+                if byColumns :
+                    idx = fileNum // ((numFiles + i) // (i + 1))
+                else :
+                    idx = fileNum % (i + 1)
+                if idx == i :
+                    realLength = nameLength
                 else :
-                    gImageDictionary[gDictKey] = imageDictionary[seq[DICTKEY]]
+                    realLength = nameLength + 2
+                if colArr[i][idx] < realLength :
+                    lineLen[i] += realLength - colArr[i][idx]
+                    colArr[i][idx] = realLength
+                    validLen[i] = lineLen[i] < lineLength
+
+    numCols = maxCols
+    while numCols > 1 and not validLen[numCols - 1] :
+        numCols -= 1
+    return colArr[numCols - 1]
+
+# Return the lines GNU 'ls -C' (or 'ls -x' if 'byColumns' is False)
+# prints for 'names' given their display 'widths'.
+#
+def lsColumnsGNU(names, widths, lineLength, byColumns) :
+    numFiles = len(names)
+    colArr = lsColumnWidthsGNU(widths, lineLength, byColumns)
+    numCols = len(colArr)
+    lines = []
+
+    if byColumns :
+        numRows = numFiles // numCols + (numFiles % numCols != 0)
+        for row in range(numRows) :
+            line = ""
+            pos = 0
+            col = 0
+            fileNum = row
+            while True :
+                line += names[fileNum]
+                fileNum += numRows
+                if fileNum >= numFiles :
+                    break
+                line += lsIndent(pos + widths[fileNum - numRows], pos + colArr[col])
+                pos += colArr[col]
+                col += 1
+            lines.append(line)
+
+    else :
+        line = names[0]
+        pos = 0
+        for fileNum in range(1, numFiles) :
+            col = fileNum % numCols
+            if col == 0 :
+                lines.append(line)
+                line = ""
+                pos = 0
+            else :
+                line += lsIndent(pos + widths[fileNum - 1], pos + colArr[col - 1])
+                pos += colArr[col - 1]
+            line += names[fileNum]
+        lines.append(line)
+
+    return lines
+
+# Return the lines BSD 'ls -C' (or 'ls -x' if 'byColumns' is False)
+# prints for 'names' given their display 'widths'. Every column is
+# 'maxWidth' (the widest name, allowing for a -F indicator) plus at
+# least one space, rounded up to the next tab stop.
+# (See printcol() in BSD ls/print.c.)
+#
+def lsColumnsBSD(names, widths, maxWidth, lineLength, byColumns) :
+    numFiles = len(names)
+    colWidth = (maxWidth + LS_TAB_SIZE) & ~(LS_TAB_SIZE - 1)
+    if lineLength < 2 * colWidth :
+        return names
+
+    numCols = lineLength // colWidth
+    numRows = numFiles // numCols + (numFiles % numCols != 0)
+    lines = []
+    base = 0
+    for row in range(numRows) :
+        line = ""
+        endCol = colWidth
+        charCount = 0
+        if byColumns :
+            base = row
+        for col in range(numCols) :
+            line += names[base]
+            charCount += widths[base]
+            if byColumns :
+                base += numRows
+            else :
+                base += 1
+            if base >= numFiles :
+                break
+            while True :
+                tabStop = (charCount + LS_TAB_SIZE) & ~(LS_TAB_SIZE - 1)
+                if tabStop > endCol or (not byColumns and col + 1 >= numCols) :
+                    break
+                line += "\t"
+                charCount = tabStop
+            endCol += colWidth
+        lines.append(line)
 
-        else : # Local sort
+    return lines
+
+# Print the errors for any non-sequences on the command line that don't
+# exist (or can't be accessed), the same way they were reported back
+# when 'ls' was always used to list non-sequences. I.e.; worded like
+# the native 'ls' of the platform.
+#
+def printOtherErrors(otherErrors, args) :
+    global gExitStatus
+
+    if not args.silent :
+        flushForWarning()
+        for filename, errorMessage in sorted(otherErrors) :
+            if gLsLayout == LS_LAYOUT_BSD :
+                print(PROG_NAME, " : ls: ", filename, ": ", errorMessage,
+                    file=sys.stderr, sep='')
+            else :
+                print(PROG_NAME, " : ls: cannot access '", filename, "': ", errorMessage,
+                    file=sys.stderr, sep='')
+        sys.stderr.flush()
+
+    # Don't actually exit - but like 'ls', finish doing the work
+    # but exit with non-zero exit-status at the end of the program.
+    #
+    gExitStatus = gExitStatus | EXIT_LS_WARNING
+
+# Returns the JSON record for the non-sequence 'name' (see JSON_FORMATS).
+#
+def otherRecord(name, traversedPath) :
+    fileDir, fileName = recordPath(traversedPath, name)
+    return { "type" : "file", "dir" : fileDir, "name" : fileName }
+
+# Write out the JSON record for the non-sequence 'name'.
+#
+def printOtherRecord(name, traversedPath) :
+    writeRecord(otherRecord(name, traversedPath))
+
+# Returns the module locale, or rather _locale, the part of it written
+# in C with all that lsseq uses (setlocale() and strxfrm()), which
+# spares importing re along with locale, taking longer than listing a
+# small directory does.
+#
+def localeModule() :
+    try :
+        import _locale
+        return _locale
+    except ImportError :
+        import locale
+        return locale
+
+# Returns the non-sequences 'otherFiles' sorted by name in the collating
+# order of the user's locale like 'ls', or newest first (ties by name)
+# with -t, reversed with -r.
+#
+def sortOtherFiles(otherFiles, otherStats, args) :
+    locale = localeModule()
+
+    if args.sortByMTime :
+        sortKey = lambda f : (-otherStats[f].st_mtime_ns, locale.strxfrm(f))
+    else :
+        sortKey = locale.strxfrm
+    return sorted(otherFiles, key=sortKey, reverse=args.reverseListing)
+
+# Print the non-sequences 'otherFiles' like "ls -d" would (with the
+# options -1, -C, -x, -F, -t and -r as set on the lsseq command line),
+# without forking an 'ls' for every directory. 'otherStats' holds the
+# lstat() results for the files, if they were needed (see makeStatPlan()).
+#
+# Like 'ls', list by columns only when stdout is a terminal unless -C
+# or -x is given, and fit the columns into the width of the terminal
+# or $COLUMNS (see the comments in runLs()). With JSON_FORMATS each
+# file gets a record of its own instead.
+#
+def printOtherFiles(otherFiles, otherStats, args, traversedPath) :
+    otherFiles = sortOtherFiles(otherFiles, otherStats, args)
+
+    if args.seqFormat in JSON_FORMATS :
+        for f in otherFiles :
+            printOtherRecord(f, traversedPath)
+        return
+
+    if args.classify :
+        names = [f + lsIndicator(otherStats[f]) for f in otherFiles]
+    else :
+        names = otherFiles
+
+    byWhat = args.byWhat
+    if byWhat == BY_UNSPECIFIED :
+        if sys.stdout.isatty() :
+            byWhat = BY_COLUMNS
+        else :
+            byWhat = BY_SINGLE
+
+    if byWhat == BY_SINGLE :
+        lines = names
+    else :
+        widths = [lsWidth(n) for n in names]
+        cols = terminalColumns()
+        if gLsLayout == LS_LAYOUT_BSD :
+            maxWidth = max([lsWidth(f) for f in otherFiles]) + args.classify
+            lines = lsColumnsBSD(names, widths, maxWidth, cols, byWhat == BY_COLUMNS)
+        else :
+            lines = lsColumnsGNU(names, widths, cols, byWhat == BY_COLUMNS)
+
+    writeOut("\n".join(lines) + "\n")
+
+# Returns the list of (seqKey, mtime) two-tuples for the sequences in
+# 'dirScan', the time of a sequence being that of its oldest, median or
+# newest frame (see --time).
+#
+def seqTimes(dirScan, args) :
+    timeList = []
+    for k in dirScan.seqKeys.values() :
+
+        if k.category == LIST_MOVS :
+            timeList.append((k, int(dirScan.movieDictionary[k.name][MOVIE_MTIME])))
+            continue
+
+        if k.category == LIST_CACHES :
+            frameList = dirScan.cacheDictionary[k.name]
+        else : # key is an image.
+            frameList = dirScan.imageDictionary[k.name]
+        timeList.append((k, int(frameListTime(frameList, args.timeCompare))))
+    return timeList
+
+# Returns the time of the oldest, median or newest (see --time) of the
+# frames of the FrameList 'frameList', leaving out broken sym-links, or
+# zero if there are no such frames. The oldest and newest were kept
+# track of as the frames came in, and the median needs the mtimes column.
+#
+def frameListTime(frameList, timeCompare) :
+    if timeCompare == 'oldest' :
+        seqTime = frameList.oldest
+    elif timeCompare == 'newest' :
+        seqTime = frameList.newest
+    else :
+        seqTime = medianTime([t for t in frameList.mtimes if t != FILE_BROKENLINK])
+    if seqTime == None :
+        return 0
+    return seqTime
+
+# Returns the median of the list of times 'times', or None if it is
+# empty.
+#
+# Rather than sorting all of them, the times either side of the middle
+# are selected (like Floyd and Rivest's SELECT): a sorted sample of the
+# times gives two times likely to be just below and just above them,
+# and only the times in between get sorted, after counting those
+# below. Should the sample be in order already though, so will the
+# times (near enough), which sort (in C) quicker than the times in
+# between can be picked out (in python).
+#
+def medianTime(times) :
+    n = len(times)
+    if n == 0 :
+        return None
+    middle = [(n - 1)//2, n//2] # The same one twice when n is odd.
+
+    if n > MEDIAN_SELECT_MIN :
+        import random
+        sampleSize = int(n ** (2/3))
+        sample = [times[i] for i in sorted(random.Random(n).sample(range(n), sampleSize))]
+        sortedSample = sorted(sample)
+        if sample != sortedSample :
+            gap = int(sampleSize ** 0.5)
+            low = sortedSample[max(0, middle[0] * sampleSize // n - gap)]
+            high = sortedSample[min(sampleSize - 1, middle[1] * sampleSize // n + gap)]
+            numBelow = sum(map(low.__gt__, times))
+            between = [t for t in times if low <= t <= high]
+            if numBelow <= middle[0] and middle[1] < numBelow + len(between) :
+                between.sort()
+                return (between[middle[0] - numBelow] + between[middle[1] - numBelow])/2
+
+    times = sorted(times) # Too few times, in order, or the sample was off.
+    return (times[middle[0]] + times[middle[1]])/2
+
+# Return true if and only if a sequence with the time 'seqTime' passes
+# the --only-show cut-off, if there is one.
+#
+def withinCutoffTime(seqTime, args) :
+    if args.cutoffTime == None :
+        return True
+    if args.cutoffTime[0] == 'before' :
+        return seqTime <= args.cutoffTime[1]
+    else : # Guaranteed to be 'since'
+        return seqTime >= args.cutoffTime[1]
+
+# Returns the SequenceKeys of the sequences in 'dirScan' that are to be
+# listed, in the order they are listed in, sorted by name or time (except
+# for --global-sort-by-time, see listSeqDir()).
+#
+def listedSeqs(dirScan, args) :
+    if args.sortByMTime or args.cutoffTime != None : # non-null cutoffTime means need time compare
+        timeList = seqTimes(dirScan, args)
+
+        if args.sortByMTime :
             #
             # Note:
             #
@@ -1521,173 +3332,685 @@ def listSeqDir(dirContents, path, isCmdLineArg, args, traversedPath) :
             # to point to the same target files and --dereference is invoked.
             #
             if args.reverseListing :
-                timeList.sort(key=itemgetter(DICTKEY), reverse=True) # Sort by DICTKEY
+                timeList.sort(key=lambda seq : seq[DICTKEY].name, reverse=True) # Sort by DICTKEY
                 timeList.sort(key=itemgetter(MTIME), reverse=False) # Last, and mainly, MTIME.
             else :
-                timeList.sort(key=itemgetter(DICTKEY), reverse=False) # Sort by DICTKEY
+                timeList.sort(key=lambda seq : seq[DICTKEY].name, reverse=False) # Sort by DICTKEY
                 timeList.sort(key=itemgetter(MTIME), reverse=True) # Last, and mainly, MTIME.
+        else :
+            timeList.sort(key=lambda seq : seq[DICTKEY].name) # Sorts by name.
+            if args.reverseListing :
+                timeList.reverse()
+
+        seqKeys = [seq[DICTKEY] for seq in timeList if withinCutoffTime(seq[MTIME], args)]
+
+    else :
+        seqKeys = sorted(dirScan.seqKeys.values(), key=attrgetter("name"))
+        if args.reverseListing :
+            seqKeys.reverse()
+
+    if args.limit != None :
+        del seqKeys[args.limit:]
+    return seqKeys
+
+# What walkDirs() yields, as the first element of each tuple:
+#
+#      (WALK_DIR, dirScan, path, traversedPath)
+#          The contents of a directory (or of the command line) to list.
+#
+#   (WALK_SUBDIR, name, traversedPath, isFirst)
+#          About to descend into the subdirectory 'name' of the directory
+#          last yielded, 'isFirst' if it's the first of them.
+#
+#  (WALK_WARNING, message, exitStatusBit)
+#          Couldn't descend into it after all, like DirScan.warnings.
+#
+WALK_DIR     = 0
+WALK_SUBDIR  = 1
+WALK_WARNING = 2
+
+# The walk through the directories to list, shared by listSeqDir() and
+# scanRecords(). Yields the contents passed to it via the first argument
+# (already gathered into a DirScan, see gatherDirContents() and
+# scanDir()), then descends into its subdirectories if need be,
+# yielding theirs in turn (see WALK_DIR etc. above). Those contents
+# MAY or MAY-NOT be all contained in the same directory. That list will
+# likely ONLY be the contents of a single directory if this has been
+# called recursively with "-R" to lsseq, and we're more than one level deep.
+#
+# The function arguments are as follows:
+# 
+#       dirScan - The gathered contents of a list of files from the
+#                 command line (as CmdLineEntry objects), OR of a
+#                 directory from a recursive descent (see scanDir()).
+#         dirFd - File descriptor of the open directory being listed,
+#                 (or None for files listed on the command line) which
+#                 any subdirectories are opened relative to. Note: lsseq
+#                 never changes its current working directory.
+#          path - The path of the directory being listed, relative to the
+#                 current working directory (or absolute).
+#                 (Might be trivially "." if called from main())
+#   isCmdLineArg - Boolean. Only possibly True if called from main().
+#                 This arg allows us to get ONE LEVEL of recursion only
+#                 unless args.isRecursive is also True in which
+#                 case we may descend further if need be.
+#                 "recursion" in this context means listing subdirs,
+#                 and in the case of calling (for example) 'lsseq dir1 dir2' we
+#                 need to list dir1 then dir2, but no deeper
+#                 in each case.
+#          args - The all the options set on the command line.
+# traversedPath - The path descended so far to get to this level
+#                 used to print the directory-title. Also note that
+#                 traversedPath will always have a '/' as the last
+#                 character in the string.
+#   subDirScans - The subdirectories already being gathered by the
+#                 thread-pool, if any, see scanSubDir().
+#
+# Note: each subdirectory is only open while the walk is inside it, and
+# gets closed if the walk is abandoned part way (i.e., by close()).
+#
+def walkDirs(dirScan, dirFd, path, isCmdLineArg, args, traversedPath, subDirScans=None) :
+
+    yield (WALK_DIR, dirScan, path, traversedPath)
+
+    if not ((isCmdLineArg or args.isRecursive) and args.listDirContents) :
+        return
+
+    dirList = dirScan.dirList
+    dirList.sort()
+
+    # If a thread-pool has been set up for --jobs, gather the
+    # subdirectories ahead of time, in the order they will be listed
+    # (unless that was already done, see scanSubDir()), keeping up to
+    # PREFETCH_PER_JOB of them per thread on the go. The directories on
+    # the command line are gathered together with their own
+    # subdirectories if listing recursively.
+    #
+    if subDirScans == None :
+        subDirScans = {}
+    readAhead = isCmdLineArg and args.isRecursive
+    numPrefetched = 0 # Of dirList, so far.
+
+    try :
+        firstDir = True
+        for i, d in enumerate(dirList) :
+            if gScanPool != None :
+                while numPrefetched < min(len(dirList), i + PREFETCH_PER_JOB * args.jobs) :
+                    if dirList[numPrefetched] not in subDirScans :
+                        subDirScans[dirList[numPrefetched]] = gScanPool.submit(scanSubDir,
+                            dirList[numPrefetched], dirFd, args, readAhead)
+                    numPrefetched += 1
+
+            # Wait for the prefetch of 'd' even if it gets skipped below,
+            # as it may still be using dirFd.
+            #
+            subDirScan = None
+            if d in subDirScans :
+                try :
+                    subDirScan = subDirScans.pop(d).result()
+                except OSError :
+                    pass # Reported when opening 'd' below.
+
+            if d[-1] == "/" :
+                d = d[:-1]
+            yield (WALK_SUBDIR, d, traversedPath, firstDir)
+            firstDir = False
+
+            if d[0] == "/" :
+                passedPath = d + "/"
+            else :
+                passedPath = traversedPath + d + "/"
+
+            # JPR - first check if we have permission for directory 'd'.
+            # It may also have gone since dirList was read, or be
+            # otherwise unreadable, which is warned about the same way.
+            #
+            subDirFd = None
+            try :
+                subDirFd = openDir(d, dirFd)
+                if subDirScan == None :
+                    subDirScan = (scanDir(subDirFd, args), None)
+            except OSError as e :
+                if subDirFd != None :
+                    os.close(subDirFd)
+                yield (WALK_WARNING, "can not descend into " + passedPath[:-1] + ": "
+                    + descendFailure(e) + ".", EXIT_CD_PERMISSION_WARNING)
+                continue
+
+            try :
+                yield from walkDirs(subDirScan[0], subDirFd, os.path.join(path, d), False, args,
+                    passedPath, subDirScan[1])
+            finally :
+                os.close(subDirFd)
+
+    finally :
+        # Those not listed, as the walk was abandoned, may still be
+        # using dirFd.
+        #
+        for future in subDirScans.values() :
+            if not future.cancel() :
+                future.exception()
+
+# List the contents passed to it via the first argument, and those of
+# any subdirectories, as walked through by walkDirs() (see there for
+# the arguments).
+#
+# This fucntion assumes that if a directory-title is needed
+# (i.e., the dirScan parameter to this function), for example:
+#
+# dirName:
+# aaa bbb ccc etc
+#
+# ...then that title "dirName:" is printed BEFORE the call to this function.
+# Those of the subdirectories are printed here.
+#
+def listSeqDir(dirScan, dirFd, path, isCmdLineArg, args, traversedPath, subDirScans=None) :
+
+    # Declare global variables since they might be modified by this function.
+    #
+    global gExitStatus
+
+    # Following flag set iff something gets printed for the directory
+    # last listed, before the printing of its subdirs.
+    #
+    somethingWasPrinted = False
+
+    for walked in walkDirs(dirScan, dirFd, path, isCmdLineArg, args, traversedPath, subDirScans) :
+        if walked[0] == WALK_DIR :
+            somethingWasPrinted = listDirScan(walked[1], walked[2], args, walked[3])
+
+        elif walked[0] == WALK_SUBDIR :
+            if args.prependPath == PATH_NOPREFIX :
+                d, subDirTraversedPath, isFirst = walked[1:]
+                if somethingWasPrinted or not isFirst :
+                    writeOut("\n")
+                if args.isRecursive :
+                    writeOut(subDirTraversedPath + d + ":\n")
+                else :
+                    writeOut(d + ":\n")
+
+        else :
+            if not args.silent :
+                flushForWarning()
+                print(PROG_NAME, ": warning: ", walked[1], sep='', file=sys.stderr)
+                sys.stderr.flush()
+            gExitStatus = gExitStatus | walked[2]
 
-            for seq in timeList :
-                if args.cutoffTime != None :
-                    if args.cutoffTime[0] == 'before' :
-                        if seq[MTIME] > args.cutoffTime[1] :
-                            continue
-                    else : # Guaranteed to be 'since'
-                        if seq[MTIME] < args.cutoffTime[1] :
-                            continue
-                if isMovie(seq[DICTKEY]) :
-                    if args.prependPath != PATH_NOPREFIX :
-                        # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                        #
-                        if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                            sys.stdout.write(traversedPath[2:])
-                        else :
-                            sys.stdout.write(traversedPath)
-                    classifyTag = ""
-                    movIsLink = movieDictionary[seq[DICTKEY]][MOVIE_ISSYMLINK]
-                    if movIsLink and args.classify:
-                        classifyTag = "@"
-                    print(seq[DICTKEY], classifyTag, sep='')
-                    somethingWasPrinted = True
-                elif isCache(seq[DICTKEY]) :
-                    cacheDictionary[seq[DICTKEY]].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                    printSeq(seq[DICTKEY], cacheDictionary[seq[DICTKEY]], args, traversedPath)
-                    somethingWasPrinted = True
-                else :
-                    imageDictionary[seq[DICTKEY]].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                    printSeq(seq[DICTKEY], imageDictionary[seq[DICTKEY]], args, traversedPath)
-                    somethingWasPrinted = True
+# List the contents (but not the subdirectories) of 'dirScan', from the
+# directory 'path', for listSeqDir(). Returns True if anything got
+# printed.
+#
+def listDirScan(dirScan, path, args, traversedPath) :
+    global gExitStatus
 
-    elif args.cutoffTime != None :
-        timeList.sort(key=itemgetter(DICTKEY)) # Sorts by name.
-        if args.reverseListing :
-            timeList.reverse()
-        for seq in timeList :
-            if args.cutoffTime[0] == 'before' :
-                if seq[MTIME] > args.cutoffTime[1] :
-                    continue
-            else : # Guaranteed to be 'since'
-                if seq[MTIME] < args.cutoffTime[1] :
-                    continue
-            if isMovie(seq[DICTKEY]) :
-                if args.prependPath != PATH_NOPREFIX :
-                    # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                    #
-                    if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                        sys.stdout.write(traversedPath[2:])
-                    else :
-                        sys.stdout.write(traversedPath)
-                classifyTag = ""
-                movIsLink = movieDictionary[seq[DICTKEY]][MOVIE_ISSYMLINK]
-                if movIsLink and args.classify:
-                    classifyTag = "@"
-                print(seq[DICTKEY], classifyTag, sep='')
-                somethingWasPrinted = True
-            elif isCache(seq[DICTKEY]) :
-                cacheDictionary[seq[DICTKEY]].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                printSeq(seq[DICTKEY], cacheDictionary[seq[DICTKEY]], args, traversedPath)
-                somethingWasPrinted = True
-            else :
-                imageDictionary[seq[DICTKEY]].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                printSeq(seq[DICTKEY], imageDictionary[seq[DICTKEY]], args, traversedPath)
-                somethingWasPrinted = True
-    else :
-        seqKeys.sort()
-        if args.reverseListing :
-            seqKeys.reverse()
-        for k in seqKeys :
-            if isMovie(k) :
-                if args.prependPath != PATH_NOPREFIX :
-                    # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                    #
-                    if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                        sys.stdout.write(traversedPath[2:])
-                    else :
-                        sys.stdout.write(traversedPath)
-                classifyTag = ""
-                movIsLink = movieDictionary[k][MOVIE_ISSYMLINK]
-                if movIsLink and args.classify:
-                    classifyTag = "@"
-                print(k, classifyTag, sep='')
-                somethingWasPrinted = True
+    somethingWasPrinted = False
 
-            elif isCache(k) :
-                cacheDictionary[k].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                printSeq(k, cacheDictionary[k], args, traversedPath)
-                somethingWasPrinted = True
+    # Print any warnings from gathering the directory contents.
+    #
+    for warning in dirScan.warnings :
+        if not args.silent :
+            flushForWarning()
+            print(PROG_NAME, ": warning: ", warning[0], sep='', file=sys.stderr)
+            sys.stderr.flush()
+        gExitStatus = gExitStatus | warning[1]
 
-            else :
-                imageDictionary[k].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                printSeq(k, imageDictionary[k], args, traversedPath)
+    imageDictionary = dirScan.imageDictionary
+    cacheDictionary = dirScan.cacheDictionary
+    movieDictionary = dirScan.movieDictionary
+    otherFiles = dirScan.otherFiles
+
+    # Print the non-sequences, like 'ls' would.
+    #
+    otherFiles.sort()
+    if len(dirScan.otherErrors) > 0 :
+        printOtherErrors(dirScan.otherErrors, args)
+    if len(otherFiles) > 0 :
+        if args.useLs :
+            if runLs(otherFiles, path, args) :
                 somethingWasPrinted = True
+        else :
+            printOtherFiles(otherFiles, dirScan.otherStats, args, traversedPath)
+            somethingWasPrinted = True
+
+    # Now actually print the sequences in this directory.
+    #
+    # The dictionary holding the data of each category of sequence.
+    # Note: the dictionaries only contain the categories being listed.
+    #
+    seqDictionary = {
+        LIST_IMGS   : imageDictionary,
+        LIST_MOVS   : movieDictionary,
+        LIST_CACHES : cacheDictionary
+    }
 
-    # lsseq the contents of any subdirectories if need be.
-    #         Somewhat mimics the calls up in main().
+    # What to print in front of each movie.
     #
-    firstDir = True
-    if (isCmdLineArg or args.isRecursive) and args.listDirContents :
-        dirList.sort()
-        for d in dirList :
-            if d[-1] == "/" :
-                d = d[:-1]
-            if args.prependPath == PATH_NOPREFIX :
-                if somethingWasPrinted or not firstDir :
-                    print()
-                firstDir = False
-                if args.isRecursive :
-                    print(traversedPath, d, ":", sep='')
-                else :
-                    print(d, ":", sep='')
+    movPrefix = ""
+    if args.prependPath != PATH_NOPREFIX :
+        movPrefix = displayPath(traversedPath)
 
-            if d[0] == "/" :
-                passedPath = d + "/"
+    if args.sortByMTime and args.globalSortByTime :
+        #
+        # Render the sequences into a run of records for main() to merge
+        # with those of all the other directories (see gSortRuns), then print
+        # nothing and continue below with any recursive descent or processing
+        # other directory contents.
+        #
+        # The sort key, newest first, then by traversedPath and name,
+        # reproduces how /bin/ls sorts entries with equal times. (See
+        # the notes in main().)
+        #
+        sortRun = []
+        for seq in seqTimes(dirScan, args) :
+            if not withinCutoffTime(seq[MTIME], args) :
+                continue
+            seqKey = seq[DICTKEY]
+            sortKey = (-seq[MTIME], traversedPath, seqKey.name)
+            if not beatsSortCutoff(sortKey, args) :
+                continue
+            if seqKey.category == LIST_MOVS :
+                movPath = traversedPath
+                if args.prependPath != PATH_NOPREFIX and seqKey.name[0] != '/' :
+                    movPath = displayPath(traversedPath)
+                warnings, output = renderSeq(printMovie,
+                    seqKey, movieDictionary[seqKey.name], movPath, args, traversedPath)
             else :
-                passedPath = traversedPath + d + "/"
+                frameList = seqDictionary[seqKey.category][seqKey.name]
+                frameList.sort()
+                warnings, output = renderSeq(printSeq, seqKey, frameList, args, traversedPath)
+            sortRun.append((sortKey, warnings, output))
+        addSortRun(sortRun, args)
 
-            # JPR - first check if we have permission for directory 'd'.
-            #
-            can_read = os.access(d, os.Sanitize_Flags if hasattr(os, 'Sanitize_Flags') else os.R_OK)
-            can_execute = os.access(d, os.X_OK)  # Required to enter/traverse a directory
-            if not (can_read and can_execute) :
-                if not args.silent :
-                    sys.stdout.flush()
-                    sys.stderr.flush()
-                    if passedPath[-1] == "/" :
-                        passedPath = passedPath[:-1]
-                    print(PROG_NAME, ": warning: can not descend into ",
-                        passedPath, ": permission denied.",
-                        sep='', file=sys.stderr)
-                    sys.stderr.flush()
-                gExitStatus = gExitStatus | EXIT_CD_PERMISSION_WARNING
-                continue
-            #
-            listSeqDir(stripDotFiles(os.listdir(d), args.ignoreDotFiles),
-                d, False, args, passedPath)
+    else :
+        for k in listedSeqs(dirScan, args) :
+            if k.category == LIST_MOVS :
+                printMovie(k, movieDictionary[k.name], movPrefix, args, traversedPath)
+            else :
+                frameList = seqDictionary[k.category][k.name]
+                frameList.sort()
+                printSeq(k, frameList, args, traversedPath)
+            somethingWasPrinted = True
 
-    os.chdir(tmpCWD) # Pop the stack of directories.
+    endOfDirectory()
+    return somethingWasPrinted
 
-def main() :
+# Returns whether 'path', when it is the only file on the command line,
+# is a directory that gets listed like the current directory would be,
+# i.e., with listTopDir() and without a title (/bin/ls behavior).
+#
+def isTopDir(path, args) :
+    return os.path.isdir(path) \
+        and (not os.path.islink(path) or deRefDirs(True, args)) \
+        and args.prependPath != PATH_ABS
+
+# Open the directory 'path' and list its contents with listSeqDir().
+# Used by listFiles() for the current directory, or for a single directory
+# listed on the command line. 'prefetchedScan', if given, is what
+# scanSubDir() already gathered of 'path'.
+#
+def listTopDir(path, args, passedPath, prefetchedScan=None) :
+    global gExitStatus
 
-    # Redefine the exception handling routine so that it does NOT
-    # do a trace dump if the user types ^C while lsseq is running.
+    dirFd = None
+    try :
+        dirFd = openDir(path, None)
+        if prefetchedScan == None :
+            prefetchedScan = (scanDir(dirFd, args), None)
+    except OSError as e :
+        if dirFd != None :
+            os.close(dirFd)
+        if not args.silent :
+            flushForWarning()
+            reason = descendFailure(e)
+            if isinstance(e, PermissionError) :
+                reason += ", exectute bit not set"
+            print(PROG_NAME, ": warning: can not descend into ",
+                os.getcwd(), "/", path, ": ", reason, ".",
+                sep='', file=sys.stderr)
+            sys.stderr.flush()
+        gExitStatus = gExitStatus | EXIT_CD_PERMISSION_WARNING
+        return
+
+    try :
+        listSeqDir(prefetchedScan[0], dirFd, path, False, args, passedPath,
+            prefetchedScan[1])
+    finally :
+        os.close(dirFd)
+
+# Where the time went, for --profile.
+#
+#    startTime - time.perf_counter() when profiling started.
+#         lock - Guards the rest, --jobs threads all adding to them.
+#       phases - Maps each phase (see PROFILE_PHASES) to the two-element
+#                list [calls, seconds].
+#        calls - Maps each call in PROFILE_CALLS to the number made.
+#      numDirs - The number of directories scanned.
+#   numEntries - The number of directory entries gathered.
+#  slowestDirs - Heap of (seconds, path) of the slowest directories
+#                to scan, at most PROFILE_SLOWEST_DIRS of them.
+#  traceEvents - The events for --profile-trace, or None.
+#
+class Profile :
+    def __init__(self) :
+        import threading
+        import time
+
+        self.startTime = time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = {phase : [0, 0.0] for phase, functionName, traced in PROFILE_PHASES}
+        self.calls = {name : 0 for name in PROFILE_CALLS}
+        self.numDirs = 0
+        self.numEntries = 0
+        self.slowestDirs = []
+        self.traceEvents = None
+
+    def addPhase(self, phase, startTime, endTime, traced, eventArgs=None) :
+        with self.lock :
+            phaseTotals = self.phases[phase]
+            phaseTotals[0] += 1
+            phaseTotals[1] += endTime - startTime
+            if traced and self.traceEvents != None :
+                import threading
+                event = {"name" : phase, "cat" : PROG_NAME, "ph" : "X",
+                    "ts" : (startTime - self.startTime) * 1e6,
+                    "dur" : (endTime - startTime) * 1e6,
+                    "pid" : os.getpid(), "tid" : threading.get_ident()}
+                if eventArgs != None :
+                    event["args"] = eventArgs
+                self.traceEvents.append(event)
+
+# Returns the path of the open directory 'dirFd', as best it can be
+# found, for --profile.
+#
+def dirFdPath(dirFd) :
+    try :
+        return os.readlink("/proc/self/fd/%d" % dirFd) # Linux
+    except OSError :
+        pass
+    try :
+        import fcntl
+        return os.fsdecode(fcntl.fcntl(dirFd, fcntl.F_GETPATH, bytes(1024)).rstrip(b"\0")) # macOS
+    except (ImportError, AttributeError, OSError) :
+        return "(directory fd " + str(dirFd) + ")"
+
+# Turn on --profile (see gProfile), swapping the functions listed in
+# PROFILE_PHASES for ones that time them.
+#
+def setupProfile(args) :
+    global gProfile
+    import heapq
+    import time
+
+    gProfile = Profile()
+    if args.profileTrace != None :
+        gProfile.traceEvents = []
+    if args.profileMemory :
+        import tracemalloc
+        tracemalloc.start()
+
+    moduleGlobals = globals()
+    def timePhase(phase, function, traced) :
+        def timedFunction(*functionArgs, **keywordArgs) :
+            startTime = time.perf_counter()
+            try :
+                return function(*functionArgs, **keywordArgs)
+            finally :
+                gProfile.addPhase(phase, startTime, time.perf_counter(), traced)
+        return timedFunction
+    for phase, functionName, traced in PROFILE_PHASES :
+        if phase != "scan" :
+            moduleGlobals[functionName] = timePhase(phase, moduleGlobals[functionName], traced)
+
+    # Scanning a directory is timed separately to note the slowest ones,
+    # and gathering directory contents to count the entries.
     #
-    old_excepthook = sys.excepthook
-    def new_hook(exceptionType, value, traceback) :
-        if exceptionType != KeyboardInterrupt and exceptionType != IOError :
-            old_excepthook(exceptionType, value, traceback)
+    scanDirFunction = moduleGlobals["scanDir"]
+    def timedScanDir(dirFd, args) :
+        startTime = time.perf_counter()
+        dirScan = scanDirFunction(dirFd, args)
+        endTime = time.perf_counter()
+        seconds = endTime - startTime
+        eventArgs = None
+        if gProfile.traceEvents != None :
+            eventArgs = {"dir" : dirFdPath(dirFd)}
+        gProfile.addPhase("scan", startTime, endTime, True, eventArgs)
+        with gProfile.lock :
+            gProfile.numDirs += 1
+            if len(gProfile.slowestDirs) < PROFILE_SLOWEST_DIRS :
+                heapq.heappush(gProfile.slowestDirs, (seconds, dirFdPath(dirFd)))
+            elif seconds > gProfile.slowestDirs[0][0] :
+                heapq.heapreplace(gProfile.slowestDirs, (seconds, dirFdPath(dirFd)))
+        return dirScan
+    moduleGlobals["scanDir"] = timedScanDir
+
+    gatherFunction = moduleGlobals["gatherDirContents"]
+    def countedGather(dirContents, *gatherArgs, **keywordArgs) :
+        with gProfile.lock :
+            gProfile.numEntries += len(dirContents)
+        return gatherFunction(dirContents, *gatherArgs, **keywordArgs)
+    moduleGlobals["gatherDirContents"] = countedGather
+
+    import atexit
+    atexit.register(writeProfile, args)
+
+# Count one more of the call 'name' (see PROFILE_CALLS) for --profile.
+#
+def profileCall(name) :
+    with gProfile.lock :
+        gProfile.calls[name] += 1
+
+# Write out the --profile report, to $LSSEQ_PROFILE if set, otherwise
+# to stderr, and the --profile-trace.
+#
+def writeProfile(args) :
+    import time
+
+    wallTime = time.perf_counter() - gProfile.startTime
+    perSecond = lambda n : n / wallTime if wallTime > 0 else 0.0
+
+    lines = [PROG_NAME + ": profile:",
+        "  wall time     %.3fs" % wallTime,
+        "  cpu time      %.3fs" % time.process_time(),
+        "  directories   %d (%.1f/s)" % (gProfile.numDirs, perSecond(gProfile.numDirs)),
+        "  entries       %d (%.1f/s)" % (gProfile.numEntries, perSecond(gProfile.numEntries)),
+        "  phase (inclusive)      calls    seconds"]
+    for phase, functionName, traced in PROFILE_PHASES :
+        calls, seconds = gProfile.phases[phase]
+        lines.append("    %-16s %10d %10.3f" % (phase, calls, seconds))
+    lines.append("  calls")
+    for name, calls in gProfile.calls.items() :
+        lines.append("    %-24s %10d" % (name, calls))
+    lines.append("  slowest directories")
+    for seconds, path in sorted(gProfile.slowestDirs, reverse=True) :
+        lines.append("    %10.3fs %s" % (seconds, path))
+    try :
+        import resource
+        maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin" : # Where it is in bytes, rather than kilobytes.
+            maxRss *= 1024
+        lines.append("  peak memory   %.1f MB resident" % (maxRss / (1<<20)))
+    except ImportError :
+        pass
+    if args.profileMemory :
+        import tracemalloc
+        lines.append("  peak memory   %.1f MB allocated by python (tracemalloc)"
+            % (tracemalloc.get_traced_memory()[1] / (1<<20)))
+    report = "\n".join(lines) + "\n"
+
+    reportPath = os.getenv("LSSEQ_PROFILE")
+    try :
+        if reportPath != None and reportPath != "" :
+            with open(reportPath, "w") as reportFile :
+                reportFile.write(report)
         else :
-            pass
-    sys.excepthook = new_hook
+            sys.stderr.write(report)
+            sys.stderr.flush()
+        if args.profileTrace != None :
+            import json
+            with open(args.profileTrace, "w") as traceFile :
+                json.dump({"traceEvents" : gProfile.traceEvents, "displayTimeUnit" : "ms"}, traceFile)
+    except OSError as e :
+        print(PROG_NAME, ": warning: can't write profile: ", e, sep='', file=sys.stderr)
+
+# Returns the width of the terminal the same way shutil.get_terminal_size()
+# does, from $COLUMNS if set, but without importing shutil, which takes
+# longer than listing a small directory does.
+#
+def terminalColumns() :
+    try :
+        columns = int(os.environ["COLUMNS"])
+    except (KeyError, ValueError) :
+        columns = 0
+    if columns <= 0 :
+        try :
+            columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError) :
+            columns = 0
+    if columns <= 0 :
+        columns = 80
+    return columns
+
+# The defaults of lsseq's options, a copy of those makeParser() sets
+# (which tests/test_parse_args.py checks), and its single-letter options
+# that only set one of them (or add to it, for those that are lists) as
+# {letter : (dest, const)}, for parseArgs().
+#
+OPTION_DEFAULTS = {
+    "silent" : False,
+    "lineBuffered" : False,
+    "cacheDir" : None,
+    "cacheSize" : 256,
+    "profile" : False,
+    "profileTrace" : None,
+    "profileMemory" : False,
+    "daemon" : False,
+    "daemonSocket" : None,
+    "useDaemon" : True,
+    "batch" : False,
+    "batchNull" : False,
+    "batchEnd" : None,
+    "manifestFile" : None,
+    "end_of_options" : False,
+    "splitSeq" : False,
+    "showZero" : True,
+    "strictSeparator" : True,
+    "showMissing" : True,
+    "showBad" : False,
+    "goodFrameMinSize" : 512,
+    "showBadPadding" : True,
+    "combineErrorFrames" : False,
+    "no_error_lists" : None,
+    "printImgExtensions" : False,
+    "listWhichFiles" : [ARG_LIST_ALLFILES],
+    "seqFormat" : "native",
+    "prependPath" : PATH_NOPREFIX,
+    "extremes" : False,
+    "longListing" : False,
+    "humanReadable" : False,
+    "isRecursive" : False,
+    "jobs" : None,
+    "reverseListing" : False,
+    "sortByMTime" : False,
+    "timeCompare" : "newest",
+    "globalSortByTime" : False,
+    "globalSortMemory" : 256,
+    "limit" : None,
+    "cutoffTime" : None,
+    "deRef" : [ARG_LIST_DEREF_ALL_CMDLINE],
+    "byWhat" : BY_UNSPECIFIED,
+    "ignoreDotFiles" : True,
+    "listDirContents" : True,
+    "classify" : False,
+    "useLs" : False,
+}
+QUICK_OPTIONS = {
+    "0" : ("batchNull", True),
+    "s" : ("strictSeparator", True),
+    "l" : ("strictSeparator", False),
+    "m" : ("showMissing", True),
+    "M" : ("showMissing", False),
+    "z" : ("showZero", True),
+    "Z" : ("showZero", False),
+    "b" : ("showBad", True),
+    "B" : ("showBad", False),
+    "c" : ("combineErrorFrames", True),
+    "i" : ("printImgExtensions", True),
+    "o" : ("listWhichFiles", ARG_LIST_ONLYSEQS),
+    "O" : ("listWhichFiles", ARG_LIST_ONLYIMGS),
+    "p" : ("prependPath", PATH_ABS),
+    "P" : ("prependPath", PATH_REL),
+    "e" : ("extremes", True),
+    "R" : ("isRecursive", True),
+    "r" : ("reverseListing", True),
+    "t" : ("sortByMTime", True),
+    "G" : ("globalSortByTime", True),
+    "H" : ("deRef", ARG_LIST_DEREF_ALL_CMDLINE),
+    "L" : ("deRef", ARG_LIST_DEREF_ALL),
+    "1" : ("byWhat", BY_SINGLE),
+    "a" : ("ignoreDotFiles", False),
+    "C" : ("byWhat", BY_COLUMNS),
+    "x" : ("byWhat", BY_ROWS),
+    "d" : ("listDirContents", False),
+    "F" : ("classify", True),
+}
+
+# The options parsed by parseArgs() without makeParser(), in place of
+# an argparse.Namespace.
+#
+class Options :
+    pass
+
+# Returns the options on the command line 'argv'. The usual command
+# lines, some QUICK_OPTIONS (on their own or run together, like "-1R")
+# followed by some FILEs, are parsed here, and the rest by the parser
+# from makeParser(), as importing argparse and building the parser
+# takes longer than listing a small directory does.
+#
+def parseArgs(argv) :
+    options = {dest : list(default) if isinstance(default, list) else default
+        for dest, default in OPTION_DEFAULTS.items()}
+    files = []
+    for arg in argv :
+        if not arg.startswith("-") :
+            files.append(arg)
+        elif len(files) > 0 or len(arg) < 2 or any(c not in QUICK_OPTIONS for c in arg[1:]) :
+            return makeParser().parse_args(argv)
+        else :
+            for c in arg[1:] :
+                dest, const = QUICK_OPTIONS[c]
+                if isinstance(options[dest], list) :
+                    options[dest].append(const)
+                else :
+                    options[dest] = const
 
-    # These global variables might be changed below depending on
-    # whether some environment variables are set.
+    args = Options()
+    for dest, value in options.items() :
+        setattr(args, dest, value)
+    args.files = files
+    return args
+
+# Returns the command line parser of lsseq, also used to settle the
+# options given to scan(), for which 'forCommandLine' is False to leave
+# out --help and --version (which print, then exit).
+#
+# Note: an option added here must also have its default added to
+# OPTION_DEFAULTS, for parseArgs() (and to QUICK_OPTIONS if it's a
+# single letter that only sets its dest).
+#
+def makeParser(forCommandLine=True) :
+    import argparse
+    import re
+
+    # argparse.RawDescriptionHelpFormatter with its width from
+    # terminalColumns(). argparse makes a formatter for every option
+    # added to the parser, and the one it comes with imports shutil to
+    # find out the width each time.
     #
-    global gImageExtList
-    global gMovieExtList
-    global gCacheExtList
-    global gExitStatus
-    global gListWhichFiles
-    global gDeRefWhichFiles
+    class HelpFormatter(argparse.RawDescriptionHelpFormatter) :
+        def __init__(self, prog, width=None, **keywordArgs) :
+            if width == None :
+                width = terminalColumns() - 2
+            super().__init__(prog, width=width, **keywordArgs)
 
     # To help with argparse.
     #
@@ -1710,10 +4033,14 @@ def main() :
     def store_false_multiple(*destinations) :
         return store_const_multiple(False, *destinations)
 
+    # Note: the description is indented to line up with the code below,
+    # re.sub() takes that back out (the same as textwrap.dedent() would
+    # but without importing textwrap, see the imports at the top).
+    #
     p = argparse.ArgumentParser(
         prog=PROG_NAME,
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        description=textwrap.dedent('''\
+        formatter_class=HelpFormatter,
+        description=re.sub("(?m)^ {12}", "", '''\
             List directory contents like /bin/ls (see LS(1)) except condense
             image sequences to one entry each. Filenames that are part of image
             sequences are assumed to be of the form:
@@ -1736,11 +4063,98 @@ def main() :
         add_help=False)
 
     group = p.add_argument_group('miscellaneous options')
-    group.add_argument('--help', '-h', action='help', help='show this help message and exit')
-    group.add_argument("--version", action="version", version=VERSION)
+    if forCommandLine :
+        group.add_argument('--help', '-h', action='help', help='show this help message and exit')
+        group.add_argument("--version", action="version", version=VERSION)
     group.add_argument("--silent", "--quiet", action="store_true",
         dest="silent", default=False,
         help="suppress error and warning messages.")
+    group.add_argument("--line-buffered", action="store_true",
+        dest="lineBuffered", default=False,
+        help="write out each line of the listing as soon as it is \
+        ready, even when the output is not a terminal. By default the \
+        listing is written out in large chunks unless it is going \
+        to a terminal.")
+    group.add_argument("--cache", action="store", type=str,
+        dest="cacheDir", default=None, metavar="DIR",
+        help="remember what was found in each directory in the directory \
+        DIR, so that listing a directory again, while nothing has been added \
+        to, removed from or renamed in it, skips reading it. The sizes and \
+        times of files are still looked up when needed, e.g. for -z, -b or \
+        -t. [default: $LSSEQ_CACHE if set, otherwise no cache]")
+    group.add_argument("--cache-size", action="store", type=readMegabytes,
+        dest="cacheSize", default=256, metavar="MB",
+        help="the most disk space, in megabytes, for --cache to take up, \
+        the directories listed least recently being forgotten first. \
+        [default: 256]")
+    group.add_argument("--profile", action="store_true",
+        dest="profile", default=False,
+        help="when done, report where the time went: how long was spent \
+        reading directories, stat'ing files, sorting out sequences, \
+        printing and so on, how many times files were stat'ed, the number \
+        of directories and entries read per second, the slowest \
+        directories and the peak memory use. The report goes to stderr, \
+        or to the file $LSSEQ_PROFILE if set (which also turns on \
+        --profile).")
+    group.add_argument("--profile-trace", action="store", type=str,
+        dest="profileTrace", default=None, metavar="FILE",
+        help="with --profile, also write each directory scanned, and the \
+        other phases of the work, to FILE as Chrome trace events (see \
+        chrome://tracing or https://ui.perfetto.dev).")
+    group.add_argument("--profile-memory", action="store_true",
+        dest="profileMemory", default=False,
+        help="with --profile, also report the peak memory allocated by \
+        python, as traced by tracemalloc, which slows lsseq down.")
+    group.add_argument("--daemon", action="store_true",
+        dest="daemon", default=False,
+        help="(Linux only) instead of listing anything, keep running, \
+        watching the directories given (or the current directory) and \
+        all the directories below them for changes. Other lsseq commands \
+        then get the contents of those directories from the daemon rather \
+        than reading them, which is much quicker for large or remote \
+        directories.")
+    group.add_argument("--daemon-socket", action="store", type=str,
+        dest="daemonSocket", default=None, metavar="PATH",
+        help="the Unix domain socket for the --daemon to listen on, and \
+        other lsseq commands to look for it on. [default: \
+        $LSSEQ_DAEMON_SOCKET if set, otherwise $XDG_RUNTIME_DIR/lsseq.sock \
+        or /tmp/lsseq-UID.sock]")
+    group.add_argument("--no-daemon", action="store_false",
+        dest="useDaemon", default=True,
+        help="read the directories even if a --daemon is running.")
+    group.add_argument("--batch", action="store_true",
+        dest="batch", default=False,
+        help="read the files and directories to list from stdin, one per \
+        line, and list each of them in turn just as 'lsseq [OPTION]... FILE' \
+        would, so that starting lsseq up is only paid for once. With --jobs \
+        greater than one (the default for --batch) the next few are read \
+        while the current one is being listed. The exit status is that of \
+        all of them put together.")
+    group.add_argument("-0", "--null", action="store_true",
+        dest="batchNull", default=False,
+        help="with --batch or --from-manifest, each path is ended by a NUL \
+        character rather than a newline, as written by 'find -print0'.")
+    group.add_argument("--batch-end", action="store", type=str,
+        dest="batchEnd", default=None, metavar="FORMAT",
+        help="with --batch, print the line FORMAT after the listing of each \
+        path, with {path} replaced by the path and {status} by the exit \
+        status that listing it alone would have had, e.g. \
+        --batch-end '=== {status} {path}'.")
+    group.add_argument("--from-manifest", action="store", type=argparse.FileType('rb'),
+        dest="manifestFile", default=None, metavar="FILE",
+        help="instead of reading any directories, list the files named in \
+        FILE (or stdin if -), one per line, grouped by directory, without \
+        looking at the files themselves, e.g. for archived files or \
+        object-storage listings. A line may also give the size and mtime \
+        of the file, as 'find -printf \"%%s\\t%%T@\\t%%p\\n\"' writes them, \
+        for -z, -b, -t, --only-show and --long to go on (without them, \
+        which the first line decides, these are left out). A directory is \
+        listed as soon as a line from outside of it comes along, lines of \
+        its subdirectories aside, so each directory is listed after its \
+        subdirectories (like 'find -depth') and only the directories above \
+        the current one are held in memory. The lines of a directory need \
+        to be together, as in the output of 'find' or 'sort', otherwise it \
+        is listed again (with a warning) each time it comes up.")
     group.add_argument('--', dest='end_of_options', action='store_true', 
         help='end of options, all subsequent arguments are positional arguments.')
 
@@ -1859,17 +4273,20 @@ def main() :
 
     group = p.add_argument_group('sequence display-modifiers')
     group.add_argument("--format", "-f", action="store", type=str,
-        choices=("native", "nuke", "rv", "shake", "glob", "mplay", "houdini"),
+        choices=("native", "nuke", "rv", "shake", "glob", "mplay", "houdini", "json", "ndjson"),
         dest="seqFormat",
         metavar="FORMAT",
         default="native",
         help="list image sequences in various formats.\
         The choices are 'native' (default), 'nuke', 'rv', 'shake', 'glob', \
-        'mplay', and 'houdini'.\
+        'mplay', 'houdini', 'json' and 'ndjson'.\
         Note that glob prints correct results only if \
         the frame numbers are padded. Further note that reporting of \
         missing/zero/bad/etc. frames (e.g. --show-missing) only happens \
-        with 'native' format.")
+        with 'native', 'json' and 'ndjson' formats. 'ndjson' lists every \
+        sequence, movie and other file as a JSON object on a line of its \
+        own, with the frame ranges as lists of [start, end] pairs, and \
+        'json' makes a JSON array of those same objects.")
     group.add_argument("--prepend-path-abs", "-p", action="store_const",
         dest="prependPath", default=PATH_NOPREFIX, const=PATH_ABS,
         help="prepend the absolute path name to the image name. \
@@ -1888,11 +4305,30 @@ def main() :
         or cache-sequence on a separate line each. \
         This option implies --prepend-path-abs (unless --prepend-path-rel is \
         explicitly specified) as well as --only-sequences and --not-movies.")
+    group.add_argument("--long", action="store_true",
+        dest="longListing", default=False,
+        help="(native format only) precede each sequence and movie with \
+        the number of frames, the total size of the frames, the disk space \
+        they take up, the sizes of the smallest and largest frames and \
+        the modification times of the oldest and newest frames. \
+        Sizes are in bytes, frames hard-linked to each other only \
+        taking up disk space once. Other files are listed as usual.")
+    group.add_argument("--human-readable", action="store_true",
+        dest="humanReadable", default=False,
+        help="with --long, print sizes like 1.5K, 234M and 2.0G. (see LS(1))")
 
     group = p.add_argument_group('sequence sorting and display')
     group.add_argument("--recursive", "-R", action="store_true",
         dest="isRecursive", default=False,
         help="list subdirectories recursively.")
+    group.add_argument("--jobs", action="store", type=readNumJobs,
+        dest="jobs", default=None, metavar="N",
+        help="read up to N directories at once (reading ahead of what has \
+        been printed so far) when listing recursively or listing more than \
+        one file or directory. The output is the same regardless of N, but \
+        listing large directory trees on network file systems can be much \
+        faster. [default: 8 with more than one file or directory on the \
+        command line, otherwise 1]")
     group.add_argument("--reverse", "-r", action="store_true",
         dest="reverseListing", default=False,
         help="reverse order while sorting.")
@@ -1915,6 +4351,17 @@ def main() :
         sequences by time compared to each other, as opposed to only sorting \
         sequences by time within their common directory. If the above conditions \
         are NOT met, then this option is simply ignored.")
+    group.add_argument("--global-sort-memory", action="store", type=readMegabytes,
+        dest="globalSortMemory", default=256, metavar="MB",
+        help="the most memory, in megabytes, to use holding on to the listing \
+        for --global-sort-by-time, beyond which it is kept in temporary files \
+        instead. [default: 256]")
+    group.add_argument("--limit", action="store", type=readNumJobs,
+        dest="limit", default=None, metavar="N",
+        help="list no more than N sequences from each directory, or N \
+        sequences altogether with --global-sort-by-time. Along with \
+        --sort-by-time these are the N newest (or oldest with --reverse) \
+        according to --time.")
     group.add_argument("--only-show", action="store", type=str, nargs=2,
         dest="cutoffTime",
         help="where TENSE is either 'before' or 'since'; only list sequences \
@@ -2006,84 +4453,63 @@ def main() :
             do not follow symbolic links to directories. (see LS(1) \
             for the meanings of the symbols.) Note: the '@' will also be \
             appended to any sequences made up of symbolic links.")
+    group.add_argument("--use-ls", action="store_true",
+        dest="useLs", default=False,
+        help="run LS(1) to list non-sequence entries instead of \
+            using lsseq's built-in LS(1) compatible formatting")
 
     p.add_argument("files", metavar="FILE", nargs="*",
         help="file names")
 
-    args = p.parse_args()
+    return p
 
-    # Grab environment variables if they exist and clean them
-    # up if they contain gargage..
-    #
-    tmpExt = os.getenv("LSSEQ_IMAGE_EXTENSION")
-    tmpOICExt = os.getenv("OIC_IMAGE_EXTENSION")
-    if tmpExt != None and tmpExt != "" :
-        tmpExtList = tmpExt.split(":")
-    elif tmpOICExt != None and tmpOICExt != "" :
-        tmpExtList = tmpOICExt.split(":")
-    else :
-        tmpExtList = gImageExtList
-    #
-    # Using a set below removes duplicates if they exist.
-    #
-    # Also: Use of lower() allows us to ignore case of file extensions.
-    # We store our list entries below as lowercase, then compare file
-    # extenstions (that have been converted to lowercase) against
-    # these lists.
-    #
-    tmpExtSet = set([])
-    for e in tmpExtList :
-        tmpExtSet.add(e.lower())
-    tmpExtList = sorted(tmpExtSet)
-    gImageExtList = copy.deepcopy(tmpExtList)
-
-    tmpExt = os.getenv("LSSEQ_MOV_EXTENSION")
-    tmpOICExt = os.getenv("OIC_MOV_EXTENSION")
-    if tmpExt != None and tmpExt != "" :
-        tmpExtList = tmpExt.split(":")
-    elif tmpOICExt != None and tmpOICExt != "" :
-        tmpExtList = tmpOICExt.split(":")
-    else :
-        tmpExtList = gMovieExtList
-    # Using a set like this removes duplicates if they exist.
-    tmpExtSet = set([])
-    for e in tmpExtList :
-        tmpExtSet.add(e.lower())
-    tmpExtList = sorted(tmpExtSet)
-    gMovieExtList = copy.deepcopy(tmpExtList)
-
-    tmpExt = os.getenv("LSSEQ_CACHE_EXTENSION")
-    tmpOICExt = os.getenv("OIC_CACHE_EXTENSION")
-    if tmpExt != None and tmpExt != "" :
-        tmpExtList = tmpExt.split(":")
-    elif tmpOICExt != None and tmpOICExt != "" :
-        tmpExtList = tmpOICExt.split(":")
-    else :
-        tmpExtList = gCacheExtList
-    # Using a set like this removes duplicates if they exist.
-    tmpExtSet = set([])
-    for e in tmpExtList :
-        tmpExtSet.add(e.lower())
-    tmpExtList = sorted(tmpExtSet)
-    gCacheExtList = copy.deepcopy(tmpExtList)
+# Set up the lists of image, movie and cache extensions (and from
+# them gExtCategories), from the environment variables if they are set.
+#
+# Returns the list of extensions in the environment variable 'envVar'
+# (or failing that the older 'oicEnvVar') if set, otherwise the list
+# 'defaultList'.
+#
+# Using a set removes duplicates if they exist.
+#
+# Also: Use of lower() allows us to ignore case of file extensions.
+# We store our list entries below as lowercase, then compare file
+# extenstions (that have been converted to lowercase) against
+# these lists.
+#
+def envExtList(envVar, oicEnvVar, defaultList) :
+    extList = defaultList
+    for var in (envVar, oicEnvVar) :
+        envValue = os.getenv(var)
+        if envValue != None and envValue != "" :
+            extList = envValue.split(":")
+            break
+    return sorted(set(e.lower() for e in extList))
+
+def setupExtensions() :
+    global gImageExtList
+    global gMovieExtList
+    global gCacheExtList
+    global gExtCategories
 
-    #
-    # Respond to arguments set by user and/or set up variables
-    # etc. needed later based on the user's arguments.
-    #
+    gImageExtList = envExtList("LSSEQ_IMAGE_EXTENSION", "OIC_IMAGE_EXTENSION", gImageExtList)
+    gMovieExtList = envExtList("LSSEQ_MOV_EXTENSION", "OIC_MOV_EXTENSION", gMovieExtList)
+    gCacheExtList = envExtList("LSSEQ_CACHE_EXTENSION", "OIC_CACHE_EXTENSION", gCacheExtList)
+    gExtCategories = makeExtCategories()
 
-    if args.printImgExtensions :
-        print(PROG_NAME,
-            ": Modify the following environment variables to extend the supported file types.", sep='')
-        print("       NOTE: ", PROG_NAME,
-            " also recognizes the following extensions when uppercase.", sep='')
-        extList = ":".join(gImageExtList)
-        print("  export LSSEQ_IMAGE_EXTENSION=", extList, sep='')
-        extList = ":".join(gMovieExtList)
-        print("  export LSSEQ_MOV_EXTENSION=", extList, sep='')
-        extList = ":".join(gCacheExtList)
-        print("  export LSSEQ_CACHE_EXTENSION=", extList, sep='')
-        sys.exit(EXIT_NO_ERROR)
+# Work out everything that follows from the options 'args' (as parsed
+# by makeParser()) once they have all been given, adding
+#
+#      listFlags - Which files to list, LIST_* bits (see LIST_NO_OMISSIONS).
+#     deRefFlags - Which sym-links to follow, DEREF_* bits (see DEREF_DEFAULT).
+#       statPlan - What to stat() for each category (see makeStatPlan()).
+#
+# Raises ValueError, with a message worded like argparse's, for option
+# values argparse itself can't check.
+#
+def settleOptions(args) :
+    listWhichFiles = LIST_NO_OMISSIONS # Default behaviour
+    deRefWhichFiles = DEREF_DEFAULT
 
     # logic for setting the bit-wise sequences and files to list
     # here before any other arg processing since other options might
@@ -2091,58 +4517,58 @@ def main() :
     #
     for listOpts in args.listWhichFiles:
         if   listOpts == ARG_LIST_ALLFILES :   # default will ALWAYS appear first (at least)
-            gListWhichFiles = LIST_NO_OMISSIONS
+            listWhichFiles = LIST_NO_OMISSIONS
 
         elif listOpts == ARG_LIST_ONLYIMGS :   # Reset so only image sequences are listed
-            gListWhichFiles = LIST_IMGS
+            listWhichFiles = LIST_IMGS
 
         elif listOpts == ARG_LIST_ONLYMOVS :   # Reset so only movie sequences are listed
-            gListWhichFiles = LIST_MOVS
+            listWhichFiles = LIST_MOVS
 
         elif listOpts == ARG_LIST_ONLYCACHES : # Reset so only cache sequences are listed
-            gListWhichFiles = LIST_CACHES
+            listWhichFiles = LIST_CACHES
 
         elif listOpts == ARG_LIST_ONLYSEQS :   # Removes listing /bin/ls output
-            gListWhichFiles = (gListWhichFiles & LIST_NOT_OTHER)
+            listWhichFiles = (listWhichFiles & LIST_NOT_OTHER)
 
         elif listOpts == ARG_LIST_NOT_IMGS :   # Removes treating images files as sequences.
-            gListWhichFiles = (gListWhichFiles & LIST_NOT_IMGS)
+            listWhichFiles = (listWhichFiles & LIST_NOT_IMGS)
 
         elif listOpts == ARG_LIST_NOT_MOVS :   # Removes treating movies as sequences.
-            gListWhichFiles = (gListWhichFiles & LIST_NOT_MOVS)
+            listWhichFiles = (listWhichFiles & LIST_NOT_MOVS)
 
         elif listOpts == ARG_LIST_NOT_CACHES : # Removes treating cache files as sequences.
-            gListWhichFiles = (gListWhichFiles & LIST_NOT_CACHES)
+            listWhichFiles = (listWhichFiles & LIST_NOT_CACHES)
 
     # logic for setting the bit-wise values to dereference files and/or dirs
     #
     for listOpts in args.deRef:
         if   listOpts == ARG_LIST_DEREF_ALL_CMDLINE : # default will ALWAYS appear first (at least)
-            gDeRefWhichFiles = DEREF_CMD_LINE | DEREF_DIRS | DEREF_FILES # Bitwise "OR"
+            deRefWhichFiles = DEREF_CMD_LINE | DEREF_DIRS | DEREF_FILES # Bitwise "OR"
 
         elif listOpts == ARG_LIST_DEREF_ALL:
-            gDeRefWhichFiles = DEREF_ALL | DEREF_CMD_LINE | DEREF_DIRS | DEREF_FILES
+            deRefWhichFiles = DEREF_ALL | DEREF_CMD_LINE | DEREF_DIRS | DEREF_FILES
 
         elif listOpts == ARG_LIST_NO_DEREF_ALL:
-            gDeRefWhichFiles = DEREF_NONE
+            deRefWhichFiles = DEREF_NONE
 
         elif listOpts == ARG_LIST_DEREF_DIR_CMDLINE:
-            gDeRefWhichFiles = DEREF_CMD_LINE | DEREF_DIRS
+            deRefWhichFiles = DEREF_CMD_LINE | DEREF_DIRS
 
         elif listOpts == ARG_LIST_DEREF_DIR:
-            gDeRefWhichFiles = DEREF_ALL | DEREF_CMD_LINE | DEREF_DIRS
+            deRefWhichFiles = DEREF_ALL | DEREF_CMD_LINE | DEREF_DIRS
 
         elif listOpts == ARG_LIST_NO_DEREF_DIR:
-            gDeRefWhichFiles = (gListWhichFiles & (0b1111 ^ DEREF_DIRS))
+            deRefWhichFiles = (listWhichFiles & (0b1111 ^ DEREF_DIRS))
 
         elif listOpts == ARG_LIST_DEREF_FILE_CMDLINE:
-            gDeRefWhichFiles = DEREF_CMD_LINE | DEREF_FILES
+            deRefWhichFiles = DEREF_CMD_LINE | DEREF_FILES
 
         elif listOpts == ARG_LIST_DEREF_FILE:
-            gDeRefWhichFiles = DEREF_ALL | DEREF_CMD_LINE | DEREF_FILES
+            deRefWhichFiles = DEREF_ALL | DEREF_CMD_LINE | DEREF_FILES
 
         elif listOpts == ARG_LIST_NO_DEREF_FILE:
-            gDeRefWhichFiles = (gListWhichFiles & (0b1111 ^ DEREF_FILES))
+            deRefWhichFiles = (listWhichFiles & (0b1111 ^ DEREF_FILES))
 
     # We do not want to follow symbolic links to directories if
     # --classify/-F or --directory/-d invoked on the command line.
@@ -2155,10 +4581,10 @@ def main() :
     if args.classify or not args.listDirContents :
         # Following logic turns off dereferencing directories.
         #
-        gDeRefWhichFiles = (gDeRefWhichFiles & (DEREF_DIRS ^ 0b1111))
+        deRefWhichFiles = (deRefWhichFiles & (DEREF_DIRS ^ 0b1111))
 
     if args.prependPath == PATH_REL or args.prependPath == PATH_ABS :
-        gListWhichFiles = (gListWhichFiles & LIST_NOT_OTHER)
+        listWhichFiles = (listWhichFiles & LIST_NOT_OTHER)
 
     if args.extremes :
         if args.prependPath == PATH_NOPREFIX :
@@ -2171,7 +4597,22 @@ def main() :
         #
         # Strictly list only images and/or caches.
         #
-        gListWhichFiles = gListWhichFiles & (LIST_IMGS | LIST_CACHES)
+        listWhichFiles = listWhichFiles & (LIST_IMGS | LIST_CACHES)
+
+    # JSON records say which directory each file is in, so the directory
+    # titles are left out like with --prepend-path-rel (but without
+    # leaving out the non-sequences).
+    #
+    if args.seqFormat in JSON_FORMATS :
+        if args.prependPath == PATH_NOPREFIX :
+            args.prependPath = PATH_REL
+        args.useLs = False
+
+    # --long only makes sense for the native format's one line per
+    # sequence (the JSON records have the sizes and times anyway).
+    #
+    if args.seqFormat != 'native' or args.extremes :
+        args.longListing = False
 
     if args.cutoffTime != None :
 
@@ -2179,11 +4620,7 @@ def main() :
         #
         args.cutoffTime[0] = args.cutoffTime[0].lower()
         if (args.cutoffTime[0] != 'before') and (args.cutoffTime[0] != 'since') :
-            if not args.silent :
-                print(PROG_NAME,
-                    ": error: argument --only-show: TENSE must be 'since' or 'before'",
-                    file=sys.stderr, sep='')
-            sys.exit(gExitStatus | EXIT_ARGPARSE_ERROR) # Doing our own 'argparse' checks here.
+            raise ValueError("argument --only-show: TENSE must be 'since' or 'before'")
 
         from datetime import datetime
 
@@ -2219,11 +4656,8 @@ def main() :
                 continue
 
         if not matchedDate :
-            if not args.silent :
-                print(PROG_NAME,
-                    ": error: argument --only-show: the time must be of the form [CC]YYMMDD[-hh[mm[ss]]]",
-                    file=sys.stderr, sep='')
-            sys.exit(gExitStatus | EXIT_ARGPARSE_ERROR)
+            raise ValueError(
+                "argument --only-show: the time must be of the form [CC]YYMMDD[-hh[mm[ss]]]")
 
         import time
         args.cutoffTime[1] = int(time.mktime(timeData.timetuple())) # Epoch time
@@ -2241,20 +4675,369 @@ def main() :
         else :
             args.sortByMTime = True # Needed to engage code to capture times
 
+    # --from-manifest lists the files named in a file instead, which
+    # 'ls' can't be run on as they might not be there.
+    #
+    if args.manifestFile != None :
+        if len(args.files) > 0 :
+            raise ValueError("argument --from-manifest: not allowed with FILE arguments")
+        if args.batch or args.daemon :
+            raise ValueError("argument --from-manifest: not allowed with argument --batch or --daemon")
+        args.useLs = False
+
+    # --batch takes the paths to list from stdin instead.
+    #
+    if args.batch :
+        if len(args.files) > 0 :
+            raise ValueError("argument --batch: not allowed with FILE arguments")
+        if args.daemon :
+            raise ValueError("argument --batch: not allowed with argument --daemon")
+        if args.batchEnd != None :
+            try :
+                args.batchEnd.format(path="", status=EXIT_NO_ERROR)
+            except (KeyError, IndexError, ValueError, AttributeError, TypeError) :
+                raise ValueError("argument --batch-end: FORMAT may only contain {path} and {status}")
+
+    # Now that all the options have been settled, work out what
+    # needs to be stat'ed when scanning directories.
+    #
+    args.listFlags = listWhichFiles
+    args.deRefFlags = deRefWhichFiles
+    args.statPlan = makeStatPlan(args)
+
+# Returns the record (like those of JSON_FORMATS) of a warning from
+# scan(), with the EXIT_* bit 'exitStatusBit' the command line would
+# have added to its exit status.
+#
+def warningRecord(message, exitStatusBit) :
+    return { "type" : "warning", "message" : message, "status" : exitStatusBit }
+
+# The generator behind scan(), yielding the records of 'dirScan' and
+# then, recursively, of its subdirectories, as walked through by
+# walkDirs() (see there for the arguments).
+#
+def scanRecords(dirScan, dirFd, isCmdLineArg, args, traversedPath) :
+    for walked in walkDirs(dirScan, dirFd, ".", isCmdLineArg, args, traversedPath) :
+        if walked[0] == WALK_DIR :
+            yield from dirRecords(walked[1], args, walked[3])
+        elif walked[0] == WALK_WARNING :
+            yield warningRecord(walked[1], walked[2])
+
+# The records of the contents (but not the subdirectories) of 'dirScan'
+# for scanRecords().
+#
+def dirRecords(dirScan, args, traversedPath) :
+    for warning in dirScan.warnings :
+        yield warningRecord(warning[0], warning[1])
+    for filename, errorMessage in sorted(dirScan.otherErrors) :
+        yield warningRecord("cannot access '" + filename + "': " + errorMessage, EXIT_LS_WARNING)
+
+    for f in sortOtherFiles(dirScan.otherFiles, dirScan.otherStats, args) :
+        yield otherRecord(f, traversedPath)
+
+    for k in listedSeqs(dirScan, args) :
+        if k.category == LIST_MOVS :
+            yield movieRecord(k, dirScan.movieDictionary[k.name], traversedPath,
+                args.statPlan[LIST_MOVS])
+            continue
+        if k.category == LIST_CACHES :
+            frameList = dirScan.cacheDictionary[k.name]
+        else :
+            frameList = dirScan.imageDictionary[k.name]
+        frameList.sort()
+        seqFrames = inspectSeq(k, frameList, args, traversedPath)
+        for warning in seqFrames.warnings :
+            yield warningRecord(warning[0], warning[1])
+        yield from seqRecords(k, frameList, seqFrames, traversedPath, args.statPlan[k.category])
+
+# The generator behind scan() for the current directory, like
+# listTopDir().
+#
+def scanTopDir(args, passedPath) :
+    if not args.listDirContents :
+        yield otherRecord(".", "")
+        return
+
+    dirFd = None
+    try :
+        dirFd = openDir(".", None)
+        dirScan = scanDir(dirFd, args)
+    except OSError as e :
+        if dirFd != None :
+            os.close(dirFd)
+        yield warningRecord("can not descend into " + os.getcwd() + ": " + descendFailure(e) + ".",
+            EXIT_CD_PERMISSION_WARNING)
+        return
+
+    try :
+        yield from scanRecords(dirScan, dirFd, False, args, passedPath)
+    finally :
+        os.close(dirFd)
+
+# Scan the files and directories 'paths' (the current directory if there
+# are none) like the command line would list them. Returns a generator
+# (see scanRecords()) yielding a dictionary
+# for each sequence, movie and other file found, the same as the records
+# of --format json, or for each warning (see warningRecord()).
+#
+# The keyword 'options' are the command line's long options, with "_" for
+# "-", and True for an option without arguments. For example,
+#
+#     for record in lsseq.scan(["shots"], recursive=True, only_images=True,
+#             only_show=("since", "240101")) :
+#         ...
+#
+# Raises ValueError if the options are no good, or are --help or
+# --version. The options that only affect how the command line prints
+# its listing, and the --cache, --daemon and --jobs, are ignored.
+#
+# Nothing but the extensions (see setupExtensions()) is shared between
+# scans, so any number can run at once, in any number of threads.
+#
+def scan(paths=(), **options) :
+    if isinstance(paths, str) :
+        paths = [paths]
+
+    argv = []
+    for option, value in options.items() :
+        flag = "--" + option.replace("_", "-")
+        if value is True :
+            argv.append(flag)
+        elif value is False or value is None :
+            continue
+        elif isinstance(value, (list, tuple)) :
+            argv.append(flag)
+            argv.extend(str(v) for v in value)
+        else :
+            argv.extend((flag, str(value)))
+
+    def parseError(message) :
+        raise ValueError(message)
+
+    p = makeParser(forCommandLine=False)
+    p.error = parseError
+    args = p.parse_args(argv + ["--"] + list(paths))
+
+    args.seqFormat = "json"
+    args.extremes = False
+    args.globalSortByTime = False
+    settleOptions(args)
+
+    # Setting up the extensions again in another thread, meanwhile,
+    # comes to the same thing.
+    #
+    if len(gExtCategories) == 0 :
+        setupExtensions()
+
+    passedPath = ""
+    if args.prependPath == PATH_ABS :
+        passedPath = os.getcwd() + "/"
+    if len(args.files) == 0 :
+        return scanTopDir(args, passedPath)
+    return scanRecords(gatherDirContents([CmdLineEntry(f) for f in args.files], True, args),
+        None, True, args, passedPath)
+
+# The file type given to the files of a --from-manifest.
+#
+MANIFEST_FILE_MODE = stat.S_IFREG | 0o644
+
+# List the files named in args.manifestFile (see --from-manifest) by
+# directory without any system calls per file. Each line (or NUL-ended
+# record with -0) is a path, or
+#
+#     <size>\t<mtime>\t<path>
+#
+# as written by find -printf '%s\t%T@\t%p\n', the size and mtime
+# standing in for what lstat() would have returned (the disk usage for
+# --long being the size rounded up to whole blocks). Paths ending in
+# "/" are directories, which are left out.
+#
+# The first line decides which of the two it is for the whole manifest.
+# Without sizes and times nothing is known about the files but their
+# names, so zero-length and bad frames aren't looked for, and -t,
+# --only-show and --long are left out (with a warning). Lines of the
+# other kind are left out with a warning.
+#
+# The files of a directory are held on to until a path outside of it
+# and its subdirectories comes along (for the output of 'find', or the
+# sorted paths, that means it has no more files to come), then listed.
+# So each directory is listed after its subdirectories, like with
+# 'find -depth'. 'openDirs' holds the directories still taking files,
+# as two-element lists [dirPath, entries], each below the one before
+# it. 'listedDirs' holds those listed so far, to warn of any coming up
+# again, i.e., of a manifest whose lines of a directory are not together.
+#
+def listManifest(args) :
+    import itertools
+
+    records = readPathList(args.manifestFile, args)
+    firstRecord = next(records, None)
+    if firstRecord == None :
+        return
+    records = itertools.chain([firstRecord], records)
+    hasColumns = manifestColumns(firstRecord) != None
+    if not hasColumns :
+        settleManifestOptions(args)
+
+    needStats = any(needs != STAT_NAME_ONLY for needs in args.statPlan.values())
+    openDirs = []
+    listedDirs = set()
+    firstDir = True
+    currentDir = None # The last of openDirs,
+    entries = None    # and its files.
+
+    def isWithin(path, dirPath) :
+        if path == dirPath :
+            return True
+        if dirPath == "" : # The current directory.
+            return path[:1] != "/"
+        if dirPath[-1] != "/" :
+            dirPath += "/"
+        return path.startswith(dirPath)
+
+    def listLastOpenDir() :
+        nonlocal firstDir
+        dirPath, dirEntries = openDirs.pop()
+        if dirPath in listedDirs :
+            printManifestWarning("the files of '" + (dirPath or ".")
+                + "' are not all together in the manifest, so it is listed again.", args)
+        listedDirs.add(dirPath)
+        listManifestDir(dirPath, dirEntries, firstDir, args)
+        firstDir = False
+
+    for record in records :
+        size = 0
+        mtime = 0
+        if hasColumns :
+            columns = manifestColumns(record)
+            if columns == None :
+                printManifestWarning("no size and mtime for '" + record
+                    + "' in the manifest, so it is left out.", args)
+                continue
+            size, mtime, record = columns
+        if record[-1] == "/" :
+            continue
+
+        dirPath, separator, name = record.rpartition("/")
+        if separator != "" and dirPath == "" :
+            dirPath = "/"
+        if args.ignoreDotFiles and name[0] == "." :
+            continue
+
+        if dirPath != currentDir :
+            while len(openDirs) > 0 and not isWithin(dirPath, openDirs[-1][0]) :
+                listLastOpenDir()
+            if len(openDirs) == 0 or dirPath != openDirs[-1][0] :
+                openDirs.append([dirPath, []])
+            currentDir, entries = openDirs[-1]
+
+        lstatInfo = None
+        if needStats :
+            lstatInfo = os.stat_result(
+                (MANIFEST_FILE_MODE, len(entries) + 1, 0, 1, 0, 0, size, 0, int(mtime), 0),
+                {"st_mtime" : mtime, "st_mtime_ns" : int(mtime * 1e9),
+                    "st_blocks" : (size + 511) // 512})
+        entries.append(CachedEntry(name, None, False, False, lstatInfo))
+
+    while len(openDirs) > 0 :
+        listLastOpenDir()
+
+# Returns the three-tuple (size, mtime, path) of the --from-manifest
+# line 'record', or None if it doesn't start with a size and mtime.
+#
+def manifestColumns(record) :
+    if "\t" not in record :
+        return None
+    columns = record.split("\t", 2)
+    if len(columns) < 3 :
+        return None
+    try :
+        return (int(columns[0]), float(columns[1]), columns[2])
+    except ValueError :
+        return None
+
+# Turn off what needs the sizes or times of files, for a --from-manifest
+# without them, see listManifest().
+#
+def settleManifestOptions(args) :
+    if args.sortByMTime or args.cutoffTime != None or args.longListing or args.showBad :
+        printManifestWarning("the manifest has no sizes or times, "
+            "so -b, -t, --only-show and --long are left out.", args)
+    args.showZero = False
+    args.showBad = False
+    args.sortByMTime = False
+    args.globalSortByTime = False
+    args.cutoffTime = None
+    args.longListing = False
+    for category in args.statPlan :
+        args.statPlan[category] &= STAT_NEED_MODE
+
+def printManifestWarning(message, args) :
+    global gExitStatus
+
+    if not args.silent :
+        flushForWarning()
+        print(PROG_NAME, ": warning: ", message, sep='', file=sys.stderr)
+        sys.stderr.flush()
+    gExitStatus = gExitStatus | EXIT_LS_WARNING
+
+# List the files 'entries' (CachedEntry objects) of the directory
+# 'dirPath' from a --from-manifest, with a title like that of a
+# recursive listing.
+#
+def listManifestDir(dirPath, entries, firstDir, args) :
+    if dirPath == "" :
+        dirPath = "."
+        traversedPath = ""
+    elif dirPath[-1] == "/" :
+        traversedPath = dirPath
+    else :
+        traversedPath = dirPath + "/"
+    if args.prependPath == PATH_ABS and traversedPath[:1] != "/" :
+        traversedPath = os.getcwd() + "/" + traversedPath
+
+    if args.prependPath == PATH_NOPREFIX :
+        if not firstDir :
+            writeOut("\n")
+        writeOut(dirPath + ":\n")
+
+    listSeqDir(gatherDirContents(entries, False, args), None, dirPath, False, args,
+        traversedPath)
+
+# List args.files (or the current directory) the way the command line
+# asks for, which is the whole listing of lsseq unless --batch is used.
+# 'prefetchedScan', if given, is what scanSubDir() already gathered of
+# the one directory in args.files, see listBatch().
+#
+def listFiles(args, prefetchedScan=None) :
+    global gJsonSeparator
+    global gSortRunsSize
+    global gSortCutoff
+
+    if args.seqFormat == 'json' :
+        gJsonSeparator = "["
+
     # Now the meat and potatoes.
     # The following logic attempts to mimic the behavior
     # of /bin/ls as closely as possible.
 
+    # Or rather the files named in a --from-manifest.
+    #
+    if args.manifestFile != None :
+        listManifest(args)
+
     # No args.files means list the current directory.
     #
-    if len(args.files) == 0 :
+    elif len(args.files) == 0 :
         if not args.listDirContents :
-            if gListWhichFiles & LIST_NO_OMISSIONS :
-                print(".") # Yup, we're done!
+            if args.seqFormat in JSON_FORMATS :
+                printOtherRecord(".", "")
+            elif args.listFlags & LIST_NO_OMISSIONS :
+                writeOut(".\n") # Yup, we're done!
         else :
             if args.isRecursive :
                 if args.prependPath == PATH_NOPREFIX :
-                    print(".:")
+                    writeOut(".:\n")
                 passedPath = "./"
             else :
                 passedPath = ""
@@ -2265,17 +5048,13 @@ def main() :
             # because we don't want listSeqDir() to interpret the
             # list of files a coming from the command line.
             # 
-            listSeqDir(stripDotFiles(os.listdir("."), args.ignoreDotFiles), ".",
-                False, args, passedPath)
+            listTopDir(".", args, passedPath)
 
     # We are being asked to list a specific directory, so we don't need
     # to print the directory name before listing the contents (unless
     # it is a recursive listing).  (/bin/ls behavior.)
     #
-    elif len(args.files) == 1 \
-            and (  (os.path.isdir(args.files[0]) and not os.path.islink(args.files[0])) \
-                or (os.path.isdir(args.files[0]) and os.path.islink(args.files[0])) and deRefDirs(True))\
-            and args.prependPath != PATH_ABS :
+    elif len(args.files) == 1 and isTopDir(args.files[0], args) :
         arg0 = args.files[0]
         # Strip out trailing "/" that may have been tacked on by
         # file completion.  (/bin/ls does not do this - but it's
@@ -2285,13 +5064,16 @@ def main() :
             arg0 = args.files[0][:-1]
 
         if not args.listDirContents :
-            print(arg0) # Yes, we're done here too.
+            if args.seqFormat in JSON_FORMATS :
+                printOtherRecord(arg0, "")
+            else :
+                writeOut(arg0 + "\n") # Yes, we're done here too.
 
         else :
 
             if args.isRecursive : # The case where we do need to print the dir "title".
                 if args.prependPath == PATH_NOPREFIX :
-                    print(arg0, ":", sep='')
+                    writeOut(arg0 + ":\n")
                 passedPath = arg0 + "/"
             else :
                 passedPath = ""
@@ -2309,8 +5091,7 @@ def main() :
             if arg0[0] == "/" :
                 passedPath = arg0 + "/"
 
-            listSeqDir(stripDotFiles(os.listdir(arg0), args.ignoreDotFiles), arg0,
-                False, args, passedPath)
+            listTopDir(arg0, args, passedPath, prefetchedScan)
 
     # List all the arguments on the command line (unless prevented by
     # the "-d" option). listSeqDir() will also list the contents of all the directories
@@ -2321,7 +5102,11 @@ def main() :
         passedPath = ""
         if args.prependPath == PATH_ABS :
             passedPath = os.getcwd() + "/"
-        listSeqDir(args.files, ".", True, args, passedPath)
+        cmdLineEntries = [CmdLineEntry(f) for f in args.files]
+        if gScanPool != None :
+            list(gScanPool.map(CmdLineEntry.is_dir, cmdLineEntries))
+        listSeqDir(gatherDirContents(cmdLineEntries, True, args),
+            None, ".", True, args, passedPath)
 
 
     # If we need to print the sequences globally sorted by time,
@@ -2336,64 +5121,214 @@ def main() :
         #   '/bin/ls -t'  prints newest first;
         #   '/bin/ls -tr' prints newest last.
         #
-        # Therefor we DO NOT want to reverse the sort order
-        # of python's list.sort() when --reverse is invoked.
-        # Otherwise we DO want to reverse the sort.
+        # The records of each directory were sorted (see addSortRun())
+        # on the key
         #
-        # Further note: Since Python's list sort is stable, i.e.,
-        # meaning it preserves the original order of elements with
-        # equal keys, we start sorting with the least significant keys.
+        #     (-mtime, traversedPath, name)
         #
-        # Then the following logic reproduces how /bin/ls sorts entries
-        # with equal times.
+        # that is, newest first, with entries of equal times ordered by
+        # traversedPath then name, which reproduces how /bin/ls sorts
+        # entries with equal times. With --reverse the whole order,
+        # including that of equal times, is simply reversed.
         #
         # Lastly this careful attention detail will likely ONLY be apparent
         # when globally sorting a bunch of sym-linked sequences that happen
         # to point to the same target files and --dereference is invoked.
         # (I expect very rare except in my test code.)
         #
-        if args.reverseListing :
-            gTimeList.sort(key=itemgetter(DICTKEY), reverse=True) # Sort by DICTKEY
-            gTimeList.sort(key=itemgetter(TRAVERSEDPATH), reverse=True) # then by TRAVERSEDPATH
-            gTimeList.sort(key=itemgetter(MTIME), reverse=False) # Last, and mainly, MTIME.
-        else :
-            gTimeList.sort(key=itemgetter(DICTKEY), reverse=False) # Sort by DICTKEY
-            gTimeList.sort(key=itemgetter(TRAVERSEDPATH), reverse=False) # then by TRAVERSEDPATH
-            gTimeList.sort(key=itemgetter(MTIME), reverse=True) # Last, and mainly, MTIME.
-
-        for seq in gTimeList :
-            if args.cutoffTime != None :
-                if args.cutoffTime[0] == 'before' :
-                    if seq[MTIME] > args.cutoffTime[1] :
-                        continue
-                else : # Guaranteed to be 'since'
-                    if seq[MTIME] < args.cutoffTime[1] :
-                        continue
-            gDictKey = seq[TRAVERSEDPATH] + '/' + seq[DICTKEY]
-            if isMovie(seq[DICTKEY]) :
-                traversedPath = seq[TRAVERSEDPATH]
-                if args.prependPath != PATH_NOPREFIX and seq[DICTKEY][0] != '/' :
-                    # Strip off any leading "./" from traversedPath. (added v3.0.1)
-                    #
-                    if len(traversedPath) > 1 and traversedPath[0:2] == "./" :
-                        sys.stdout.write(traversedPath[2:])
-                    else :
-                        sys.stdout.write(traversedPath)
-                else :
-                    sys.stdout.write(traversedPath)
-                classifyTag = ""
-                movIsLink = gMovieDictionary[gDictKey][MOVIE_ISSYMLINK]
-                if movIsLink and args.classify:
-                    classifyTag = "@"
-                print(seq[DICTKEY], classifyTag, sep='')
-
-            elif isCache(seq[DICTKEY]) :
-                gCacheDictionary[gDictKey].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                printSeq(seq[DICTKEY], gCacheDictionary[gDictKey], args, seq[TRAVERSEDPATH])
+        for record in mergeSortRuns(args) :
+            if len(record[SORT_WARNINGS]) > 0 :
+                writeWarning(record[SORT_WARNINGS])
+            writeOut(record[SORT_OUTPUT])
+
+        # Start afresh for the next path of a --batch.
+        #
+        gSortRuns.clear()
+        gSortSpillFiles.clear()
+        gSortRunsSize = 0
+        gSortCutoff = None
+
+    endJsonArray()
+
+# Yields the paths in the binary file 'pathFile' (for --batch or
+# --from-manifest), each ended by a newline, or a NUL with -0, as soon
+# as it has come in. Empty paths are skipped. Whatever has come in is
+# decoded all at once, which neither a newline nor a NUL can be part
+# of a multi-byte character to get in the way of.
+#
+def readPathList(pathFile, args) :
+    delimiter = b"\0" if args.batchNull else b"\n"
+    textDelimiter = os.fsdecode(delimiter)
+    unfinished = b""
+    while True :
+        data = pathFile.read1(65536)
+        if len(data) == 0 :
+            break
+        end = data.rfind(delimiter)
+        if end < 0 :
+            unfinished += data
+            continue
+        paths = os.fsdecode(unfinished + data[:end]).split(textDelimiter)
+        unfinished = data[end + 1:]
+        for path in paths :
+            if len(path) > 0 :
+                yield path
+    if len(unfinished) > 0 :
+        yield os.fsdecode(unfinished)
+
+# Gather the directory 'path' of a --batch in the thread-pool ahead of
+# listing it, see listBatch(). Returns None if 'path' is not listed
+# with listTopDir() or can't be read, leaving it to be looked at again
+# (and any error reported) when its turn comes.
+#
+def prefetchBatchPath(path, args) :
+    if not args.listDirContents or not isTopDir(path, args) :
+        return None
+    try :
+        return scanSubDir(path, None, args, args.isRecursive)
+    except OSError :
+        return None
+
+# List each path read from stdin for --batch as if it alone had been
+# given on the command line, then print its --batch-end line. With a
+# thread-pool the directories of up to args.jobs paths already on
+# stdin are gathered while the current one is being listed, but a path
+# is never held back waiting for more input, so that --batch can also
+# serve paths sent to it one at a time.
+#
+def listBatch(args) :
+    global gExitStatus
+    import queue
+    import threading
+
+    stdinPaths = queue.Queue()
+    def readStdin() :
+        for path in readPathList(sys.stdin.buffer, args) :
+            stdinPaths.put(path)
+        stdinPaths.put(None)
+    threading.Thread(target=readStdin, daemon=True).start()
+
+    batchStatus = gExitStatus
+    lookAhead = args.jobs if gScanPool != None else 0
+    pending = [] # (path, prefetch) of the paths to list next.
+    endOfInput = False
+    while not endOfInput or len(pending) > 0 :
+        while not endOfInput and len(pending) <= lookAhead :
+            try :
+                path = stdinPaths.get(block=(len(pending) == 0))
+            except queue.Empty :
+                break
+            if path == None :
+                endOfInput = True
+            elif gScanPool != None :
+                pending.append((path, gScanPool.submit(prefetchBatchPath, path, args)))
             else :
-                gImageDictionary[gDictKey].sort(key=itemgetter(FRAME_NUM, FRAME_PADDING))
-                printSeq(seq[DICTKEY], gImageDictionary[gDictKey], args, seq[TRAVERSEDPATH])
+                pending.append((path, None))
+
+        if len(pending) == 0 :
+            break
+        path, prefetch = pending.pop(0)
+
+        gExitStatus = EXIT_NO_ERROR
+        args.files = [path]
+        listFiles(args, None if prefetch == None else prefetch.result())
+        batchStatus = batchStatus | gExitStatus
+        if args.batchEnd != None :
+            writeOut(args.batchEnd.format(path=path, status=gExitStatus) + "\n")
+        flushOut()
+
+    gExitStatus = batchStatus
+
+def main() :
+
+    # Redefine the exception handling routine so that it does NOT
+    # do a trace dump if the user types ^C while lsseq is running.
+    #
+    old_excepthook = sys.excepthook
+    def new_hook(exceptionType, value, traceback) :
+        if exceptionType != KeyboardInterrupt and exceptionType != IOError :
+            old_excepthook(exceptionType, value, traceback)
+        else :
+            pass
+    sys.excepthook = new_hook
+
+    global gExitStatus
+    global gScanPool
+
+    args = parseArgs(sys.argv[1:])
+
+    profilePath = os.getenv("LSSEQ_PROFILE")
+    if args.profile or (profilePath != None and profilePath != "") :
+        setupProfile(args)
+
+    setupOutput(args)
+
+    # The built-in formatting of non-sequences sorts them in the
+    # collating order of the user's locale, just like 'ls' does.
+    #
+    locale = localeModule()
+    try :
+        locale.setlocale(locale.LC_COLLATE, "")
+    except locale.Error :
+        pass
+
+    setupExtensions()
+
+    #
+    # Respond to arguments set by user and/or set up variables
+    # etc. needed later based on the user's arguments.
+    #
+
+    if args.printImgExtensions :
+        print(PROG_NAME,
+            ": Modify the following environment variables to extend the supported file types.", sep='')
+        print("       NOTE: ", PROG_NAME,
+            " also recognizes the following extensions when uppercase.", sep='')
+        extList = ":".join(gImageExtList)
+        print("  export LSSEQ_IMAGE_EXTENSION=", extList, sep='')
+        extList = ":".join(gMovieExtList)
+        print("  export LSSEQ_MOV_EXTENSION=", extList, sep='')
+        extList = ":".join(gCacheExtList)
+        print("  export LSSEQ_CACHE_EXTENSION=", extList, sep='')
+        sys.exit(EXIT_NO_ERROR)
+
+    try :
+        settleOptions(args)
+    except ValueError as e :
+        if not args.silent :
+            print(PROG_NAME, ": error: ", e, file=sys.stderr, sep='')
+        sys.exit(gExitStatus | EXIT_ARGPARSE_ERROR) # Doing our own 'argparse' checks here.
+
+    if args.daemonSocket == None :
+        args.daemonSocket = defaultDaemonSocket()
+    if args.daemon :
+        runDaemon(args.files if len(args.files) > 0 else ["."], args)
+    elif args.useDaemon :
+        connectDaemon(args.daemonSocket)
+
+    if args.cacheDir == None :
+        args.cacheDir = os.getenv("LSSEQ_CACHE")
+    if args.cacheDir != None and args.cacheDir != "" :
+        setupScanCache(args)
+
+    if args.jobs == None :
+        args.jobs = CMDLINE_JOBS if len(args.files) > 1 or args.batch else 1
+    if args.jobs > 1 :
+        import concurrent.futures
+        gScanPool = concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs)
+
+    if args.batch :
+        listBatch(args)
+    else :
+        listFiles(args)
+
+    if gScanPool != None :
+        gScanPool.shutdown(wait=False)
+
+    if gScanCacheWritten :
+        trimScanCache(args.cacheSize * 1024 * 1024)
 
+    flushOut()
     sys.exit(gExitStatus)
 
 if __name__ == '__main__' :
@@ -28,7 +28,6 @@ setup(
 
     packages        = ['lsseq'],
     python_requires = '>=3.7, <4',
-    install_requires=['seqLister>=1.0.0'],
 
     entry_points = {
         'console_scripts': [
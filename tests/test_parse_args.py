@@ -0,0 +1,20 @@
+# Unit tests of parseArgs(), run with 'python -m pytest' from the top of
+# the repository. The command line is tested by test_lsseq.
+
+from lsseq.__main__ import QUICK_OPTIONS, makeParser, parseArgs
+
+# parseArgs() has its own copy of the defaults (OPTION_DEFAULTS), which
+# must be those of makeParser().
+#
+def test_defaults_match_parser() :
+    assert vars(parseArgs([])) == vars(makeParser().parse_args([]))
+
+# Each of the QUICK_OPTIONS, and all of them run together, parse the
+# same as with makeParser().
+#
+def test_quick_options_match_parser() :
+    parser = makeParser()
+    argvs = [["-" + "".join(QUICK_OPTIONS), "x"]] \
+        + [["-" + c, "x", "y"] for c in QUICK_OPTIONS]
+    for argv in argvs :
+        assert vars(parseArgs(argv)) == vars(parser.parse_args(argv)), argv
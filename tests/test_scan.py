@@ -0,0 +1,52 @@
+# Unit tests of lsseq.scan(), run with 'python -m pytest' from the top of
+# the repository. The command line is tested by test_lsseq.
+
+import os
+
+import pytest
+
+import lsseq
+from lsseq.__main__ import EXIT_CD_PERMISSION_WARNING
+
+# A subdirectory that goes away between reading its parent directory and
+# descending into it is warned about, and the scan carries on.
+#
+def test_subdir_gone_before_descent(tmp_path, monkeypatch) :
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("a/b")
+    os.makedirs("a/c")
+    open("a/c/x.txt", "w").close()
+
+    records = lsseq.scan(["a"], recursive=True)
+    assert next(records) == { "type" : "file", "dir" : "a", "name" : "b" }
+    os.rmdir("a/b")
+    assert list(records) == [
+        { "type" : "file", "dir" : "a", "name" : "c" },
+        { "type" : "warning", "message" : "can not descend into a/b: no such file or directory.",
+          "status" : EXIT_CD_PERMISSION_WARNING },
+        { "type" : "file", "dir" : "a/c", "name" : "x.txt" },
+    ]
+
+# --help and --version would print and exit on the command line, so
+# scan() turns them down like any other option it doesn't know.
+#
+def test_help_and_version_rejected(capsys) :
+    for option in ("help", "version") :
+        with pytest.raises(ValueError) :
+            lsseq.scan([], **{ option : True })
+    assert capsys.readouterr().out == ""
+
+# The frame ranges come as [start, end] lists, the same as the records
+# of --format json.
+#
+def test_frame_ranges_are_lists(tmp_path, monkeypatch) :
+    monkeypatch.chdir(tmp_path)
+    for frame in (1, 2, 5, 6) :
+        open("a.%04d.exr" % frame, "w").close()
+    with open("a.0006.exr", "w") as f :
+        f.write("frame")
+
+    records = [r for r in lsseq.scan(show_zero=True) if r["type"] == "sequence"]
+    assert len(records) == 1
+    assert records[0]["missing"] == [[3, 4]]
+    assert records[0]["zero"] == [[1, 2], [5, 5]]